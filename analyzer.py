@@ -1,15 +1,40 @@
 # analyzer.py
 import json
 import logging
-import re
-from collections import defaultdict
+import mmap
+import random
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from datetime import datetime
+from operator import itemgetter
+import json_backend
+from clustering import TemplateMiner
+from entry_index import EntryIndexWriter
+from timeline import build_timeline
+from knowledge_base import KnowledgeBaseMatcher, get_matcher
+from retention import DEFAULT_RETENTION, EXEMPLARS_PER_SIGNATURE, RETAINERS, RETENTION_STRATEGIES
+from timestamps import TimestampParser
 from utils import LOG_LEVEL_NAMES
 
-# Construct an absolute path to the knowledge base to ensure it's always found.
 BASE_DIR = Path(__file__).resolve().parent
-KNOWLEDGE_BASE_PATH = BASE_DIR / 'knowledge_base.json'
+
+# Number of entries kept for the "All Log Entries" table (see retention).
+MAX_DISPLAYED_ENTRIES = 500
+# Characters read per chunk when streaming log files.
+STREAM_CHUNK_SIZE = 64 * 1024
+# Smallest NDJSON log worth splitting across processes in analyze_logs.
+PARALLEL_MIN_BYTES = 8 * 1024 * 1024
+# Most points drawn in the timeline chart; coarser buckets are used beyond it.
+TIMELINE_MAX_POINTS = 500
+# Distinct masked messages tracked per level for the Error Summary; beyond it
+# the least frequent are replaced (Space-Saving) and counts become bounded estimates.
+SUMMARY_MAX_MESSAGES = 20000
+# Lowest level mined for the Error Summary and matched against the knowledge
+# base when a report does not ask for lower; entries below it are only
+# counted, charted and kept for the log table.
+SUMMARY_MIN_LEVEL = 30
+# Error Summary rows embedded per level for the report's level toggle; the
+# full table of another level needs a report generated at that level.
+LEVEL_VIEW_SUMMARY_ROWS = 100
 
 def _format_value(value):
     """Formats a setting's value into a string, handling dicts/lists."""
@@ -44,123 +69,640 @@ def _process_settings_list(settings_list, key_field='_id', value_field='value'):
         analyzed.append({'Setting': key, 'Value': value_str})
     return analyzed
 
-def analyze_logs(file_path, min_level=50):
-    """Parses logs from a Rocket.Chat support dump file."""
-    found_entries = []
+def empty_log_result():
+    """Returns the analyze_logs result shape for a dump without usable logs."""
+    return {'summary': [], 'summary_floor': 0, 'all_errors': [], 'retention': DEFAULT_RETENTION, 'total_error_count': 0, 'recommendations': [], 'chart_data_timeline': {}, 'chart_data_severity': {}}
+
+class _JSONStreamReader:
+    """
+    Incremental JSON reader over a text file object.
+
+    Decodes one JSON value at a time with ``JSONDecoder.raw_decode`` while only
+    keeping the unread part of the file in memory, which lets us walk the
+    ``{"queue": [...]}`` envelope item by item instead of loading it whole.
+    """
+
+    def __init__(self, f, chunk_size=STREAM_CHUNK_SIZE):
+        self._f = f
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+
+    def _fill(self, min_size=0):
+        """Reads more data into the buffer. Returns False at end of file."""
+        if self._eof:
+            return False
+        chunk = self._f.read(max(self._chunk_size, min_size))
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self):
+        """Returns the next non-whitespace character without consuming it ('' at EOF)."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in ' \t\r\n':
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        """Consumes the next non-whitespace character, which must be ``char``."""
+        found = self.peek()
+        if found != char:
+            raise json.JSONDecodeError(f"Expected {char!r}, found {found!r}", self._buf, self._pos)
+        self._pos += 1
+
+    def decode(self):
+        """Decodes and consumes the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                # Most likely a value cut by the chunk boundary; grow geometrically
+                # so huge values don't turn into quadratic re-decoding.
+                if not self._fill(len(self._buf) - self._pos):
+                    raise
+                continue
+            # A number at the very end of the buffer may still be incomplete.
+            if end == len(self._buf) and not self._eof and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def iter_lines(self):
+        """Yields the remaining unread content line by line."""
+        rest = self._buf[self._pos:]
+        self._buf, self._pos = '', 0
+        while True:
+            newline = rest.find('\n')
+            if newline != -1:
+                yield rest[:newline]
+                rest = rest[newline + 1:]
+                continue
+            chunk = '' if self._eof else self._f.read(self._chunk_size)
+            if not chunk:
+                if rest:
+                    yield rest
+                return
+            rest += chunk
+
+def _iter_queue_entries(reader):
+    """Yields log entries from the ``queue`` array of an envelope, one item at a time."""
+    reader.expect('[')
+    if reader.peek() == ']':
+        reader.expect(']')
+        return
+    while True:
+        item = reader.decode()
+        if isinstance(item, dict) and 'string' in item:
+            try:
+                yield json_backend.loads(item['string'])
+            except (ValueError, TypeError):
+                pass
+        if reader.peek() == ',':
+            reader.expect(',')
+            continue
+        reader.expect(']')
+        return
+
+def _parse_ndjson_line(line):
+    """Decodes one NDJSON line (raw bytes or str); plain-text lines become level-less messages. Returns None to skip."""
+    stripped = line.strip()
+    if not stripped:
+        return None
     try:
-        # Check if file_path is None or doesn't exist before trying to open
-        if not file_path or not file_path.exists():
-            logging.warning(f"Log file not found at path: {file_path}")
-            return {'summary': [], 'all_errors': [], 'total_error_count': 0, 'recommendations': [], 'chart_data_timeline': {}, 'chart_data_severity': {}}
+        return json_backend.loads(stripped)
+    except ValueError:
+        if isinstance(stripped, bytes):
+            stripped = stripped.decode('utf-8', errors='replace')
+        if not stripped.startswith('{'):
+            return {'msg': stripped, 'level': None}
+        logging.warning(f"Skipping malformed line: {stripped}")
+        return None
 
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
+def _iter_ndjson_entries(lines):
+    """Yields log entries from newline-delimited JSON, keeping plain-text lines as messages."""
+    for line in lines:
+        entry = _parse_ndjson_line(line)
+        if entry is not None:
+            yield entry
+
+def _is_entry_line(line):
+    """True when a first line decodes to a log entry object rather than the start of an envelope."""
+    try:
+        first_entry = json_backend.loads(line)
+    except ValueError:
+        return False
+    return isinstance(first_entry, dict) and 'queue' not in first_entry
+
+def iter_log_entries(file_path, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Streams decoded log entries from a Rocket.Chat log file.
+
+    ``file_path`` may be a Path or any object with a Path-like ``open`` (such as
+    a zip_dump.ZipMember).
+
+    Handles both the ``{"queue": [{"string": "<json>"}, ...]}`` envelope and
+    newline-delimited JSON. Entries are yielded one at a time so callers can
+    aggregate them without holding the whole file in memory. NDJSON lines are
+    decoded straight from their raw bytes by the json_backend.
+    """
+    # Binary lines end at b'\n' only, exactly as in the byte-range shards of
+    # the parallel path.
+    with file_path.open('rb') as f:
+        head = f.read(chunk_size)
+        first_line, newline, _ = head.lstrip().partition(b'\n')
+        if not first_line.startswith(b'{') or ((newline or len(head) < chunk_size) and _is_entry_line(first_line)):
+            f.seek(0)
+            yield from _iter_ndjson_entries(f)
+            return
+
+    # newline='' keeps '\r' untranslated, as in the binary path.
+    with file_path.open('r', encoding='utf-8', newline='') as f:
+        reader = _JSONStreamReader(f, chunk_size)
+        if reader.peek() != '{':
+            yield from _iter_ndjson_entries(reader.iter_lines())
+            return
+
+        # Walk the first object key by key. If it carries a queue array it is the
+        # envelope; otherwise it was just the first line of an NDJSON file.
+        first_object = {}
+        in_queue = False
         try:
-            data = json.loads(content)
-            if 'queue' in data and isinstance(data['queue'], list):
-                for item in data['queue']:
-                    if isinstance(item, dict) and 'string' in item:
-                        try:
-                            log_entry = json.loads(item['string'])
-                            found_entries.append(log_entry)
-                        except (json.JSONDecodeError, TypeError):
-                            continue 
+            reader.expect('{')
+            while reader.peek() != '}':
+                if first_object:
+                    reader.expect(',')
+                key = reader.decode()
+                reader.expect(':')
+                if key == 'queue' and reader.peek() == '[':
+                    in_queue = True
+                    yield from _iter_queue_entries(reader)
+                    in_queue = False
+                    first_object[key] = []
+                else:
+                    first_object[key] = reader.decode()
+            reader.expect('}')
         except json.JSONDecodeError:
+            if in_queue or 'queue' in first_object:
+                logging.warning(f"Log envelope in '{file_path}' is truncated or malformed; stopping early.")
+                return
             logging.info("Could not parse as single JSON object with a queue, falling back to line-by-line parsing.")
-            for line in content.splitlines():
-                try:
-                    if line.strip():
-                        found_entries.append(json.loads(line))
-                except json.JSONDecodeError:
-                    if line.strip() and not line.strip().startswith('{'):
-                         found_entries.append({'msg': line.strip(), 'level': None})
-                    else:
-                        logging.warning(f"Skipping malformed line: {line.strip()}")
-
-        filtered_entries = [
-            entry for entry in found_entries
-            if (entry.get('level') is not None and entry.get('level') >= min_level)
-        ]
-        
-        total_entry_count = len(filtered_entries)
-        limited_entries = filtered_entries[-500:]
-        summary = defaultdict(lambda: {'Message': '', 'Count': 0, 'LastSeen': ''})
-        
-        try:
-            with open(KNOWLEDGE_BASE_PATH, 'r', encoding='utf-8') as f:
-                knowledge_base = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            knowledge_base = []
-            logging.warning(f"Knowledge base not found or invalid at {KNOWLEDGE_BASE_PATH}.")
-
-        found_recommendations = {}
-        # New dictionaries for chart data
-        timeline_counts = defaultdict(int)
-        severity_counts = defaultdict(int)
-
-        for entry in filtered_entries:
+            f.seek(0)
+            yield from _iter_ndjson_entries(_JSONStreamReader(f, chunk_size).iter_lines())
+            return
+
+        if 'queue' not in first_object:
+            yield first_object
+            yield from _iter_ndjson_entries(reader.iter_lines())
+
+class _LevelPartition:
+    """Aggregates of the entries logged at one level."""
+
+    __slots__ = ('count', 'first_pos', 'retained', 'templates', 'recommendations', 'timeline')
+
+    def __init__(self, first_pos, retained, templates):
+        self.count = 0
+        self.first_pos = first_pos
+        self.retained = retained  # entries for the log table, unless the templates keep exemplars
+        self.templates = templates  # None below the aggregator's summary_min_level
+        self.recommendations = {}  # title -> (position, kb_entry) of its first match
+        self.timeline = {}  # epoch minute -> [count, position of first entry, its UTC offset]
+
+    def add_bucket(self, minute, count, first_pos, offset):
+        bucket = self.timeline.get(minute)
+        if bucket is None:
+            self.timeline[minute] = [count, first_pos, offset]
+        else:
+            bucket[0] += count
+            if first_pos < bucket[1]:
+                bucket[1], bucket[2] = first_pos, offset
+
+    def merge(self, other, offset):
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.first_pos = other.first_pos + offset
+        self.count += other.count
+        if self.retained is not None:
+            self.retained.merge(other.retained, offset)
+        if self.templates is not None:
+            self.templates.merge(other.templates, offset)
+        for title, (pos, kb_entry) in other.recommendations.items():
+            self.recommendations.setdefault(title, (pos + offset, kb_entry))
+        for minute, (count, first_pos, utc_offset) in other.timeline.items():
+            self.add_bucket(minute, count, first_pos + offset, utc_offset)
+
+class LogAggregator:
+    """
+    Builds the analyze_logs result incrementally, one entry at a time.
+
+    Only aggregates are kept (message templates, chart buckets, matched
+    recommendations and a bounded set of entries for the log table), so
+    memory does not grow with the size of the log file.
+
+    Aggregates are partitioned by level and every entry is numbered, so one
+    pass over a log answers any ``min_level``: result() merges the partitions
+    at or above the threshold back into file order, giving exactly what a
+    pass filtered at that level would have produced.
+
+    Each level tracks at most ``summary_max_messages`` distinct masked
+    messages (None for no limit), which caps the memory and sorting cost of
+    the Error Summary on logs with huge message cardinality.
+
+    ``retention`` picks the ``tail_size`` entries kept for the log table: the
+    most recent ('tail'), a uniform sample ('reservoir', drawn with ``seed``)
+    or the first and last entries of each template ('exemplars'). Each keeps
+    a fixed number of entries per level (per masked message for exemplars).
+
+    Messages of levels below ``summary_min_level`` (None for none) are only
+    counted, charted and retained. They are neither mined for the Error
+    Summary nor matched against the knowledge base, the two costliest steps
+    per entry, and results selecting such a level name the level their
+    summary starts at in 'summary_min_level'. Exemplars are drawn per masked
+    message, so with that retention every level is mined.
+
+    Results are memoized per set of selected levels until more entries are
+    added, so resolving several thresholds (the report, its level views, the
+    result cache snapshot) unions and clusters each distinct selection once.
+    They are shared between callers and must not be modified.
+    """
+
+    def __init__(self, min_level=50, matcher=None, tail_size=MAX_DISPLAYED_ENTRIES, timeline_points=TIMELINE_MAX_POINTS,
+                 summary_max_messages=SUMMARY_MAX_MESSAGES, retention=DEFAULT_RETENTION, seed=0, summary_min_level=None):
+        if retention not in RETENTION_STRATEGIES:
+            raise ValueError(f"Unknown retention '{retention}', expected one of {', '.join(RETENTION_STRATEGIES)}")
+        self.min_level = min_level
+        self.matcher = matcher or KnowledgeBaseMatcher([])
+        self.tail_size = tail_size
+        self.retention = retention
+        self._exemplars = EXEMPLARS_PER_SIGNATURE if retention == 'exemplars' else 0
+        self._rng = random.Random(seed)
+        self.timeline_points = timeline_points
+        self.summary_max_messages = summary_max_messages
+        self.summary_min_level = None if retention == 'exemplars' else summary_min_level
+        self.position = 0
+        self.levels = {}
+        self._parser = TimestampParser()
+        # (selected levels, timeline points) -> result, valid while position is _results_position
+        self._results = {}
+        self._results_position = 0
+
+    def _partition(self, level, pos):
+        partition = self.levels.get(level)
+        if partition is None:
+            retainer = RETAINERS.get(self.retention)
+            mined = self.summary_min_level is None or level >= self.summary_min_level
+            partition = self.levels[level] = _LevelPartition(
+                pos,
+                retainer(self.tail_size, self._rng) if retainer else None,
+                TemplateMiner(max_keys=self.summary_max_messages, exemplars=self._exemplars) if mined else None
+            )
+        return partition
+
+    def add(self, entry):
+        """Folds a single decoded log entry into the aggregates of its level."""
+        if not isinstance(entry, dict):
+            return
+        level = entry.get('level')
+        if not isinstance(level, (int, float)):
+            return
+
+        pos = self.position
+        self.position += 1
+        partition = self._partition(level, pos)
+        partition.count += 1
+        if partition.retained is not None:
+            partition.retained.add(pos, entry)
+
+        time_str = entry.get('time')
+
+        # --- Populate summary and recommendations ---
+        if partition.templates is not None:
             msg = entry.get('msg', 'Unknown Error')
-            level = entry.get('level')
-            time_str = entry.get('time')
+            partition.templates.add(msg, time_str, position=pos, entry=entry)
 
-            # --- Populate summary and recommendations ---
-            summary[msg]['Message'] = msg
-            summary[msg]['Count'] += 1
-            summary[msg]['LastSeen'] = time_str
-            
-            for kb_entry in knowledge_base:
-                if re.search(kb_entry['pattern'], msg):
-                    if kb_entry['title'] not in found_recommendations:
-                        found_recommendations[kb_entry['title']] = kb_entry
-            
-            # --- Process data for charts ---
-            if level:
-                severity_counts[level] += 1
-            
-            if time_str:
-                try:
-                    # Parse timestamp and truncate to the minute for bucketing
-                    dt_obj = datetime.fromisoformat(time_str.replace('Z', '+00:00'))
-                    time_bucket = dt_obj.replace(second=0, microsecond=0)
-                    timeline_counts[time_bucket] += 1
-                except (ValueError, TypeError):
-                    continue
-        
-        recommendations = list(found_recommendations.values())
+            # Once every recommendation has been found there is nothing left to match.
+            if len(partition.recommendations) < self.matcher.title_count:
+                for kb_entry in self.matcher.match(msg):
+                    if kb_entry['title'] not in partition.recommendations:
+                        partition.recommendations[kb_entry['title']] = (pos, kb_entry)
+
+        # --- Count entries per minute for the timeline ---
+        parsed = self._parser.parse(time_str) if time_str else None
+        if parsed is not None:
+            minute = parsed[0] // 60000
+            bucket = partition.timeline.get(minute)
+            if bucket is None:
+                partition.timeline[minute] = [1, pos, parsed[1]]
+            else:
+                bucket[0] += 1
+
+    def __getstate__(self):
+        # The matcher is process-wide state and the parser only a cache;
+        # shards only ship their aggregates.
+        state = self.__dict__.copy()
+        state['matcher'] = None
+        state['_parser'] = TimestampParser()
+        state['_results'] = {}
+        return state
 
+    def merge(self, other):
+        """Folds in an aggregator that was fed the entries following ours."""
+        for level, partition in other.levels.items():
+            self._partition(level, partition.first_pos + self.position).merge(partition, self.position)
+        self.position += other.position
+
+    def _selected(self, min_level):
+        """Partitions at or above ``min_level``, in order of first appearance."""
+        partitions = [(level, p) for level, p in self.levels.items() if level >= min_level and p.count]
+        return sorted(partitions, key=lambda item: item[1].first_pos)
+
+    @staticmethod
+    def _charts(selected, timeline_points):
         # --- Prepare chart data for Chart.js ---
-        # Timeline data (sorted)
-        sorted_timeline = sorted(timeline_counts.items())
-        chart_data_timeline = {
-            'labels': [dt.strftime('%H:%M') for dt, count in sorted_timeline],
-            'data': [count for dt, count in sorted_timeline]
-        }
+        # Timeline data at the finest resolution that fits the point budget;
+        # each minute is labelled in the UTC offset of its first entry
+        timeline = {}
+        for _, partition in selected:
+            for minute, (count, first_pos, offset) in partition.timeline.items():
+                bucket = timeline.get(minute)
+                if bucket is None:
+                    timeline[minute] = [count, first_pos, offset]
+                else:
+                    bucket[0] += count
+                    if first_pos < bucket[1]:
+                        bucket[1], bucket[2] = first_pos, offset
+        chart_data_timeline = build_timeline(
+            [(minute, count, offset) for minute, (count, _, offset) in sorted(timeline.items())],
+            timeline_points
+        )
 
         # Severity breakdown data
+        severity = [(level, partition.count) for level, partition in selected if level]
         chart_data_severity = {
-            'labels': [LOG_LEVEL_NAMES.get(lvl, f"Level {lvl}") for lvl in severity_counts.keys()],
-            'data': list(severity_counts.values())
+            'labels': [LOG_LEVEL_NAMES.get(lvl, f"Level {lvl}") for lvl, count in severity],
+            'data': [count for lvl, count in severity]
         }
+        return chart_data_timeline, chart_data_severity
+
+    def result(self, min_level=None, timeline_points=None):
+        """
+        Returns the aggregates of entries at or above ``min_level`` in the analyze_logs result format.
+
+        ``min_level`` and the ``timeline_points`` budget default to the
+        constructor's values.
+        """
+        if min_level is None:
+            min_level = self.min_level
+        selected = self._selected(min_level)
+        timeline_points = timeline_points or self.timeline_points
+        if self._results_position != self.position:
+            self._results = {}
+            self._results_position = self.position
+        key = (tuple(level for level, _ in selected), timeline_points)
+        result = self._results.get(key)
+        if result is None:
+            result = self._results[key] = self._result(selected, timeline_points)
+        return result
+
+    def _result(self, selected, timeline_points):
+        partitions = [partition for _, partition in selected]
+        mined = [partition for partition in partitions if partition.templates is not None]
+
+        templates = TemplateMiner.union((p.templates for p in mined), exemplars=self._exemplars)
+        if self.retention == 'exemplars':
+            retained = templates.exemplars(self.tail_size)
+        else:
+            retained = RETAINERS[self.retention].select([p.retained for p in partitions], self.tail_size)
+        first_matches = {}
+        for partition in partitions:
+            for title, match in partition.recommendations.items():
+                if title not in first_matches or match[0] < first_matches[title][0]:
+                    first_matches[title] = match
+        chart_data_timeline, chart_data_severity = self._charts(selected, timeline_points)
 
         return {
-            'summary': sorted(summary.values(), key=lambda x: x['Count'], reverse=True),
-            'all_errors': limited_entries,
-            'total_error_count': total_entry_count,
-            'recommendations': recommendations,
+            'summary': templates.summary(),
+            # Messages seen at most this often may be missing from a bounded summary.
+            'summary_floor': templates.floor,
+            # Set when entries of lower selected levels were not summarized.
+            'summary_min_level': self.summary_min_level if len(mined) < len(partitions) else None,
+            'all_errors': retained,
+            'retention': self.retention,
+            'total_error_count': sum(p.count for p in partitions),
+            'recommendations': [kb_entry for _, kb_entry in sorted(first_matches.values(), key=itemgetter(0))],
             'chart_data_timeline': chart_data_timeline,
             'chart_data_severity': chart_data_severity,
         }
+
+    def forms(self, min_level=None):
+        """
+        Returns the masked forms of the entries at or above ``min_level``
+        (see TemplateMiner.forms), counted over those levels.
+
+        Returns:
+            {masked message: {'Form': the masked message, 'Message': its
+            template, 'Count'}}
+        """
+        forms = {}
+        for _, partition in self._selected(self.min_level if min_level is None else min_level):
+            for row in partition.templates.forms() if partition.templates is not None else ():
+                form = forms.get(row['Form'])
+                if form is None:
+                    forms[row['Form']] = {'Form': row['Form'], 'Message': row['Message'], 'Count': row['Count']}
+                else:
+                    form['Count'] += row['Count']
+        return forms
+
+    def level_aggregates(self):
+        """
+        Returns the aggregates of each level on its own, in order of first appearance.
+
+        Returns:
+            List of (level, entry count, masked form rows (see
+            TemplateMiner.forms; none below summary_min_level), {epoch
+            minute: entry count}) tuples
+        """
+        return [
+            (level, partition.count, partition.templates.forms() if partition.templates is not None else [],
+             {minute: bucket[0] for minute, bucket in partition.timeline.items()})
+            for level, partition in self._selected(float('-inf'))
+        ]
+
+    def level_views(self, levels=LOG_LEVEL_NAMES, timeline_points=None):
+        """
+        Returns the report's log sections at each threshold in ``levels``.
+
+        They are embedded in the report, which lets it switch levels without
+        going back to the server (see _level_view).
+        """
+        return [_level_view(level, self.result(level, timeline_points)) for level in sorted(levels)]
+
+    def snapshot(self, levels=LOG_LEVEL_NAMES, timeline_points=None):
+        """Resolves the aggregates at each threshold in ``levels`` (and every standard level) into a JSON-serializable LogSnapshot."""
+        return LogSnapshot({level: self.result(level, timeline_points) for level in set(levels) | set(LOG_LEVEL_NAMES)})
+
+def _level_view(level, result):
+    """
+    The parts of an analyze_logs result the report swaps in when its level
+    toggle selects ``level``: counts, chart data, the most frequent
+    LEVEL_VIEW_SUMMARY_ROWS Error Summary rows and the retained entries.
+    """
+    return {
+        'level': level,
+        'name': LOG_LEVEL_NAMES.get(level, f"Level {level}"),
+        'total_count': result['total_error_count'],
+        'chart_data_timeline': result['chart_data_timeline'],
+        'chart_data_severity': result['chart_data_severity'],
+        'summary': result['summary'][:LEVEL_VIEW_SUMMARY_ROWS],
+        'summary_count': len(result['summary']),
+        'summary_floor': result['summary_floor'],
+        'summary_min_level': summary_level_name(result),
+        'entries': result['all_errors'],
+    }
+
+def summary_level_name(result):
+    """Name of the level a result's Error Summary starts at, when lower selected levels were not summarized."""
+    level = result.get('summary_min_level')
+    return None if level is None else LOG_LEVEL_NAMES.get(level, f"Level {level}")
+
+class LogSnapshot:
+    """
+    LogAggregator results precomputed at fixed thresholds.
+
+    Offers the same result()/level_views() interface as the aggregator, but
+    only for the thresholds it was taken at (always including the standard
+    levels), with the timeline point budget fixed when it was taken, and
+    round-trips through JSON.
+    """
+
+    def __init__(self, results):
+        self.results = results
+
+    def result(self, min_level, timeline_points=None):
+        """Returns the analyze_logs result at ``min_level``; KeyError if it was not captured."""
+        return self.results[min_level]
+
+    def level_views(self, levels=LOG_LEVEL_NAMES, timeline_points=None):
+        return [_level_view(level, self.results[level]) for level in sorted(levels)]
+
+    def to_dict(self):
+        return {'results': {str(level): result for level, result in self.results.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls({int(level): result for level, result in data['results'].items()})
+
+def _is_ndjson(file_path):
+    """True when the file is newline-delimited JSON rather than a queue envelope."""
+    with open(file_path, 'rb') as f:
+        return _is_entry_line(f.readline(STREAM_CHUNK_SIZE))
+
+def _ndjson_shards(file_path, shard_count):
+    """Splits a file into ``shard_count`` byte ranges that start and end on line boundaries."""
+    size = file_path.stat().st_size
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        bounds = [0]
+        for i in range(1, shard_count):
+            newline = mm.find(b'\n', max(size * i // shard_count, bounds[-1]))
+            if newline == -1:
+                break
+            bounds.append(newline + 1)
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+def _aggregate_shard(file_path, start, end, summary_max_messages=SUMMARY_MAX_MESSAGES, retention=DEFAULT_RETENTION, summary_min_level=None):
+    """Decodes and aggregates the NDJSON lines in ``[start, end)`` (runs in a worker process)."""
+    # Seeding by offset keeps shards from drawing the same sample keys.
+    aggregator = LogAggregator(matcher=get_matcher(), summary_max_messages=summary_max_messages, retention=retention, seed=start,
+                               summary_min_level=summary_min_level)
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = start
+        while pos < end:
+            newline = mm.find(b'\n', pos, end)
+            line_end = end if newline == -1 else newline
+            entry = _parse_ndjson_line(mm[pos:line_end])
+            if entry is not None:
+                aggregator.add(entry)
+            pos = line_end + 1
+    return aggregator
+
+def _index_logs_parallel(file_path, workers, summary_max_messages=SUMMARY_MAX_MESSAGES, retention=DEFAULT_RETENTION, summary_min_level=None):
+    """Aggregates NDJSON shards in a process pool and merges them in file order."""
+    shards = _ndjson_shards(file_path, workers)
+    logging.info(f"Parsing {file_path.name} in {len(shards)} shards on {workers} processes.")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        partials = [pool.submit(_aggregate_shard, file_path, start, end, summary_max_messages, retention, summary_min_level) for start, end in shards]
+        aggregator = LogAggregator(matcher=get_matcher(), summary_max_messages=summary_max_messages, retention=retention, summary_min_level=summary_min_level)
+        for partial in partials:
+            aggregator.merge(partial.result())
+    return aggregator
+
+def index_logs(file_path, workers=1, entry_index_dir=None, summary_max_messages=SUMMARY_MAX_MESSAGES, retention=DEFAULT_RETENTION,
+               summary_min_level=None):
+    """
+    Parses logs from a Rocket.Chat support dump file into a level-indexed LogAggregator.
+
+    Every entry is indexed whatever its level, so the returned aggregator
+    answers result(min_level) for any threshold without reparsing. With
+    ``workers`` > 1, NDJSON files of at least PARALLEL_MIN_BYTES are split
+    into line-aligned shards that are parsed in a process pool; the merged
+    aggregator is identical to the serial one.
+
+    With ``entry_index_dir``, the same pass also writes every entry to an
+    entry_index.EntryIndexWriter there (the log is then parsed serially).
+
+    ``summary_max_messages`` caps the distinct messages tracked per level,
+    ``retention`` picks the entries kept for the log table and
+    ``summary_min_level`` is the lowest level mined (see LogAggregator).
+    """
+    try:
+        # Check if file_path is None or doesn't exist before trying to open
+        if not file_path or not file_path.exists():
+            logging.warning(f"Log file not found at path: {file_path}")
+            return LogAggregator(retention=retention)
+
+        # Sharding needs a real file to mmap; archive members are always streamed.
+        if entry_index_dir is None and workers and workers > 1 and isinstance(file_path, Path) and file_path.stat().st_size >= PARALLEL_MIN_BYTES and _is_ndjson(file_path):
+            return _index_logs_parallel(file_path, workers, summary_max_messages, retention, summary_min_level)
+
+        aggregator = LogAggregator(matcher=get_matcher(), summary_max_messages=summary_max_messages, retention=retention, summary_min_level=summary_min_level)
+        if entry_index_dir is None:
+            for entry in iter_log_entries(file_path):
+                aggregator.add(entry)
+            return aggregator
+        with EntryIndexWriter(entry_index_dir) as writer:
+            for entry in iter_log_entries(file_path):
+                aggregator.add(entry)
+                writer.add(entry)
+        return aggregator
     except Exception as e:
         logging.error(f"Error analyzing logs at '{file_path}': {e}")
-        return {'summary': [], 'all_errors': [], 'total_error_count': 0, 'recommendations': [], 'chart_data_timeline': {}, 'chart_data_severity': {}}
+        return LogAggregator(retention=retention)
+
+def analyze_logs(file_path, min_level=50, workers=1, summary_max_messages=SUMMARY_MAX_MESSAGES, retention=DEFAULT_RETENTION):
+    """
+    Parses logs from a Rocket.Chat support dump file.
+
+    Returns the aggregates of entries at or above ``min_level``; see
+    index_logs for the parsing options.
+    """
+    return index_logs(file_path, workers, summary_max_messages=summary_max_messages, retention=retention, summary_min_level=min_level).result(min_level)
 
 def analyze_settings(file_path):
     """Parses the main settings file, handling both list and dict formats."""
     try:
         if not file_path or not file_path.exists(): return []
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = json_backend.load_file(file_path)
         
         if isinstance(data, dict):
             settings_list = [{'_id': k, 'value': v} for k, v in data.items()]
@@ -178,12 +720,11 @@ def analyze_apps(file_path):
     """Parses the installed apps file."""
     try:
         if not file_path or not file_path.exists(): return []
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = json_backend.load_file(file_path)
         apps_list = data.get('apps', []) if isinstance(data, dict) else data
         if not apps_list:
             logging.info("No apps found in apps file.")
-        return [{'Name': a.get('name'), 'Version': a.get('version'), 'Status': a.get('status')} for a in apps_list]
+        return [{'Name': a.get('name'), 'Version': a.get('version'), 'Status': a.get('status'), 'Id': a.get('id')} for a in apps_list]
     except Exception as e:
         logging.error(f"Error analyzing apps at '{file_path}': {e}")
         return []
@@ -192,8 +733,7 @@ def analyze_omnichannel(file_path):
     """Parses omnichannel settings safely from multiple possible structures."""
     try:
         if not file_path or not file_path.exists(): return []
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = json_backend.load_file(file_path)
         
         settings_list = []
         if isinstance(data, dict):
@@ -218,8 +758,7 @@ def analyze_statistics(file_path):
     """Parses server statistics and filters out null values."""
     try:
         if not file_path or not file_path.exists(): return []
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = json_backend.load_file(file_path)
         stats = {
             'Version': data.get('version'),
             'Total Users': data.get('totalUsers'),
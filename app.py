@@ -1,19 +1,56 @@
 # app.py
-from flask import Flask, render_template, request, flash
+from flask import Flask, Request, current_app, render_template, request, flash, jsonify, send_file, url_for, g
+import contextvars
+import hmac
+import ipaddress
+import logging
 import os
+import sqlite3
 import tempfile
-import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from jinja2 import Environment, FileSystemLoader
-from typing import Optional
+from typing import Iterator, Optional
 
 # Import the analysis and reporting functions
 import analyzer
+import dump_diff
+import entry_index
+import knowledge_base
+import metrics
+import pipeline
+import reporter
+from timestamps import parse_time_ms
 from config import config
+from dump_store import DumpStore
 from utils import (
-    validate_zip_file, safe_extract_zip, find_dump_path, 
-    get_safe_filename, setup_logging, ValidationError, LOG_LEVEL_NAMES
+    validate_zip_file, get_safe_filename, save_upload, setup_logging, UploadSink, ValidationError, LOG_LEVEL_NAMES
 )
+from jobs import JobManager, JobStore, DONE
+from result_cache import ResultCache
+from retention import RETENTION_LABELS, RETENTION_STRATEGIES
+from zip_dump import ZipDump
+
+class UploadRequest(Request):
+    """
+    Request that streams ZIP uploads into a utils.UploadSink as they arrive.
+
+    Werkzeug would otherwise spool the whole body to a temporary file before
+    the view runs; the sink hashes and checks it chunk by chunk instead, so
+    accessing ``files`` raises ValidationError as soon as an upload is too
+    large or not a usable ZIP.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if not filename or not filename.endswith('.zip'):
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        return UploadSink(current_app.config['MAX_CONTENT_LENGTH'], current_app.config['MAX_EXTRACTED_SIZE'])
+
+    # Token of the metrics trace started for this request, reset on teardown.
+    trace_token = None
+
+    def _load_form_data(self):
+        with metrics.span('receive', bytes=self.content_length):
+            super()._load_form_data()
 
 def create_app(config_name=None):
     """Application factory pattern."""
@@ -21,11 +58,17 @@ def create_app(config_name=None):
         config_name = os.environ.get('FLASK_ENV', 'development')
     
     app = Flask(__name__, template_folder='templates')
+    app.request_class = UploadRequest
     app.config.from_object(config[config_name])
     config[config_name].init_app(app)
     
     setup_logging()
     
+    # Load and compile the knowledge base and report template up front; with
+    # preload_app the Gunicorn workers inherit them instead of building their own.
+    knowledge_base.get_matcher()
+    reporter.warm_templates()
+    
     # Disable template caching in development
     if app.config['DEBUG']:
         app.jinja_env.auto_reload = True
@@ -40,121 +83,557 @@ def create_app(config_name=None):
     
     # Register routes
     register_routes(app)
+    register_metrics(app)
     
     return app
 
+def get_result_cache(app) -> Optional[ResultCache]:
+    """Returns the application's result cache, or None when caching is disabled."""
+    if not app.config['RESULT_CACHE_ENABLED']:
+        return None
+    if 'result_cache' not in app.extensions:
+        app.extensions['result_cache'] = ResultCache(app.config['RESULT_CACHE_FOLDER'], app.config['RESULT_CACHE_MAX_BYTES'])
+    return app.extensions['result_cache']
+
+def get_dump_store(app) -> Optional[DumpStore]:
+    """Returns the application's dump store, or None when DUMP_STORE_PATH is not set."""
+    if not app.config['DUMP_STORE_PATH']:
+        return None
+    if 'dump_store' not in app.extensions:
+        app.extensions['dump_store'] = DumpStore(app.config['DUMP_STORE_PATH'])
+    return app.extensions['dump_store']
+
+def record_dump(app, upload_digest: Optional[str], analysis: dict, name: Optional[str] = None) -> None:
+    """Adds an analysis to the dump store, if enabled; store errors never fail the analysis."""
+    store = get_dump_store(app)
+    if store is None or not upload_digest:
+        return
+    try:
+        store.record(upload_digest, analysis['outputs'], name)
+    except sqlite3.Error as e:
+        logging.error(f"Could not store dump {upload_digest[:12]}: {e}")
+
+def analyze_upload(app, file_path: Path, min_level: int, upload_digest: Optional[str] = None,
+                   entry_index_dir: Optional[Path] = None, explorer_url: Optional[str] = None,
+                   filename: Optional[str] = None, retention: Optional[str] = None) -> Iterator[str]:
+    """
+    Validates an uploaded support dump ZIP, analyzes it and renders the report.
+    
+    Args:
+        app: Flask application (for limits and analysis settings)
+        file_path: Path to the uploaded ZIP file
+        min_level: Minimum log level to report
+        upload_digest: SHA-256 of the upload; when given, results are looked
+            up in and stored to the result cache
+        entry_index_dir: Where to write the entry index behind the log explorer
+        explorer_url: Entries endpoint the report's log table pages through;
+            without it, the latest entries are inlined in the report
+        filename: Name the dump is stored under in the dump store (default:
+            the name of ``file_path``)
+        retention: Entries kept for an inlined log table (default: the
+            ENTRY_RETENTION setting)
+        
+    Returns:
+        The HTML report, rendered lazily in chunks (see render_report)
+        
+    Raises:
+        ValidationError: If the upload is not a usable support dump
+    """
+    filename = filename or file_path.name
+    retention = retention or app.config['ENTRY_RETENTION']
+    cache = get_result_cache(app) if upload_digest else None
+    if not cache:
+        analysis = analyze_zip(app, file_path, min_level, entry_index_dir, retention)
+        record_dump(app, upload_digest, analysis, filename)
+        return render_report(app, analysis['results'], min_level, explorer_url)
+
+    # Cached entries hold the logs at every standard level, so switching
+    # levels on a repeat upload is served from the cache as well.
+    options = {
+        'snapshot': pipeline.SNAPSHOT_FORMAT,
+        'timeline_points': app.config['TIMELINE_MAX_POINTS'],
+        'summary_max_messages': app.config['SUMMARY_MAX_MESSAGES'],
+        'summary_min_level': min(app.config['SUMMARY_MIN_LEVEL'], min_level),
+        'retention': retention,
+    }
+    if min_level not in LOG_LEVEL_NAMES:
+        options['min_level'] = min_level
+    cache_key = ResultCache.make_key(upload_digest, app.config['VERSION'], knowledge_base.get_version(), **options)
+    snapshot = cache.get(cache_key)
+    if snapshot is None:
+        analysis = analyze_zip(app, file_path, min_level, entry_index_dir, retention)
+        # A cache hit means the same upload was analyzed, and stored, before.
+        record_dump(app, upload_digest, analysis, filename)
+        cache.put(cache_key, pipeline.snapshot_outputs(analysis['outputs'], set(LOG_LEVEL_NAMES) | {min_level}, app.config['TIMELINE_MAX_POINTS']))
+        results = analysis['results']
+    else:
+        results = pipeline.build_results(pipeline.restore_outputs(snapshot), min_level, app.config['TIMELINE_MAX_POINTS'])
+        if entry_index_dir is not None:
+            # Snapshots hold aggregates only; the entries are indexed in a pass of their own.
+            log_path = pipeline.find_section_files(open_dump(app, file_path))['logs']
+            entry_index.build_index(analyzer.iter_log_entries(log_path) if log_path else (), entry_index_dir)
+    return render_report(app, results, min_level, explorer_url)
+
+def open_dump(app, file_path: Path):
+    """
+    Validates an uploaded support dump ZIP and locates the dump inside it.
+    
+    Returns:
+        The dump directory inside the archive (a zip_dump.ZipDirectory)
+        
+    Raises:
+        ValidationError: If the upload is not a usable support dump
+    """
+    zip_size = file_path.stat().st_size
+    # Validate the ZIP file for security
+    with metrics.span('validate_zip_file', bytes=zip_size):
+        validate_zip_file(
+            file_path, 
+            app.config['MAX_CONTENT_LENGTH'],
+            app.config['MAX_EXTRACTED_SIZE']
+        )
+    
+    # Read the dump straight from the archive instead of extracting it
+    with metrics.span('open_zip', bytes=zip_size):
+        dump = ZipDump(file_path, app.config['MAX_SINGLE_FILE_SIZE'])
+    with metrics.span('find_dump_path'):
+        dump_path = dump.find_dump_path()
+    
+    if not dump_path:
+        raise ValidationError("Could not find a valid Rocket.Chat dump structure.")
+    return dump_path
+
+def analyze_zip(app, file_path: Path, min_level: int, entry_index_dir: Optional[Path] = None, retention: Optional[str] = None) -> dict:
+    """
+    Validates an uploaded support dump ZIP and analyzes it with pipeline.analyze_dump.
+    
+    Args:
+        app: Flask application (for limits and analysis settings)
+        file_path: Path to the uploaded ZIP file
+        min_level: Minimum log level to report
+        entry_index_dir: Where to write the entry index of the log explorer
+        retention: Entries kept for the log table (default: the
+            ENTRY_RETENTION setting)
+        
+    Returns:
+        The pipeline.analyze_dump result
+        
+    Raises:
+        ValidationError: If the upload is not a usable support dump
+    """
+    dump_path = open_dump(app, file_path)
+    with metrics.span('analyze'):
+        analysis = pipeline.analyze_dump(
+            dump_path,
+            min_level,
+            executor=app.config['ANALYSIS_EXECUTOR'],
+            max_workers=app.config['ANALYSIS_WORKERS'],
+            log_workers=app.config['LOG_PARSE_WORKERS'],
+            timeline_points=app.config['TIMELINE_MAX_POINTS'],
+            entry_index_dir=entry_index_dir,
+            summary_max_messages=app.config['SUMMARY_MAX_MESSAGES'],
+            retention=retention or app.config['ENTRY_RETENTION'],
+            summary_min_level=app.config['SUMMARY_MIN_LEVEL']
+        )
+    return analysis
+
+def timed_upload(file, destination: Path) -> str:
+    """
+    Saves an uploaded file as the 'upload' stage; returns its SHA-256.
+
+    Streamed uploads (UploadRequest) are already hashed and on disk and are
+    just moved; others are copied with utils.save_upload.
+    """
+    with metrics.span('upload') as span:
+        if isinstance(file.stream, UploadSink):
+            upload_digest = file.stream.save(destination)
+        else:
+            upload_digest = save_upload(file.stream, destination)
+        span.bytes = destination.stat().st_size
+    return upload_digest
+
+def compare_zips(app, named_paths, min_level: int) -> dict:
+    """
+    Analyzes uploaded support dump ZIPs concurrently and compares them.
+    
+    Args:
+        app: Flask application (for limits and analysis settings)
+        named_paths: (display name, ZIP path) tuples, oldest first
+        min_level: Minimum log level of the compared errors
+        
+    Returns:
+        The dump_diff.compare_results result
+        
+    Raises:
+        ValidationError: If an upload is not a usable support dump
+    """
+    with ThreadPoolExecutor(max_workers=len(named_paths)) as pool:
+        # Each analysis runs in a copy of this context so its spans join the request's trace.
+        futures = [pool.submit(contextvars.copy_context().run, analyze_zip, app, path, min_level) for _, path in named_paths]
+        results = [dump_diff.diff_results(future.result(), min_level) for future in futures]
+    return dump_diff.compare_results([(name, result) for (name, _), result in zip(named_paths, results)])
+
+def render_report(app, results: dict, min_level: int, explorer_url: Optional[str] = None) -> Iterator[str]:
+    """Renders the HTML report for analysis results as a stream of chunks."""
+    if explorer_url:
+        # The log table pages from the entries endpoint at every level, so the
+        # level views need no inlined entries.
+        logs = results['logs']
+        levels = [{key: value for key, value in view.items() if key != 'entries'} for view in logs.get('levels') or []]
+        results = {**results, 'logs': {**logs, 'levels': levels}}
+    return metrics.timed_chunks('render', reporter.stream_report(
+        results,
+        log_level_name=LOG_LEVEL_NAMES.get(min_level, str(min_level)),
+        version=app.config['VERSION'],
+        min_level=min_level,
+        explorer_url=explorer_url
+    ))
+
+def _parse_time_arg(value: Optional[str]) -> Optional[int]:
+    """Converts an ISO 8601 query parameter to epoch milliseconds; raises ValueError if invalid."""
+    if not value:
+        return None
+    parsed = parse_time_ms(value)
+    if parsed is None:
+        raise ValueError(f"Invalid time '{value}'")
+    return parsed[0]
+
+def _retention_arg(app, form) -> str:
+    """Reads the log table retention strategy from a form, falling back to the ENTRY_RETENTION setting."""
+    retention = form.get('retention')
+    return retention if retention in RETENTION_STRATEGIES else app.config['ENTRY_RETENTION']
+
+def _entry_filters(args) -> dict:
+    """Reads the entry index filters of EntryIndex.query from request arguments."""
+    return {
+        'q': args.get('q') or None,
+        'min_level': args.get('min_level', type=float),
+        'level': args.get('level', type=float),
+        'host': args.get('host') or None,
+        'pid': args.get('pid', type=int),
+        'since': _parse_time_arg(args.get('since')),
+        'until': _parse_time_arg(args.get('until')),
+    }
+
+def register_metrics(app):
+    """Reports each request's stage timings in a Server-Timing header and serves /metrics, if enabled."""
+    if not app.config['METRICS_ENABLED']:
+        return
+    
+    @app.before_request
+    def start_trace():
+        g.trace, request.trace_token = metrics.start_trace()
+    
+    @app.after_request
+    def add_server_timing(response):
+        # Stages that run while a streamed report is sent (rendering) only reach /metrics.
+        trace = g.get('trace')
+        if trace is not None and trace.spans:
+            response.headers['Server-Timing'] = trace.server_timing()
+        return response
+    
+    @app.teardown_request
+    def end_trace(exc):
+        # Runs when a view raises too, which skips after_request. The token is
+        # kept on the request, which outlives the application context here.
+        if request.trace_token is not None:
+            metrics.end_trace(request.trace_token)
+            request.trace_token = None
+    
+    @app.route('/metrics', methods=['GET'])
+    def prometheus_metrics():
+        """Per-stage durations, bytes, entries and peak memory of this process, for Prometheus."""
+        if not _metrics_allowed(app):
+            return app.response_class('Forbidden\n', status=403, content_type='text/plain')
+        return app.response_class(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
+def _metrics_allowed(app) -> bool:
+    """
+    Whether the current request may scrape /metrics: it must carry the
+    METRICS_TOKEN bearer token when one is set, or come from a loopback
+    address otherwise, as the stages reveal the timings and sizes of uploads.
+    """
+    token = app.config['METRICS_TOKEN']
+    if token:
+        return hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}')
+    try:
+        return ipaddress.ip_address(request.remote_addr or '').is_loopback
+    except ValueError:
+        return False
+
 def register_routes(app):
     """Register application routes."""
     
+    def get_job_manager():
+        # Built on first use so tests and deployments can adjust the config first.
+        if 'job_manager' not in app.extensions:
+            app.extensions['job_manager'] = JobManager(
+                JobStore(app.config['JOBS_FOLDER'], heartbeat_timeout=app.config['JOB_HEARTBEAT_TIMEOUT']),
+                max_workers=app.config['JOB_WORKERS'],
+                max_age=app.config['JOB_MAX_AGE']
+            )
+        return app.extensions['job_manager']
+    
+    def render_upload_page():
+        return render_template('upload.html', retention_labels=RETENTION_LABELS)
+    
     @app.route('/', methods=['GET', 'POST'])
     def index():
         if request.method == 'POST':
-            if 'support_dump' not in request.files:
+            try:
+                files = request.files
+            except ValidationError as e:
+                flash(f"Upload failed: {str(e)}", "error")
+                return render_upload_page()
+            if 'support_dump' not in files:
                 flash('No file part in the request.', 'error')
-                return render_template('upload.html')
+                return render_upload_page()
             
-            file = request.files['support_dump']
+            file = files['support_dump']
 
             if file.filename == '':
                 flash('No selected file.', 'error')
-                return render_template('upload.html')
+                return render_upload_page()
 
             if file and file.filename.endswith('.zip'):
                 safe_filename = get_safe_filename(file.filename)
                 min_level = int(request.form.get('log_level', 40))  # Get log level, default to 40
+                retention = _retention_arg(app, request.form)
                 
                 with tempfile.TemporaryDirectory() as temp_dir:
-                    temp_path = Path(temp_dir)
-                    file_path = temp_path / safe_filename
-                    file.save(file_path)
+                    file_path = Path(temp_dir) / safe_filename
+                    upload_digest = timed_upload(file, file_path)
 
                     try:
-                        # Validate the ZIP file for security
-                        validate_zip_file(
-                            file_path, 
-                            app.config['MAX_CONTENT_LENGTH'],
-                            app.config['MAX_EXTRACTED_SIZE']
-                        )
-                        
-                        # Safely extract the ZIP file
-                        safe_extract_zip(
-                            file_path, 
-                            temp_path, 
-                            app.config['MAX_SINGLE_FILE_SIZE']
-                        )
-                        
+                        # Analysis has finished here; only rendering is streamed.
+                        return app.response_class(analyze_upload(app, file_path, min_level, upload_digest, retention=retention), mimetype='text/html')
                     except ValidationError as e:
                         flash(f"Upload failed: {str(e)}", "error")
-                        return render_template('upload.html')
-
-                    dump_path = find_dump_path(temp_path)
-                    
-                    if not dump_path:
-                        flash("Upload failed: Could not find a valid Rocket.Chat dump structure.", "error")
-                        return render_template('upload.html')
-
-                    report_sections = {
-                        'summary': {'pattern': 'log.json', 'headers': ['Message', 'Count', 'LastSeen'], 'title': 'Error Summary'},
-                        'statistics': {'pattern': 'server-statistics.json', 'analyzer': analyzer.analyze_statistics, 'headers': ['Statistic', 'Value'], 'title': 'Server Statistics'},
-                        'settings': {'pattern': 'settings.json', 'analyzer': analyzer.analyze_settings, 'headers': ['Setting', 'Value'], 'title': 'Workspace Settings'},
-                        'omnichannel': {'pattern': 'omnichannel-settings.json', 'analyzer': analyzer.analyze_omnichannel, 'headers': ['Setting', 'Value'], 'title': 'Omnichannel Settings'},
-                        'apps': {'pattern': 'apps-installed.json', 'analyzer': analyzer.analyze_apps, 'headers': ['Name', 'Version', 'Status'], 'title': 'Installed Apps'},
-                        'logs': {'pattern': 'log.json', 'headers': ['level', 'time', 'pid', 'hostname', 'name', 'msg'], 'title': 'All Log Entries'},
-                        'recommendations': {'pattern': 'log.json', 'title': 'Recommendations'},
-                    }
-                    
-                    files_found = {}
-                    for key, config_section in report_sections.items():
-                        if key == 'settings':
-                            all_settings_files = list(dump_path.glob('*settings.json'))
-                            settings_file = next((f for f in all_settings_files if 'omnichannel' not in f.name.lower()), None)
-                            files_found[key] = settings_file
-                        else:
-                            found_file = next(dump_path.glob(f"*{config_section['pattern']}"), None)
-                            files_found[key] = found_file
-
-                    results = {}
-                    log_file_path = files_found.get('logs')
-                    
-                    log_data = analyzer.analyze_logs(log_file_path, min_level=min_level) if log_file_path and log_file_path.exists() else \
-                               {'summary': [], 'all_errors': [], 'total_error_count': 0, 'recommendations': [], 'chart_data_timeline': {}, 'chart_data_severity': {}, 'timeline_full_logs': {}}
-
-                    for key, config_section in report_sections.items():
-                        if key == 'summary':
-                            results[key] = {'title': config_section.get('title'), 'content': log_data.get('summary', []), 'headers': config_section.get('headers')}
-                        elif key == 'recommendations':
-                             results[key] = {'title': config_section.get('title'), 'content': log_data.get('recommendations', [])}
-                        elif key == 'logs':
-                            results[key] = {
-                                'title': config_section.get('title'),
-                                'content': log_data.get('all_errors', []),
-                                'headers': config_section.get('headers'),
-                                'total_count': log_data.get('total_error_count'),
-                                'chart_data_timeline': log_data.get('chart_data_timeline', {}),
-                                'chart_data_severity': log_data.get('chart_data_severity', {}),
-                                'timeline_full_logs': log_data.get('timeline_full_logs', {})
-                            }
-                        else:
-                            file_to_analyze = files_found.get(key)
-                            content = config_section['analyzer'](file_to_analyze) if file_to_analyze and file_to_analyze.exists() else []
-                            results[key] = {'title': config_section.get('title'), 'content': content, 'headers': config_section.get('headers')}
-                    
-                    template_dir = Path(__file__).parent / 'templates'
-                    env = Environment(loader=FileSystemLoader(template_dir), autoescape=True)
-                    template = env.get_template('report_template.html')
-                    
-                    html_report = template.render(
-                        results=results, 
-                        log_level_name=LOG_LEVEL_NAMES.get(min_level, str(min_level)),
-                        version=app.config['VERSION']
-                    )
-                    
-                    return html_report
+                        return render_upload_page()
             else:
                 flash('Please upload a ZIP file.', 'error')
-                return render_template('upload.html')
+                return render_upload_page()
+        
+        return render_upload_page()
+
+    @app.route('/compare', methods=['GET', 'POST'])
+    def compare():
+        """Compares two or more uploaded dumps, oldest first."""
+        if request.method == 'GET':
+            return render_template('compare.html', max_dumps=dump_diff.MAX_COMPARE_DUMPS)
+        
+        try:
+            files = [file for file in request.files.getlist('support_dumps') if file.filename]
+        except ValidationError as e:
+            flash(f"Upload failed: {str(e)}", "error")
+            return render_template('compare.html', max_dumps=dump_diff.MAX_COMPARE_DUMPS)
+        if not 2 <= len(files) <= dump_diff.MAX_COMPARE_DUMPS:
+            flash(f"Please select between 2 and {dump_diff.MAX_COMPARE_DUMPS} dumps.", 'error')
+            return render_template('compare.html', max_dumps=dump_diff.MAX_COMPARE_DUMPS)
+        if not all(file.filename.endswith('.zip') for file in files):
+            flash('Please upload ZIP files.', 'error')
+            return render_template('compare.html', max_dumps=dump_diff.MAX_COMPARE_DUMPS)
+        
+        min_level = int(request.form.get('log_level', 40))
+        with tempfile.TemporaryDirectory() as temp_dir:
+            named_paths = []
+            for i, file in enumerate(files):
+                safe_filename = get_safe_filename(file.filename)
+                # Numbered so uploads with the same name do not overwrite each other.
+                file_path = Path(temp_dir) / f"{i}-{safe_filename}"
+                timed_upload(file, file_path)
+                named_paths.append((safe_filename, file_path))
+            try:
+                diff = compare_zips(app, named_paths, min_level)
+            except ValidationError as e:
+                flash(f"Upload failed: {str(e)}", "error")
+                return render_template('compare.html', max_dumps=dump_diff.MAX_COMPARE_DUMPS)
         
-        return render_template('upload.html')
+        return app.response_class(
+            metrics.timed_chunks('render', reporter.stream_report(
+                diff,
+                dump_diff.DIFF_TEMPLATE,
+                log_level_name=LOG_LEVEL_NAMES.get(min_level, str(min_level)),
+                version=app.config['VERSION']
+            )),
+            mimetype='text/html'
+        )
+
+    @app.route('/jobs', methods=['POST'])
+    def create_job():
+        """Stores an upload and queues its analysis; returns the job id immediately."""
+        try:
+            file = request.files.get('support_dump')
+        except ValidationError as e:
+            return jsonify({'error': f"Upload failed: {str(e)}"}), 400
+        if not file or file.filename == '':
+            return jsonify({'error': 'No selected file.'}), 400
+        if not file.filename.endswith('.zip'):
+            return jsonify({'error': 'Please upload a ZIP file.'}), 400
+        
+        min_level = int(request.form.get('log_level', 40))
+        retention = _retention_arg(app, request.form)
+        job_manager = get_job_manager()
+        job_id = job_manager.store.create()
+        upload_digest = timed_upload(file, job_manager.store.upload_path(job_id))
+        entries_path = job_manager.store.entries_path(job_id)
+        explorer_url = url_for('job_entries', job_id=job_id)
+        filename = get_safe_filename(file.filename)
+        
+        status = job_manager.submit(
+            job_id,
+            # The explorer pages through the newest entries; other retentions inline their own selection.
+            lambda upload_path: analyze_upload(
+                app, upload_path, min_level, upload_digest, entries_path, explorer_url if retention == 'tail' else None, filename, retention
+            ),
+            filename=filename,
+            log_level=min_level
+        )
+        status['status_url'] = url_for('job_status', job_id=job_id)
+        status['report_url'] = url_for('job_report', job_id=job_id)
+        status['entries_url'] = explorer_url
+        return jsonify(status), 202, {'Location': status['status_url']}
+
+    @app.route('/jobs/<job_id>', methods=['GET'])
+    def job_status(job_id):
+        """Reports whether a job is queued, running, done or failed."""
+        status = get_job_manager().store.read_status(job_id)
+        if status is None:
+            return jsonify({'error': 'Unknown job.'}), 404
+        status['status_url'] = url_for('job_status', job_id=job_id)
+        status['report_url'] = url_for('job_report', job_id=job_id)
+        status['entries_url'] = url_for('job_entries', job_id=job_id)
+        return jsonify(status)
+
+    @app.route('/jobs/<job_id>/report', methods=['GET'])
+    def job_report(job_id):
+        """Serves the rendered report of a finished job."""
+        store = get_job_manager().store
+        status = store.read_status(job_id)
+        if status is None:
+            return jsonify({'error': 'Unknown job.'}), 404
+        if status['status'] != DONE:
+            return jsonify(status), 409
+        return send_file(store.report_path(job_id), mimetype='text/html')
+
+    def open_job_index(job_id):
+        """Returns (entry index or None, error response or None) for a job."""
+        store = get_job_manager().store
+        status = store.read_status(job_id)
+        if status is None:
+            return None, (jsonify({'error': 'Unknown job.'}), 404)
+        if status['status'] != DONE:
+            return None, (jsonify(status), 409)
+        return entry_index.open_index(store.entries_path(job_id)), None
+
+    @app.route('/jobs/<job_id>/entries', methods=['GET'])
+    def job_entries(job_id):
+        """
+        Pages through the log entries of a finished job.
+        
+        Query parameters: ``q`` (a search query, see search_index.parse_query),
+        ``min_level``, ``level``, ``host``, ``pid``, ``since`` and ``until``
+        (ISO 8601 times) filter the entries; ``order`` is 'asc' or 'desc' by
+        time; ``limit`` sets the page size and ``cursor`` is the
+        ``next_cursor`` of the previous page.
+        """
+        index, error = open_job_index(job_id)
+        if error:
+            return error
+        try:
+            filters = _entry_filters(request.args)
+            if index is None:
+                # Dumps without a log file have nothing to index.
+                return jsonify({'entries': [], 'total': 0, 'next_cursor': None, 'truncated': []})
+            return jsonify(index.query(
+                **filters,
+                order=request.args.get('order', 'asc'),
+                cursor=request.args.get('cursor') or None,
+                limit=request.args.get('limit', 50, type=int)
+            ))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+    @app.route('/jobs/<job_id>/search', methods=['GET'])
+    def job_search(job_id):
+        """
+        Full-text search over the log entries of a finished job.
+        
+        Takes the parameters of job_entries, ``q`` being required, and adds
+        the number of hits per time bucket as ``timeline``.
+        """
+        index, error = open_job_index(job_id)
+        if error:
+            return error
+        try:
+            filters = _entry_filters(request.args)
+            if not filters['q']:
+                raise ValueError('Empty search query')
+            if index is None:
+                return jsonify({'entries': [], 'total': 0, 'next_cursor': None, 'truncated': [], 'timeline': {'labels': [], 'data': [], 'resolution': 'minute'}})
+            page = index.query(
+                **filters,
+                order=request.args.get('order', 'desc'),
+                cursor=request.args.get('cursor') or None,
+                limit=request.args.get('limit', 50, type=int)
+            )
+            page['timeline'] = index.timeline(app.config['TIMELINE_MAX_POINTS'], **filters)
+            return jsonify(page)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+    def open_dump_store():
+        store = get_dump_store(app)
+        if store is None:
+            return None, (jsonify({'error': 'The dump store is disabled (set DUMP_STORE_PATH).'}), 404)
+        return store, None
+
+    @app.route('/trends/dumps', methods=['GET'])
+    def trend_dumps():
+        """Lists the dumps in the dump store."""
+        store, error = open_dump_store()
+        if error:
+            return error
+        return jsonify(store.dumps())
+
+    @app.route('/trends/signatures', methods=['GET'])
+    def trend_signatures():
+        """Error signatures across stored dumps, earliest first (``q``, ``min_level`` and ``limit`` narrow them)."""
+        store, error = open_dump_store()
+        if error:
+            return error
+        return jsonify(store.signatures(
+            search=request.args.get('q') or None,
+            min_level=request.args.get('min_level', type=float),
+            limit=request.args.get('limit', 50, type=int)
+        ))
+
+    @app.route('/trends/signatures/<signature>', methods=['GET'])
+    def trend_signature(signature):
+        """Occurrences of one error signature per stored dump."""
+        store, error = open_dump_store()
+        if error:
+            return error
+        history = store.signature_history(signature)
+        if not history:
+            return jsonify({'error': 'Unknown signature.'}), 404
+        return jsonify(history)
+
+    @app.route('/trends/timeline', methods=['GET'])
+    def trend_timeline():
+        """Entry counts per hour or day over all stored dumps (``min_level``, ``since``, ``until``, ``resolution``)."""
+        store, error = open_dump_store()
+        if error:
+            return error
+        try:
+            return jsonify(store.timeline(
+                min_level=request.args.get('min_level', type=float),
+                since=_parse_time_arg(request.args.get('since')),
+                until=_parse_time_arg(request.args.get('until')),
+                resolution=request.args.get('resolution', 'day')
+            ))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
 
 # Initialize the Flask application
 app = create_app()
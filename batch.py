@@ -0,0 +1,191 @@
+# batch.py
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import json_backend
+import pipeline
+import reporter
+from config import Config
+from utils import LOG_LEVEL_NAMES, ValidationError, get_safe_filename, validate_zip_file
+from zip_dump import ZipDump
+
+INDEX_TEMPLATE = 'batch_index.html'
+
+def expand_inputs(paths: Iterable[Path]) -> List[Path]:
+    """
+    Resolves command line paths into the dumps to analyze.
+
+    ZIP files and directories holding dump files are dumps themselves; any
+    other directory stands for the ZIPs and dump directories directly in it.
+    """
+    dumps = []
+    for path in paths:
+        if path.is_dir() and not any(pipeline.find_section_files(path).values()):
+            dumps.extend(sorted(child for child in path.iterdir() if child.suffix.lower() == '.zip' or child.is_dir()))
+        else:
+            dumps.append(path)
+    return dumps
+
+def open_dump(path: Path):
+    """
+    Returns the dump directory of a dump directory or ZIP file.
+
+    Raises:
+        ValidationError: If the path is not a usable support dump
+    """
+    if path.is_dir():
+        return path
+    if path.suffix.lower() != '.zip' or not path.is_file():
+        raise ValidationError(f"Not a dump directory or ZIP file: {path}")
+    validate_zip_file(path, Config.MAX_CONTENT_LENGTH, Config.MAX_EXTRACTED_SIZE)
+    dump_path = ZipDump(path, Config.MAX_SINGLE_FILE_SIZE).find_dump_path()
+    if not dump_path:
+        raise ValidationError("Could not find a valid Rocket.Chat dump structure.")
+    return dump_path
+
+def _input_size(path: Path) -> int:
+    if path.is_file():
+        return path.stat().st_size
+    return sum(child.stat().st_size for child in path.iterdir() if child.is_file()) if path.is_dir() else 0
+
+def analyze_one(path: Path, output_stem: str, output_dir: Path, min_level: int, json_output: bool = False,
+                timeline_points: Optional[int] = None) -> dict:
+    """
+    Analyzes one dump and writes its report (runs in a worker process).
+
+    Args:
+        path: Dump directory or ZIP file
+        output_stem: File name, without suffix, of the reports to write
+        output_dir: Directory for the reports
+        min_level: Minimum log level to report
+        json_output: Also write the raw results as JSON
+        timeline_points: Point budget of the timeline chart
+
+    Returns:
+        Index record of the dump: its 'status' ('ok' or 'failed'), 'seconds'
+        and input 'bytes', plus the report file names and headline figures,
+        or the 'error' that stopped it. Errors never propagate, so one bad
+        dump cannot stop a batch.
+    """
+    start = time.perf_counter()
+    record = {'name': path.name, 'path': str(path), 'bytes': 0}
+    try:
+        record['bytes'] = _input_size(path)
+        # Sections run serially; the batch already keeps every worker busy.
+        analysis = pipeline.analyze_dump(open_dump(path), min_level, executor='serial', timeline_points=timeline_points)
+        results = analysis['results']
+        html_path = reporter.generate_report(
+            results,
+            output_dir / f"{output_stem}.html",
+            log_level_name=LOG_LEVEL_NAMES.get(min_level, str(min_level)),
+            version=Config.VERSION
+        )
+        record.update({
+            'status': 'ok',
+            'report': html_path.name,
+            'json': None,
+            'version': next((item['Value'] for item in results['statistics']['content'] if item['Statistic'] == 'Version'), 'N/A'),
+            'entries': results['logs']['total_count'],
+            'top_error': next(iter(results['summary']['content']), None),
+            'section_errors': analysis['errors'],
+        })
+        if json_output:
+            json_path = output_dir / f"{output_stem}.json"
+            json_backend.dump_file(results, json_path)
+            record['json'] = json_path.name
+    except ValidationError as e:
+        record.update({'status': 'failed', 'error': str(e)})
+    except Exception as e:
+        logging.exception(f"Analysis of '{path}' failed: {e}")
+        record.update({'status': 'failed', 'error': f"{type(e).__name__}: {e}"})
+    record['seconds'] = time.perf_counter() - start
+    return record
+
+def run_batch(paths: List[Path], output_dir: Path, workers: Optional[int] = None, min_level: int = 50,
+              json_output: bool = False, timeline_points: Optional[int] = None) -> dict:
+    """
+    Analyzes many dumps in a process pool and writes an index of the reports.
+
+    Args:
+        paths: Dump directories or ZIP files
+        output_dir: Directory for the per-dump reports and the index
+        workers: Worker processes (default: one per CPU)
+        min_level: Minimum log level to report
+        json_output: Also write each dump's raw results as JSON
+        timeline_points: Point budget of the timeline charts
+
+    Returns:
+        The index: per-dump records in input order plus batch totals, as
+        also written to index.json and rendered to index.html
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    records = [None] * len(paths)
+    done_bytes = 0
+    logging.info(f"Analyzing {len(paths)} dumps on {workers} processes.")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            # Numbered stems keep dumps with the same name apart.
+            pool.submit(analyze_one, path, f"{i + 1:03d}-{get_safe_filename(path.stem)}", output_dir, min_level, json_output, timeline_points): i
+            for i, path in enumerate(paths)
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            i = futures[future]
+            try:
+                record = future.result()
+            except Exception as e:  # the worker process itself died
+                record = {'name': paths[i].name, 'path': str(paths[i]), 'bytes': 0, 'status': 'failed', 'error': f"{type(e).__name__}: {e}", 'seconds': 0.0}
+            records[i] = record
+            done_bytes += record['bytes']
+            elapsed = time.perf_counter() - start
+            outcome = 'ok' if record['status'] == 'ok' else f"FAILED ({record['error']})"
+            logging.info(
+                f"[{done}/{len(paths)}] {record['name']}: {outcome} in {record['seconds']:.2f}s "
+                f"- {done / elapsed:.2f} dumps/s, {done_bytes / elapsed / 1e6:.1f} MB/s"
+            )
+
+    elapsed = time.perf_counter() - start
+    index = {
+        'dumps': records,
+        'succeeded': sum(1 for record in records if record['status'] == 'ok'),
+        'failed': sum(1 for record in records if record['status'] != 'ok'),
+        'elapsed': elapsed,
+        'dumps_per_second': len(records) / elapsed if elapsed else 0.0,
+        'mb_per_second': sum(record['bytes'] for record in records) / elapsed / 1e6 if elapsed else 0.0,
+    }
+    json_backend.dump_file(index, output_dir / 'index.json')
+    reporter.generate_report(
+        index,
+        output_dir / 'index.html',
+        template_name=INDEX_TEMPLATE,
+        log_level_name=LOG_LEVEL_NAMES.get(min_level, str(min_level)),
+        version=Config.VERSION
+    )
+    return index
+
+def main(argv=None) -> int:
+    """Entry point of ``main.py --batch``; returns the process exit status (1 if any dump failed)."""
+    parser = argparse.ArgumentParser(prog="main.py --batch", description="Analyze many Rocket.Chat support dumps in parallel.")
+    parser.add_argument("paths", type=Path, nargs='+', help="Dump directories or ZIP files, or directories containing them.")
+    parser.add_argument("--output-dir", type=Path, default=Path(__file__).parent / 'reports' / 'batch', help="Directory for the reports and index.html.")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU).")
+    parser.add_argument("--log-level", type=int, default=50, help="Minimum log level to report (e.g., 30 for WARNING, 40 for ERROR).")
+    parser.add_argument("--json-output", action="store_true", help="Also write a JSON file with each dump's raw analysis results.")
+    parser.add_argument("--timeline-points", type=int, default=None, help="Maximum points in the timeline charts (default: 500).")
+    args = parser.parse_args(argv)
+
+    paths = expand_inputs(args.paths)
+    if not paths:
+        parser.error("no dumps found")
+    index = run_batch(paths, args.output_dir, args.workers, args.log_level, args.json_output, args.timeline_points)
+    logging.info(
+        f"Batch finished: {index['succeeded']} analyzed, {index['failed']} failed in {index['elapsed']:.1f}s "
+        f"({index['dumps_per_second']:.2f} dumps/s). Index: {args.output_dir / 'index.html'}"
+    )
+    return 1 if index['failed'] else 0
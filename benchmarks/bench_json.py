@@ -0,0 +1,102 @@
+# bench_json.py
+"""
+Benchmark: the JSON backends on a generated support dump.
+
+Times each json_backend backend decoding the NDJSON log lines (from raw
+bytes and from decoded text), the queue envelope's ``string`` payloads, the
+settings files and the whole analyze_logs pass, so the gain of an optional
+decoder such as orjson can be checked. Output is always written by the
+standard library and is not timed here.
+
+Usage: python benchmarks/bench_json.py [--entries N] [--repeat N] [--output FILE]
+"""
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import analyzer
+import json_backend
+from dump_generator import generate_dump
+
+def best_time(func, repeat):
+    """Returns the fastest of ``repeat`` runs of ``func``, in seconds."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+def workloads(dump_dir):
+    """Returns {workload: (function, bytes processed)} for a generated dump directory."""
+    log_path = dump_dir / 'log.json'
+    raw_lines = log_path.read_bytes().splitlines()
+    text_lines = [line.decode('utf-8') for line in raw_lines]
+    payloads = [json.dumps(json.loads(line)) for line in text_lines]
+    setting_files = [dump_dir / name for name in ('settings.json', 'omnichannel-settings.json', 'apps-installed.json', 'server-statistics.json')]
+    log_bytes = log_path.stat().st_size
+
+    def decode(lines):
+        return lambda: [json_backend.loads(line) for line in lines]
+
+    return {
+        'ndjson_bytes': (decode(raw_lines), log_bytes),
+        'ndjson_text': (lambda: [json_backend.loads(line.decode('utf-8')) for line in raw_lines], log_bytes),
+        'queue_payloads': (decode(payloads), sum(len(payload) for payload in payloads)),
+        'setting_files': (lambda: [json_backend.load_file(path) for path in setting_files], sum(path.stat().st_size for path in setting_files)),
+        'analyze_logs': (lambda: analyzer.analyze_logs(log_path, 40), log_bytes),
+    }
+
+def benchmark(dump_dir, repeat=3):
+    """
+    Times every workload under every installed backend.
+
+    Returns:
+        {backend: {workload: {'seconds', 'mb_per_second'}}}
+    """
+    selected = json_backend.backend
+    timings = {}
+    try:
+        for name in json_backend.BACKENDS:
+            json_backend.use_backend(name)
+            timings[name] = {}
+            for workload, (func, size) in workloads(dump_dir).items():
+                seconds = best_time(func, repeat)
+                timings[name][workload] = {'seconds': round(seconds, 6), 'mb_per_second': round(size / 1e6 / seconds, 2) if seconds else None}
+    finally:
+        json_backend.use_backend(selected)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--entries', type=int, default=100000)
+    parser.add_argument('--unique', type=int, default=500, help='Distinct log messages.')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per workload; the fastest counts.')
+    parser.add_argument('--output', type=Path, help='Also write the results to this JSON file.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        dump_dir = generate_dump(Path(work_dir) / 'dump', args.entries, unique_messages=args.unique, seed=args.seed)
+        timings = benchmark(dump_dir, args.repeat)
+
+    if len(timings) == 1:
+        print("Only the standard library backend is installed (pip install orjson to compare).")
+    for workload in timings['json']:
+        cells = [f"{name} {timings[name][workload]['seconds']:8.4f}s" for name in timings]
+        speedups = [f"x{timings['json'][workload]['seconds'] / timings[name][workload]['seconds']:.2f}" for name in timings if name != 'json']
+        print(f"{workload:<16} {'  '.join(cells)}  {' '.join(speedups)}")
+    if args.output:
+        args.output.write_text(json.dumps({'entries': args.entries, 'python': platform.python_version(), 'backends': timings}, indent=2))
+
+if __name__ == '__main__':
+    main()
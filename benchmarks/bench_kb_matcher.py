@@ -0,0 +1,77 @@
+# bench_kb_matcher.py
+"""
+Benchmark: per-entry knowledge base matching.
+
+Compares the original loop (one ``re.search`` per pattern per entry) with
+KnowledgeBaseMatcher on a synthetic message stream where most messages repeat.
+
+Usage: python benchmarks/bench_kb_matcher.py [--entries N] [--unique N]
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from knowledge_base import KNOWLEDGE_BASE_PATH, KnowledgeBaseMatcher
+
+MESSAGE_TEMPLATES = [
+    'Exception in callback of async function: Error: connect ECONNREFUSED 10.0.0.{n}:3000',
+    'Method "sendMessage" failed for user {n}',
+    'MongoTimeoutError: Server selection timed out after 30000 ms ({n})',
+    'User not found: {n}',
+    'Meteor.call stream-notify-room took {n}ms',
+    'Network request failed while syncing room {n}',
+]
+
+def make_messages(entries, unique, seed=42):
+    rng = random.Random(seed)
+    pool = [rng.choice(MESSAGE_TEMPLATES).format(n=i) for i in range(unique)]
+    return [rng.choice(pool) for _ in range(entries)]
+
+def baseline(knowledge_base, messages):
+    found = {}
+    for msg in messages:
+        for kb_entry in knowledge_base:
+            if re.search(kb_entry['pattern'], msg):
+                found.setdefault(kb_entry['title'], kb_entry)
+    return found
+
+def with_matcher(knowledge_base, messages):
+    matcher = KnowledgeBaseMatcher(knowledge_base)
+    found = {}
+    for msg in messages:
+        for kb_entry in matcher.match(msg):
+            found.setdefault(kb_entry['title'], kb_entry)
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--entries', type=int, default=200000)
+    parser.add_argument('--unique', type=int, default=2000)
+    args = parser.parse_args()
+
+    with open(KNOWLEDGE_BASE_PATH, 'r', encoding='utf-8') as f:
+        knowledge_base = json.load(f)
+    messages = make_messages(args.entries, args.unique)
+
+    timings = {}
+    results = {}
+    for name, func in (('re.search loop', baseline), ('KnowledgeBaseMatcher', with_matcher)):
+        start = time.perf_counter()
+        results[name] = func(knowledge_base, messages)
+        timings[name] = time.perf_counter() - start
+        print(f"{name:<22} {timings[name]:8.3f}s  ({args.entries / timings[name]:,.0f} entries/s)")
+
+    assert results['re.search loop'] == results['KnowledgeBaseMatcher'], 'matchers disagree'
+    print(f"Speedup: {timings['re.search loop'] / timings['KnowledgeBaseMatcher']:.1f}x "
+          f"({len(knowledge_base)} patterns, {args.entries} entries, {args.unique} unique messages)")
+
+if __name__ == '__main__':
+    main()
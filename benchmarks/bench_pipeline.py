@@ -0,0 +1,176 @@
+# bench_pipeline.py
+"""
+Benchmark: the upload-to-report path on a generated support dump.
+
+Times validate_zip_file, opening the archive (zip_dump.ZipDump),
+find_dump_path, analyze_logs, the whole pipeline.analyze_dump and report
+rendering on a dump from dump_generator, records throughput and peak memory (tracemalloc) per stage,
+and compares them with a JSON baseline. Exits with status 1 when a stage got
+slower or hungrier than the baseline by more than the threshold.
+
+Usage: python benchmarks/bench_pipeline.py [--entries N] [--format ndjson|queue] [--baseline FILE [--save-baseline]]
+"""
+
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import analyzer
+import pipeline
+import reporter
+from dump_generator import DEFAULT_LEVEL_MIX, LOG_FORMATS, generate_dump, parse_level_mix
+from utils import validate_zip_file
+from zip_dump import ZipDump
+
+# Size limits for the ZIP stages; generated dumps may exceed the app's defaults.
+NO_LIMIT = 2 ** 62
+# Relative slowdown (or memory growth) above the baseline reported as a regression.
+DEFAULT_THRESHOLD = 0.25
+# Stage results compared with the baseline, with the absolute change below
+# which a difference is treated as noise.
+COMPARED_METRICS = {'seconds': 0.005, 'peak_mb': 0.5}
+
+def run_stages(zip_path, work_dir, min_level, trace_memory=False):
+    """
+    Runs every stage once, in order.
+
+    Args:
+        trace_memory: Record each stage's tracemalloc peak (tracemalloc must
+            be started; it slows the stages down)
+
+    Returns:
+        {stage: (seconds, items processed, unit, peak MB or None)} in stage order
+    """
+    zip_bytes = zip_path.stat().st_size
+    stages = {}
+
+    def timed(name, amount, unit, func, *args):
+        if trace_memory:
+            tracemalloc.reset_peak()
+            held = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        result = func(*args)
+        seconds = time.perf_counter() - start
+        # Memory still held from earlier stages does not count against this one.
+        stages[name] = (seconds, amount, unit, (tracemalloc.get_traced_memory()[1] - held) / 1e6 if trace_memory else None)
+        return result
+
+    timed('validate_zip_file', zip_bytes, 'bytes', validate_zip_file, zip_path, NO_LIMIT, NO_LIMIT)
+    dump = timed('open_zip', zip_bytes, 'bytes', ZipDump, zip_path, NO_LIMIT)
+    dump_path = timed('find_dump_path', 1, 'dumps', dump.find_dump_path)
+    log_file = next(dump_path.glob('log.json'))
+    with zipfile.ZipFile(zip_path) as zf:
+        log_bytes = zf.getinfo(log_file.member_name).file_size
+    logs = timed('analyze_logs', log_bytes, 'bytes', analyzer.analyze_logs, log_file, min_level)
+    analysis = timed('analyze_dump', log_bytes, 'bytes', pipeline.analyze_dump, dump_path, min_level, 'serial')
+    timed('render_report', len(logs['all_errors']), 'entries', reporter.generate_report, analysis['results'], work_dir / 'report.html')
+    return stages
+
+def benchmark(zip_path, work_dir, min_level=40, repeat=3, memory=True):
+    """
+    Benchmarks the stages on one ZIP.
+
+    Returns:
+        {stage: {'seconds' (best of ``repeat``), 'throughput', 'unit',
+        'peak_mb' (from an extra traced run, when ``memory``)}}
+    """
+    best = {}
+    for _ in range(repeat):
+        for name, (seconds, amount, unit, _) in run_stages(zip_path, work_dir, min_level).items():
+            if name not in best or seconds < best[name][0]:
+                best[name] = (seconds, amount, unit)
+    results = {
+        name: {
+            'seconds': round(seconds, 6),
+            'throughput': round((amount / 1e6 if unit == 'bytes' else amount) / seconds, 3) if seconds else None,
+            'unit': 'MB/s' if unit == 'bytes' else f"{unit}/s",
+        }
+        for name, (seconds, amount, unit) in best.items()
+    }
+    if memory:
+        tracemalloc.start()
+        try:
+            traced = run_stages(zip_path, work_dir, min_level, trace_memory=True)
+        finally:
+            tracemalloc.stop()
+        for name, (_, _, _, peak_mb) in traced.items():
+            results[name]['peak_mb'] = round(peak_mb, 3)
+    return results
+
+def find_regressions(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """Lists the stages whose time or peak memory exceeds the baseline by more than ``threshold``."""
+    regressions = []
+    for name, stage in current['stages'].items():
+        before = baseline['stages'].get(name, {})
+        for metric, noise in COMPARED_METRICS.items():
+            if stage.get(metric) is not None and before.get(metric):
+                change = stage[metric] / before[metric] - 1
+                if change > threshold and stage[metric] - before[metric] > noise:
+                    regressions.append(f"{name}: {metric} {before[metric]} -> {stage[metric]} (+{change:.0%})")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--entries', type=int, default=100000)
+    parser.add_argument('--levels', type=parse_level_mix, default=DEFAULT_LEVEL_MIX, help="Level weights, e.g. '20:70,30:15,40:10,50:5'.")
+    parser.add_argument('--unique', type=int, default=500, help='Distinct log messages.')
+    parser.add_argument('--span-hours', type=float, default=24.0)
+    parser.add_argument('--format', choices=LOG_FORMATS, default='ndjson')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--log-level', type=int, default=40)
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per stage; the fastest counts.')
+    parser.add_argument('--no-memory', action='store_true', help='Skip the (slower) tracemalloc run.')
+    parser.add_argument('--baseline', type=Path, help='JSON baseline to compare with (or to write with --save-baseline).')
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='Allowed relative regression (default: 0.25).')
+    parser.add_argument('--output', type=Path, help='Also write the results to this JSON file.')
+    args = parser.parse_args()
+
+    dump_config = {
+        'entries': args.entries, 'level_mix': {str(level): weight for level, weight in args.levels.items()},
+        'unique_messages': args.unique, 'span_hours': args.span_hours, 'log_format': args.format, 'seed': args.seed,
+        'min_level': args.log_level,
+    }
+    with tempfile.TemporaryDirectory() as work_dir:
+        work_dir = Path(work_dir)
+        zip_path = generate_dump(
+            work_dir / 'dump.zip', args.entries, args.levels, args.unique, args.span_hours, args.format, zipped=True, seed=args.seed
+        )
+        print(f"Generated {args.entries} entries ({args.format}), {zip_path.stat().st_size / 1e6:.1f} MB zipped")
+        stages = benchmark(zip_path, work_dir, args.log_level, args.repeat, not args.no_memory)
+
+    current = {'dump': dump_config, 'python': platform.python_version(), 'stages': stages}
+    for name, stage in stages.items():
+        peak = f"  peak {stage['peak_mb']:8.1f} MB" if 'peak_mb' in stage else ''
+        throughput = f"{stage['throughput']:12,.1f} {stage['unit']}" if stage['throughput'] is not None else ''
+        print(f"{name:<18} {stage['seconds']:8.3f}s {throughput}{peak}")
+    if args.output:
+        args.output.write_text(json.dumps(current, indent=2))
+
+    if not args.baseline:
+        return 0
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(current, indent=2))
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    baseline = json.loads(args.baseline.read_text())
+    if baseline.get('dump') != dump_config:
+        print(f"Warning: baseline was recorded for a different dump: {baseline.get('dump')}")
+    regressions = find_regressions(current, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if not regressions:
+        print(f"No regressions beyond {args.threshold:.0%} of {args.baseline}")
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
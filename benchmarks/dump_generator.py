@@ -0,0 +1,214 @@
+# dump_generator.py
+"""
+Deterministic generator of synthetic Rocket.Chat support dumps.
+
+Writes the statistics, settings, omnichannel and apps files plus a log.json
+whose size, level mix, message cardinality, time span and format (NDJSON or
+the ``{"queue": [...]}`` envelope) are configurable. The same arguments and
+seed always produce byte-identical dumps.
+
+Usage: python benchmarks/dump_generator.py OUTPUT [--entries N | --zip-mb MB] [--zip] [--format ndjson|queue]
+"""
+
+import argparse
+import io
+import json
+import random
+import zipfile
+import zlib
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Level weights of a typical production log: mostly info, few errors.
+DEFAULT_LEVEL_MIX = {20: 70, 30: 15, 40: 10, 50: 5}
+LOG_FORMATS = ('ndjson', 'queue')
+# First timestamp of every generated log.
+START_TIME = datetime(2024, 5, 1, tzinfo=timezone.utc)
+# Entries generated to estimate the compressed size per entry for --zip-mb.
+SIZE_SAMPLE_ENTRIES = 2000
+HOSTS = ['rocketchat-0', 'rocketchat-1', 'rocketchat-2']
+MESSAGE_TEMPLATES = {
+    20: [
+        'User {n} logged in',
+        'Meteor.call stream-notify-room took {n}ms',
+        'Sending push notification to {n} devices',
+        'Room {n} messages read',
+    ],
+    30: [
+        'Method "sendMessage" is slow for user {n}',
+        'Rate limit reached for IP 10.0.{n}.1',
+        'Deprecated API /api/v1/channels.history called by {n}',
+    ],
+    40: [
+        'Exception in callback of async function: Error: connect ECONNREFUSED 10.0.0.{n}:3000',
+        'Method "sendMessage" failed for user {n}',
+        'Network request failed while syncing room {n}',
+        'User not found: {n}',
+    ],
+    50: [
+        'MongoTimeoutError: Server selection timed out after 30000 ms ({n})',
+        'MongoNetworkError: connection {n} to 10.0.0.5:27017 closed',
+        'FATAL ERROR: Reached heap limit Allocation failed ({n})',
+    ],
+}
+
+def parse_level_mix(text):
+    """Parses a level mix such as '20:70,30:15,40:10,50:5' into {level: weight}."""
+    mix = {}
+    for part in text.split(','):
+        level, _, weight = part.partition(':')
+        mix[int(level)] = float(weight)
+    if not mix or any(weight < 0 for weight in mix.values()) or not sum(mix.values()):
+        raise ValueError(f"Invalid level mix '{text}'")
+    return mix
+
+def _message_pools(rng, level_mix, unique_messages):
+    """Splits the unique messages over the levels by weight; at least one each."""
+    total = sum(level_mix.values())
+    pools = {}
+    for level, weight in level_mix.items():
+        templates = MESSAGE_TEMPLATES.get(level) or MESSAGE_TEMPLATES[min(MESSAGE_TEMPLATES, key=lambda known: abs(known - level))]
+        size = max(1, round(unique_messages * weight / total))
+        pools[level] = [rng.choice(templates).format(n=i) for i in range(size)]
+    return pools
+
+def iter_entries(entries, level_mix=None, unique_messages=500, span_hours=24.0, seed=42):
+    """
+    Yields synthetic log entries in time order.
+
+    Args:
+        entries: Number of entries
+        level_mix: {level: weight} (default: DEFAULT_LEVEL_MIX)
+        unique_messages: Distinct messages across all levels; within a level
+            they repeat with a Zipf-like skew, as real logs do
+        span_hours: Time between the first and the last entry
+        seed: Random seed
+    """
+    level_mix = level_mix or DEFAULT_LEVEL_MIX
+    rng = random.Random(seed)
+    pools = _message_pools(rng, level_mix, unique_messages)
+    skews = {level: [1 / (rank + 1) for rank in range(len(pool))] for level, pool in pools.items()}
+    levels = rng.choices(list(level_mix), weights=list(level_mix.values()), k=entries)
+    step = timedelta(hours=span_hours) / max(entries - 1, 1)
+    for i, level in enumerate(levels):
+        msg = rng.choices(pools[level], weights=skews[level])[0]
+        entry = {
+            'level': level,
+            'time': (START_TIME + step * i).isoformat(timespec='milliseconds').replace('+00:00', 'Z'),
+            'pid': 1000 + i % 4,
+            'hostname': HOSTS[i % len(HOSTS)],
+            'name': 'System',
+            'msg': msg,
+        }
+        if level >= 40:
+            error_type = msg.split(':', 1)[0] if ':' in msg else 'Error'
+            entry['err'] = {
+                'type': error_type,
+                'message': msg,
+                'stack': f"{error_type}: {msg}\n    at Object.<anonymous> (/app/bundle/programs/server/app/app.js:{rng.randint(1, 90000)}:15)\n    at processTicksAndRejections (node:internal/process/task_queues:95:5)",
+            }
+        yield entry
+
+def write_log(f, entries, log_format='ndjson'):
+    """Writes entries to a text file object as NDJSON or a queue envelope; returns the count."""
+    if log_format not in LOG_FORMATS:
+        raise ValueError(f"Unknown log format '{log_format}', expected one of {', '.join(LOG_FORMATS)}")
+    count = 0
+    if log_format == 'ndjson':
+        for entry in entries:
+            f.write(json.dumps(entry) + '\n')
+            count += 1
+        return count
+    f.write('{"queue": [')
+    for entry in entries:
+        f.write((', ' if count else '') + json.dumps({'string': json.dumps(entry)}))
+        count += 1
+    f.write(f'], "size": {count}}}\n')
+    return count
+
+def dump_files(seed=42):
+    """Returns the non-log dump files as {file name: JSON-serializable content}."""
+    rng = random.Random(seed)
+    return {
+        'server-statistics.json': {
+            'version': '6.9.0', 'totalUsers': rng.randint(100, 50000), 'activeUsers': rng.randint(10, 5000),
+            'totalRooms': rng.randint(10, 20000), 'livechatEnabled': True, 'os': {'type': 'Linux'},
+            'process': {'nodeVersion': 'v14.21.3'}, 'mongoVersion': '5.0.24',
+        },
+        'settings.json': [{'_id': f"Setting_{i}", 'value': rng.choice([True, False, i, f"value-{i}"])} for i in range(200)]
+                         + [{'_id': 'Site_Url', 'value': 'https://chat.example.com'}, {'_id': 'SMTP_Password', 'value': 'hunter2'}],
+        'omnichannel-settings.json': {'settings': [{'_id': f"Livechat_setting_{i}", 'value': i % 3 == 0} for i in range(20)]},
+        'apps-installed.json': {'apps': [{'name': f"app-{i}", 'version': f"1.{i}.0", 'status': rng.choice(['enabled', 'disabled'])} for i in range(10)]},
+    }
+
+def entries_for_zip_size(target_bytes, log_format='ndjson', **options):
+    """Estimates the entry count whose zipped dump is about ``target_bytes``, from a compressed sample."""
+    sample = [json.dumps(entry) for entry in iter_entries(SIZE_SAMPLE_ENTRIES, **options)]
+    if log_format == 'queue':
+        sample = [json.dumps({'string': line}) for line in sample]
+    compressed = len(zlib.compress('\n'.join(sample).encode('utf-8'), 6))
+    return max(1, round(target_bytes / (compressed / SIZE_SAMPLE_ENTRIES)))
+
+def _zip_info(name):
+    # A fixed timestamp keeps the archive reproducible.
+    info = zipfile.ZipInfo(name, date_time=START_TIME.timetuple()[:6])
+    info.compress_type = zipfile.ZIP_DEFLATED
+    return info
+
+def generate_dump(output, entries=10000, level_mix=None, unique_messages=500, span_hours=24.0,
+                  log_format='ndjson', zipped=False, seed=42):
+    """
+    Writes a synthetic support dump.
+
+    Args:
+        output: Dump directory to create, or ZIP file to write when ``zipped``
+        entries: Number of log entries
+        level_mix: {level: weight} (default: DEFAULT_LEVEL_MIX)
+        unique_messages: Distinct log messages
+        span_hours: Time span of the log
+        log_format: 'ndjson' or 'queue' (the envelope)
+        zipped: Write a ZIP with the files in a 'dump/' folder
+        seed: Random seed
+
+    Returns:
+        The dump directory or ZIP path
+    """
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    log_entries = iter_entries(entries, level_mix, unique_messages, span_hours, seed)
+    if zipped:
+        with zipfile.ZipFile(output, 'w') as zf:
+            for name, content in dump_files(seed).items():
+                zf.writestr(_zip_info(f"dump/{name}"), json.dumps(content, indent=2))
+            with zf.open(_zip_info('dump/log.json'), 'w', force_zip64=True) as raw:
+                with io.TextIOWrapper(raw, encoding='utf-8', newline='\n') as f:
+                    write_log(f, log_entries, log_format)
+        return output
+    output.mkdir(exist_ok=True)
+    for name, content in dump_files(seed).items():
+        (output / name).write_text(json.dumps(content, indent=2), encoding='utf-8')
+    with open(output / 'log.json', 'w', encoding='utf-8', newline='\n') as f:
+        write_log(f, log_entries, log_format)
+    return output
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('output', type=Path, help='Dump directory, or ZIP file with --zip.')
+    parser.add_argument('--entries', type=int, default=100000)
+    parser.add_argument('--zip-mb', type=float, default=None, help='Size the log for a ZIP of about this many MB (overrides --entries).')
+    parser.add_argument('--levels', type=parse_level_mix, default=DEFAULT_LEVEL_MIX, help="Level weights, e.g. '20:70,30:15,40:10,50:5'.")
+    parser.add_argument('--unique', type=int, default=500, help='Distinct log messages.')
+    parser.add_argument('--span-hours', type=float, default=24.0)
+    parser.add_argument('--format', choices=LOG_FORMATS, default='ndjson')
+    parser.add_argument('--zip', action='store_true', help='Write a ZIP (implied by a .zip OUTPUT).')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    options = {'level_mix': args.levels, 'unique_messages': args.unique, 'span_hours': args.span_hours, 'seed': args.seed}
+    entries = entries_for_zip_size(args.zip_mb * 1e6, args.format, **options) if args.zip_mb else args.entries
+    path = generate_dump(args.output, entries, log_format=args.format, zipped=args.zip or bool(args.zip_mb) or args.output.suffix.lower() == '.zip', **options)
+    size = path.stat().st_size if path.is_file() else sum(child.stat().st_size for child in path.iterdir())
+    print(f"Wrote {path} ({entries} entries, {size / 1e6:.1f} MB)")
+
+if __name__ == '__main__':
+    main()
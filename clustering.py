@@ -0,0 +1,459 @@
+# clustering.py
+import heapq
+import re
+from collections import OrderedDict, deque
+
+# Placeholder substituted for variable parts of a message.
+WILDCARD = '<*>'
+
+# Variable parts masked before clustering; earlier patterns take precedence.
+# Masks are applied per whitespace-separated token, and only to tokens that
+# contain a digit or an "@", which leaves ordinary words untouched.
+DEFAULT_MASKS = [
+    re.compile(r'\d{4}-\d{2}-\d{2}(?:T\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?)?'),  # ISO dates and timestamps
+    re.compile(r'\d{2}:\d{2}:\d{2}(?:\.\d+)?'),  # times of day
+    re.compile(r'\b[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}\b'),  # UUIDs
+    re.compile(r'\b[\w.+-]+@[\w-]+(?:\.[\w-]+)+\b'),  # e-mail addresses
+    re.compile(r'\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b'),  # IPv4 addresses with optional port
+    re.compile(r'\b(?:0x)?[0-9a-fA-F]{24,}\b'),  # Mongo ObjectIds and long hex strings
+    re.compile(r'\b(?=[A-Za-z]*\d)[23456789A-HJ-NP-Za-km-z]{17}\b'),  # Meteor document ids
+    re.compile(r'\b\d+(?:\.\d+)?\b'),  # plain numbers
+]
+
+_MAYBE_VARIABLE = re.compile(r'[\d@]')
+
+def compile_masks(masks):
+    """Combines mask patterns into one alternation so a token is scanned once."""
+    return re.compile('|'.join(f'(?:{mask.pattern})' for mask in masks))
+
+_DEFAULT_MASK = compile_masks(DEFAULT_MASKS)
+
+def mask_tokens(msg, mask=_DEFAULT_MASK):
+    """Splits a message into tokens, replacing variable parts (ids, numbers, addresses...) with the wildcard."""
+    return [mask.sub(WILDCARD, token) if _MAYBE_VARIABLE.search(token) else token for token in msg.split()]
+
+def mask_message(msg, mask=_DEFAULT_MASK):
+    """Returns the message with variable parts replaced by the wildcard."""
+    return ' '.join(mask_tokens(msg, mask))
+
+class _KeyStats:
+    """
+    Occurrence statistics for one masked message.
+
+    ``count`` may overestimate the true count by up to ``error`` once a
+    bounded miner has evicted other messages (see TemplateMiner); until then
+    ``error`` is 0 and counts are exact.
+    """
+
+    __slots__ = ('key', 'count', 'error', 'first_pos', 'first_seen', 'last_pos', 'last_seen', 'examples', 'exemplars', 'cluster')
+
+    def __init__(self, key=None, count=0):
+        self.key = key  # the masked message; None once evicted
+        self.count = self.error = count
+        self.first_pos = self.last_pos = 0
+        self.first_seen = self.last_seen = None
+        self.examples = []  # (position, raw message), first distinct messages only
+        self.exemplars = None  # ([first (position, entry)...], deque of the last ones), when kept
+        self.cluster = None
+
+    def observe(self, pos, msg, time_str, max_examples):
+        if self.count == self.error:
+            self.first_pos, self.first_seen = pos, time_str
+        self.count += 1
+        self.last_pos, self.last_seen = pos, time_str
+        if len(self.examples) < max_examples and all(msg != seen for _, seen in self.examples):
+            self.examples.append((pos, msg))
+
+    def keep(self, pos, entry, size):
+        """Keeps a log entry if it is among the first or (so far) last ``size`` of this form."""
+        if self.exemplars is None:
+            self.exemplars = ([], deque(maxlen=size))
+        first, last = self.exemplars
+        if len(first) < size:
+            first.append((pos, entry))
+        else:
+            last.append((pos, entry))
+
+    def kept(self):
+        if self.exemplars is None:
+            return []
+        first, last = self.exemplars
+        return first + list(last)
+
+    def combine(self, other, offset, max_examples):
+        """Folds in stats gathered from messages that all came after ours."""
+        if other.count == 0:
+            return
+        if self.count == self.error:
+            self.first_pos, self.first_seen = other.first_pos + offset, other.first_seen
+        self.count += other.count
+        self.error += other.error
+        self.last_pos, self.last_seen = other.last_pos + offset, other.last_seen
+        for pos, msg in other.examples:
+            if len(self.examples) < max_examples and all(msg != seen for _, seen in self.examples):
+                self.examples.append((pos + offset, msg))
+        if other.exemplars is not None:
+            size = other.exemplars[1].maxlen
+            for pos, entry in other.kept():
+                self.keep(pos + offset, entry, size)
+
+    @classmethod
+    def union(cls, parts, max_examples):
+        """Combines stats gathered from interleaved messages whose positions share one scale."""
+        stats = cls()
+        if len(parts) == 1:
+            # Most forms appear at one level only; copy them without re-sorting.
+            part = parts[0]
+            stats.count, stats.error = part.count, part.error
+            stats.first_pos, stats.first_seen = part.first_pos, part.first_seen
+            stats.last_pos, stats.last_seen = part.last_pos, part.last_seen
+            stats.examples = list(part.examples)
+            if part.exemplars is not None:
+                first, last = part.exemplars
+                stats.exemplars = (list(first), deque(last, maxlen=last.maxlen))
+            return stats
+        first = min(parts, key=lambda part: part.first_pos)
+        last = max(parts, key=lambda part: part.last_pos)
+        stats.count = sum(part.count for part in parts)
+        stats.error = sum(part.error for part in parts)
+        stats.first_pos, stats.first_seen = first.first_pos, first.first_seen
+        stats.last_pos, stats.last_seen = last.last_pos, last.last_seen
+        for pos, msg in sorted(example for part in parts for example in part.examples):
+            if len(stats.examples) < max_examples and all(msg != seen for _, seen in stats.examples):
+                stats.examples.append((pos, msg))
+        kept = [part for part in parts if part.exemplars is not None]
+        if kept:
+            size = kept[0].exemplars[1].maxlen
+            for pos, entry in sorted((item for part in kept for item in part.kept()), key=lambda item: item[0]):
+                stats.keep(pos, entry, size)
+        return stats
+
+class LogCluster:
+    """A message template and the masked messages grouped under it."""
+
+    __slots__ = ('tokens', 'keys')
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.keys = []
+
+    @property
+    def template(self):
+        return ' '.join(self.tokens)
+
+    @property
+    def count(self):
+        return sum(key.count for key in self.keys)
+
+    def row(self, max_examples):
+        """Returns the Error Summary row for this template ('CountError' bounds an overestimated 'Count')."""
+        first = min(self.keys, key=lambda k: k.first_pos)
+        last = max(self.keys, key=lambda k: k.last_pos)
+        examples = sorted(example for key in self.keys for example in key.examples)[:max_examples]
+        row = {
+            'Message': self.template,
+            'Count': self.count,
+            'FirstSeen': first.first_seen,
+            'LastSeen': last.last_seen,
+            'Examples': [msg for _, msg in examples],
+        }
+        error = sum(key.error for key in self.keys)
+        if error:
+            row['CountError'] = error
+        return row
+
+    def exemplars(self, size):
+        """Returns (position, entry) of the first and last ``size`` kept entries of this template."""
+        kept = sorted((item for key in self.keys for item in key.kept()), key=lambda item: item[0])
+        return kept if len(kept) <= 2 * size else kept[:size] + kept[-size:]
+
+class _Node:
+    __slots__ = ('children', 'clusters')
+
+    def __init__(self):
+        self.children = {}
+        self.clusters = []
+
+class TemplateMiner:
+    """
+    Online log template miner based on Drain (He et al., ICWS 2017).
+
+    Messages are masked and counted per distinct masked form as they stream
+    in. Each new masked form is then routed through a fixed-depth prefix tree
+    keyed by token count and the first few tokens; only the handful of
+    clusters in the reached leaf are compared against it, so each lookup costs
+    roughly the same no matter how many templates exist. It joins the most
+    similar cluster (turning differing tokens into wildcards) or starts a new
+    one.
+
+    Masked forms are classified in first-occurrence order, which makes the
+    result independent of how the input was split: miners fed with
+    consecutive parts of a log and merged in order produce the same templates
+    as one miner fed the whole log.
+
+    With ``max_keys``, at most that many masked forms are tracked, using the
+    Space-Saving algorithm (Metwally et al., ICDT 2005): a new form replaces
+    the least frequent one and inherits its count as both count and error.
+    Every form whose true count exceeds ``floor`` is still tracked, and a
+    tracked count overestimates the truth by at most its error. Counts are
+    kept in buckets so finding the form to replace costs O(1). Merges follow
+    the mergeable-summaries rule: a form missing from one side is charged
+    that side's floor. The summary is exact as long as nothing is evicted.
+
+    With ``exemplars``, the first and last that many log entries passed to
+    add() are kept per masked form (and dropped with it when it is evicted),
+    for exemplars().
+    """
+
+    def __init__(self, depth=4, sim_threshold=0.5, max_children=100, max_examples=3, masks=DEFAULT_MASKS, cache_size=50000,
+                 max_keys=None, exemplars=0):
+        self.prefix_depth = max(depth - 2, 1)
+        self.sim_threshold = sim_threshold
+        self.max_children = max_children
+        self.max_examples = max_examples
+        self._mask = _DEFAULT_MASK if masks is DEFAULT_MASKS else compile_masks(masks)
+        self.position = 0
+        self.keys = {}
+        self._unassigned = []
+        self._clusters = []
+        self._root = {}
+        # Raw message -> stats of its masked form; most log lines repeat exactly.
+        self._cache = {}
+        self._cache_size = cache_size
+        self.max_keys = max_keys
+        self.exemplars_per_key = exemplars
+        # Upper bound of the true count of any masked form not in ``keys``.
+        self.floor = 0
+        self._evicted = False
+        # Space-Saving buckets (count -> OrderedDict of stats, oldest first), built
+        # when max_keys is first reached and dropped whenever counts change in bulk.
+        self._buckets = None
+        self._min_count = 0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_cache'] = {}
+        state['_buckets'] = None
+        return state
+
+    def _leaf(self, tokens):
+        node = self._root.get(len(tokens))
+        if node is None:
+            node = self._root[len(tokens)] = _Node()
+        for token in tokens[:self.prefix_depth]:
+            key = WILDCARD if _MAYBE_VARIABLE.search(token) else token
+            child = node.children.get(key)
+            if child is None:
+                if len(node.children) >= self.max_children:
+                    key = WILDCARD
+                    child = node.children.get(key)
+                if child is None:
+                    child = node.children[key] = _Node()
+            node = child
+        return node
+
+    def _best_cluster(self, leaf, tokens):
+        best, best_sim = None, -1.0
+        for cluster in leaf.clusters:
+            same = sum(1 for t, m in zip(cluster.tokens, tokens) if t == m)
+            sim = same / len(tokens) if tokens else 1.0
+            if sim > best_sim:
+                best, best_sim = cluster, sim
+        return best if best is not None and best_sim >= self.sim_threshold else None
+
+    def _key_for(self, masked):
+        stats = self.keys.get(masked)
+        if stats is None:
+            if self.max_keys is not None and len(self.keys) >= self.max_keys:
+                stats = self._replace_least_frequent(masked)
+            else:
+                stats = _KeyStats(masked, self.floor)
+            self.keys[masked] = stats
+            self._unassigned.append(masked)
+        return stats
+
+    def _replace_least_frequent(self, masked):
+        """Evicts the least frequent masked form (the oldest among ties) for a new one that inherits its count."""
+        if self._buckets is None:
+            self._buckets = {}
+            for stats in self.keys.values():
+                self._buckets.setdefault(stats.count, OrderedDict())[stats] = None
+            self._min_count = min(self._buckets)
+        bucket = self._buckets[self._min_count]
+        # A plain dict would have to skip the slots of earlier victims here.
+        victim, _ = bucket.popitem(last=False)
+        self._evict(victim)
+        stats = _KeyStats(masked, victim.count)
+        bucket[stats] = None
+        return stats
+
+    def _evict(self, stats):
+        del self.keys[stats.key]
+        stats.key = None
+        self.floor = max(self.floor, stats.count)
+        self._evicted = True
+
+    def _bump(self, stats):
+        """Moves a form to the next count bucket ahead of its observe()."""
+        count = stats.count
+        bucket = self._buckets[count]
+        del bucket[stats]
+        if not bucket:
+            del self._buckets[count]
+            if count == self._min_count:
+                self._min_count = count + 1
+        higher = self._buckets.get(count + 1)
+        if higher is None:
+            higher = self._buckets[count + 1] = OrderedDict()
+        higher[stats] = None
+
+    def _enforce_max_keys(self):
+        """Evicts the least frequent forms beyond max_keys after a merge."""
+        self._buckets = None
+        if self.max_keys is None or len(self.keys) <= self.max_keys:
+            return
+        for stats in heapq.nsmallest(len(self.keys) - self.max_keys, self.keys.values(), key=lambda stats: stats.count):
+            self._evict(stats)
+
+    def add(self, msg, time_str=None, position=None, entry=None):
+        """
+        Records one message occurrence.
+
+        ``position`` places the message on a scale shared with other miners
+        (see union); by default messages are numbered in the order added.
+        ``entry`` is the log entry the message came from, kept as an exemplar
+        when the miner keeps them.
+        """
+        if position is not None:
+            self.position = position
+        if not isinstance(msg, str):
+            msg = str(msg)
+        stats = self._cache.get(msg)
+        if stats is None or stats.key is None:
+            stats = self._key_for(mask_message(msg, self._mask))
+            if len(self._cache) >= self._cache_size:
+                self._cache.clear()
+            self._cache[msg] = stats
+        if self._buckets is not None:
+            self._bump(stats)
+        stats.observe(self.position, msg, time_str, self.max_examples)
+        if self.exemplars_per_key and entry is not None:
+            stats.keep(self.position, entry, self.exemplars_per_key)
+        self.position += 1
+
+    def merge(self, other, offset=None):
+        """
+        Folds in a miner that was fed the messages following ours.
+
+        ``offset`` is the position of other's first message on our scale; it
+        defaults to just after our last message.
+        """
+        if offset is None:
+            offset = self.position
+        for masked, theirs in other.keys.items():
+            ours = self.keys.get(masked)
+            if ours is None:
+                ours = self.keys[masked] = _KeyStats(masked, self.floor)
+                self._unassigned.append(masked)
+            ours.combine(theirs, offset, self.max_examples)
+        if other.floor:
+            for masked, ours in self.keys.items():
+                if masked not in other.keys:
+                    ours.count += other.floor
+                    ours.error += other.floor
+        self.floor += other.floor
+        self.position = offset + other.position
+        self._enforce_max_keys()
+
+    @classmethod
+    def union(cls, miners, **kwargs):
+        """
+        Builds a miner from miners fed interleaved parts of one log.
+
+        The parts must have been added with explicit positions on one shared
+        scale. Masked forms are re-classified in their overall first-occurrence
+        order, so the result equals a single miner fed the combined messages.
+        """
+        union = cls(**kwargs)
+        parts, floors = {}, {}
+        for miner in miners:
+            for masked, stats in miner.keys.items():
+                parts.setdefault(masked, []).append(stats)
+                floors[masked] = floors.get(masked, 0) + miner.floor
+            union.position = max(union.position, miner.position)
+            union.floor += miner.floor
+        combined = {masked: _KeyStats.union(stats, union.max_examples) for masked, stats in parts.items()}
+        for masked in sorted(combined, key=lambda masked: combined[masked].first_pos):
+            stats = union.keys[masked] = combined[masked]
+            stats.key = masked
+            # Charge the floors of the miners that did not track this form.
+            stats.count += union.floor - floors[masked]
+            stats.error += union.floor - floors[masked]
+            union._unassigned.append(masked)
+        union._enforce_max_keys()
+        return union
+
+    def _assign_pending(self):
+        if self._evicted:
+            for cluster in self._clusters:
+                cluster.keys = [key for key in cluster.keys if key.key is not None]
+            self._evicted = False
+        for masked in self._unassigned:
+            stats = self.keys.get(masked)
+            if stats is None or stats.cluster is not None:
+                continue  # evicted, or evicted and added again
+            tokens = masked.split()
+            leaf = self._leaf(tokens)
+            cluster = self._best_cluster(leaf, tokens)
+            if cluster is None:
+                cluster = LogCluster(tokens)
+                leaf.clusters.append(cluster)
+                self._clusters.append(cluster)
+            else:
+                cluster.tokens = [t if t == m else WILDCARD for t, m in zip(cluster.tokens, tokens)]
+            cluster.keys.append(stats)
+            stats.cluster = cluster
+        self._unassigned = []
+
+    @property
+    def clusters(self):
+        """The templates found so far, in order of first appearance."""
+        self._assign_pending()
+        # Clusters whose forms were all evicted have nothing left to report.
+        return [cluster for cluster in self._clusters if cluster.keys]
+
+    def summary(self):
+        """Returns one Error Summary row per template, most frequent first."""
+        rows = [cluster.row(self.max_examples) for cluster in self.clusters]
+        return sorted(rows, key=lambda row: row['Count'], reverse=True)
+
+    def forms(self):
+        """
+        Returns one row per tracked masked form, most frequent first.
+
+        A masked form depends on its own message only, so unlike a template
+        (which changes with the other messages of the log) it names the same
+        error in any log. 'Message' is the template it falls under in this one.
+        """
+        self._assign_pending()
+        rows = []
+        for masked, stats in self.keys.items():
+            row = {'Form': masked, 'Message': stats.cluster.template, 'Count': stats.count, 'FirstSeen': stats.first_seen, 'LastSeen': stats.last_seen}
+            if stats.error:
+                row['CountError'] = stats.error
+            rows.append(row)
+        return sorted(rows, key=lambda row: row['Count'], reverse=True)
+
+    def exemplars(self, limit):
+        """
+        Returns the kept entries of the most frequent templates, at most
+        ``limit`` of them, in position order.
+
+        Each template contributes its first and last ``exemplars`` entries.
+        """
+        selected = []
+        for cluster in sorted(self.clusters, key=lambda cluster: cluster.count, reverse=True):
+            if len(selected) >= limit:
+                break
+            selected.extend(cluster.exemplars(self.exemplars_per_key)[:limit - len(selected)])
+        return [entry for _, entry in sorted(selected, key=lambda item: item[0])]
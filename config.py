@@ -1,5 +1,6 @@
 # config.py
 import os
+import tempfile
 from pathlib import Path
 
 class Config:
@@ -18,6 +19,33 @@ class Config:
     UPLOAD_FOLDER = Path(os.environ.get('UPLOAD_FOLDER', 'temp'))
     REPORTS_FOLDER = Path(os.environ.get('REPORTS_FOLDER', 'reports'))
     
+    # Analysis Settings
+    ANALYSIS_EXECUTOR = os.environ.get('ANALYSIS_EXECUTOR', 'thread')  # thread, process or serial
+    ANALYSIS_WORKERS = int(os.environ['ANALYSIS_WORKERS']) if os.environ.get('ANALYSIS_WORKERS') else None
+    LOG_PARSE_WORKERS = int(os.environ.get('LOG_PARSE_WORKERS', 1))  # >1 parses large NDJSON logs on several cores
+    TIMELINE_MAX_POINTS = int(os.environ.get('TIMELINE_MAX_POINTS', 500))  # timeline chart switches to hourly/daily buckets beyond this
+    SUMMARY_MAX_MESSAGES = int(os.environ.get('SUMMARY_MAX_MESSAGES', 20000))  # distinct messages per level before Error Summary counts become estimates
+    SUMMARY_MIN_LEVEL = int(os.environ.get('SUMMARY_MIN_LEVEL', 30))  # lower levels are counted and listed but not summarized, unless a report asks for them; 0 summarizes all
+    ENTRY_RETENTION = os.environ.get('ENTRY_RETENTION', 'tail')  # default log table entries: tail, reservoir or exemplars
+    
+    # Background Analysis Jobs
+    JOBS_FOLDER = Path(os.environ.get('JOBS_FOLDER', Path(tempfile.gettempdir()) / 'rocketchat-analyzer-jobs'))
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))  # analysis threads per server process
+    JOB_MAX_AGE = int(os.environ.get('JOB_MAX_AGE', 3600))  # seconds before finished jobs are deleted
+    JOB_HEARTBEAT_TIMEOUT = int(os.environ.get('JOB_HEARTBEAT_TIMEOUT', 120))  # seconds without a heartbeat before a job is marked failed
+    
+    # Result Cache (repeat uploads of the same dump skip analysis)
+    RESULT_CACHE_ENABLED = os.environ.get('RESULT_CACHE_ENABLED', 'True').lower() in ('true', '1', 'yes')
+    RESULT_CACHE_FOLDER = Path(os.environ.get('RESULT_CACHE_FOLDER', Path(tempfile.gettempdir()) / 'rocketchat-analyzer-cache'))
+    RESULT_CACHE_MAX_BYTES = int(os.environ.get('RESULT_CACHE_MAX_BYTES', 256 * 1024 * 1024))  # 256 MB default
+    
+    # Dump Store (SQLite history of analyzed dumps for trend queries; empty disables)
+    DUMP_STORE_PATH = os.environ.get('DUMP_STORE_PATH', '')
+    
+    # Metrics (per-stage Prometheus metrics at /metrics and Server-Timing headers)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() in ('true', '1', 'yes')
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')  # bearer token for /metrics; empty allows loopback scrapes only
+    
     # Flask Settings
     DEBUG = os.environ.get('FLASK_DEBUG', 'False').lower() in ('true', '1', 'yes')
     TESTING = os.environ.get('FLASK_TESTING', 'False').lower() in ('true', '1', 'yes')
@@ -56,6 +84,8 @@ class TestingConfig(Config):
     TESTING = True
     SECRET_KEY = 'testing-key'
     MAX_CONTENT_LENGTH = 10 * 1024 * 1024  # 10 MB for testing
+    RESULT_CACHE_ENABLED = False
+    DUMP_STORE_PATH = ''
 
 config = {
     'development': DevelopmentConfig,
@@ -0,0 +1,227 @@
+# dump_diff.py
+import argparse
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import json_backend
+import analyzer
+import pipeline
+import reporter
+from batch import open_dump
+from config import Config
+from dump_store import signature_of
+from utils import LOG_LEVEL_NAMES
+
+DIFF_TEMPLATE = 'diff_report.html'
+# Errors seen in both dumps count as changed once their count grows or
+# shrinks by at least this factor.
+FREQUENCY_CHANGE_RATIO = 2.0
+# Setting sections compared between dumps.
+SETTING_SECTIONS = ('settings', 'omnichannel')
+# Most dumps the web UI compares in one request.
+MAX_COMPARE_DUMPS = 5
+
+def diff_results(analysis: dict, min_level: int) -> dict:
+    """
+    Returns the report sections of a pipeline.analyze_dump result with the
+    'error_forms' (analyzer.LogAggregator.forms) at ``min_level`` added.
+    """
+    log_index = analysis['outputs'].get('logs') or analyzer.LogAggregator()
+    return {**analysis['results'], 'error_forms': log_index.forms(min_level)}
+
+def error_index(results: dict) -> Dict[str, dict]:
+    """
+    Indexes a dump's errors by the signature of their masked message.
+
+    Error Summary templates are not used as keys: they depend on the other
+    messages of the dump, so the same error can get a different template in
+    each dump.
+    """
+    return {signature_of(form): row for form, row in results['error_forms'].items()}
+
+def setting_index(results: dict) -> Dict[str, str]:
+    """Indexes a report's settings by section and name."""
+    return {
+        f"{section}:{row['Setting']}": row['Value']
+        for section in SETTING_SECTIONS for row in results[section]['content']
+    }
+
+def app_index(results: dict) -> Dict[tuple, dict]:
+    """
+    Indexes a report's installed apps by app id, or by name and version for
+    apps without one, so apps sharing a name (two versions, a private and a
+    marketplace copy) are all kept.
+    """
+    index = {}
+    for row in results['apps']['content']:
+        key = ('id', str(row['Id'])) if row.get('Id') else ('name', str(row['Name']), str(row['Version']))
+        # Identical duplicates are still listed once each.
+        copy, unique = 1, key
+        while unique in index:
+            copy += 1
+            unique = key + (copy,)
+        index[unique] = row
+    return index
+
+def _merge(before: dict, after: dict):
+    """
+    Pairs up the keys of two indexes in one pass over each.
+
+    Yields:
+        (key, before value or None, after value or None), keys of ``before``
+        first in their order, then the keys only in ``after``
+    """
+    for key, old in before.items():
+        yield key, old, after.get(key)
+    for key, new in after.items():
+        if key not in before:
+            yield key, None, new
+
+def diff_errors(before: Dict[str, dict], after: Dict[str, dict], ratio: float = FREQUENCY_CHANGE_RATIO) -> dict:
+    """Splits error signatures into 'new', 'resolved' and 'changed' (frequency) lists, most frequent first."""
+    new, resolved, changed = [], [], []
+    for signature, old, current in _merge(before, after):
+        if old is None:
+            new.append({'signature': signature, 'form': current['Form'], 'template': current['Message'], 'count': current['Count']})
+        elif current is None:
+            resolved.append({'signature': signature, 'form': old['Form'], 'template': old['Message'], 'count': old['Count']})
+        elif max(old['Count'], current['Count']) >= ratio * min(old['Count'], current['Count']):
+            changed.append({
+                'signature': signature, 'form': current['Form'], 'template': current['Message'],
+                'before': old['Count'], 'after': current['Count'], 'factor': current['Count'] / old['Count'],
+            })
+    new.sort(key=lambda row: -row['count'])
+    resolved.sort(key=lambda row: -row['count'])
+    changed.sort(key=lambda row: -abs(row['after'] - row['before']))
+    return {'new': new, 'resolved': resolved, 'changed': changed}
+
+def diff_settings(before: Dict[str, str], after: Dict[str, str]) -> List[dict]:
+    """Lists the settings that were added, removed or changed, by name."""
+    changes = []
+    for key, old, new in _merge(before, after):
+        if old != new:
+            section, name = key.split(':', 1)
+            change = 'added' if old is None else 'removed' if new is None else 'changed'
+            changes.append({'section': section, 'setting': name, 'change': change, 'before': old, 'after': new})
+    return sorted(changes, key=lambda row: (row['section'], row['setting']))
+
+def diff_apps(before: Dict[tuple, dict], after: Dict[tuple, dict]) -> List[dict]:
+    """Lists the apps that were installed, removed, upgraded/downgraded or changed status."""
+    pairs = []
+    unmatched = {}  # name -> ([before rows], [after rows]) of apps without an id found in one dump only
+    for key, old, new in _merge(before, after):
+        if key[0] == 'name' and (old is None or new is None):
+            sides = unmatched.setdefault(str((old or new)['Name']), ([], []))
+            sides[0 if new is None else 1].append(old or new)
+        else:
+            pairs.append((old, new))
+    for olds, news in unmatched.values():
+        if len(olds) == len(news) == 1:
+            # Without ids, the one copy of an app that changed version was upgraded or downgraded.
+            pairs.append((olds[0], news[0]))
+        else:
+            pairs.extend((old, None) for old in olds)
+            pairs.extend((None, new) for new in news)
+
+    changes = []
+    for old, new in pairs:
+        if old is None:
+            change = 'installed'
+        elif new is None:
+            change = 'removed'
+        elif old['Version'] != new['Version']:
+            change = 'version'
+        elif old['Status'] != new['Status']:
+            change = 'status'
+        else:
+            continue
+        changes.append({
+            'name': str((new or old)['Name']), 'change': change,
+            'before_version': old and old['Version'], 'after_version': new and new['Version'],
+            'before_status': old and old['Status'], 'after_status': new and new['Status'],
+        })
+    return sorted(changes, key=lambda row: (row['name'], str(row['before_version'] or row['after_version'])))
+
+def _version(results: dict) -> str:
+    return next((item['Value'] for item in results['statistics']['content'] if item['Statistic'] == 'Version'), 'N/A')
+
+def compare_results(named_results: List[tuple]) -> dict:
+    """
+    Compares analyzed dumps in the order given.
+
+    Each dump's errors, settings and apps are indexed by a hashed key once;
+    every consecutive pair is then compared with a single pass over both
+    indexes.
+
+    Args:
+        named_results: (name, diff_results output) tuples, oldest first
+
+    Returns:
+        Dict with the 'dumps' (name, version, log entry count) and one
+        'steps' entry per consecutive pair holding its 'errors', 'settings'
+        and 'apps' changes
+    """
+    indexes = [(name, results, error_index(results), setting_index(results), app_index(results)) for name, results in named_results]
+    steps = []
+    for (before_name, _, before_errors, before_settings, before_apps), (after_name, _, after_errors, after_settings, after_apps) in zip(indexes, indexes[1:]):
+        steps.append({
+            'before': before_name,
+            'after': after_name,
+            'errors': diff_errors(before_errors, after_errors),
+            'settings': diff_settings(before_settings, after_settings),
+            'apps': diff_apps(before_apps, after_apps),
+        })
+    return {
+        'dumps': [{'name': name, 'version': _version(results), 'entries': results['logs']['total_count']} for name, results in named_results],
+        'steps': steps,
+    }
+
+def _analyze_path(path: Path, min_level: int) -> dict:
+    return diff_results(pipeline.analyze_dump(open_dump(path), min_level, executor='serial'), min_level)
+
+def analyze_paths(paths: Iterable[Path], min_level: int, workers: Optional[int] = None) -> List[dict]:
+    """Analyzes dump directories or ZIP files concurrently, one process each; returns their diff_results in order."""
+    paths = list(paths)
+    with ProcessPoolExecutor(max_workers=workers or len(paths)) as pool:
+        return list(pool.map(_analyze_path, paths, [min_level] * len(paths)))
+
+def main(argv=None) -> int:
+    """Entry point of ``main.py --compare``."""
+    parser = argparse.ArgumentParser(prog="main.py --compare", description="Compare Rocket.Chat support dumps, oldest first.")
+    parser.add_argument("paths", type=Path, nargs='+', help="Two or more dump directories or ZIP files, oldest first.")
+    parser.add_argument("--output-dir", type=Path, default=Path(__file__).parent / 'reports', help="Directory for the diff report.")
+    parser.add_argument("--log-level", type=int, default=50, help="Minimum log level of the compared errors (e.g., 40 for ERROR).")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per dump).")
+    parser.add_argument("--json-output", action="store_true", help="Also write the diff as JSON.")
+    args = parser.parse_args(argv)
+    if len(args.paths) < 2:
+        parser.error("at least two dumps are needed")
+
+    try:
+        results = analyze_paths(args.paths, args.log_level, args.workers)
+    except Exception as e:
+        logging.error(f"Could not analyze the dumps: {e}")
+        return 1
+    diff = compare_results([(path.name, result) for path, result in zip(args.paths, results)])
+    for step in diff['steps']:
+        errors = step['errors']
+        logging.info(
+            f"{step['before']} -> {step['after']}: {len(errors['new'])} new, {len(errors['resolved'])} resolved, "
+            f"{len(errors['changed'])} changed-frequency errors; {len(step['settings'])} setting and {len(step['apps'])} app changes"
+        )
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    stem = f"RocketChat-Diff-Report_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}"
+    html_path = reporter.generate_report(
+        diff, args.output_dir / f"{stem}.html", template_name=DIFF_TEMPLATE,
+        log_level_name=LOG_LEVEL_NAMES.get(args.log_level, str(args.log_level)), version=Config.VERSION
+    )
+    logging.info(f"Diff report saved to: {html_path}")
+    if args.json_output:
+        json_path = args.output_dir / f"{stem}.json"
+        json_backend.dump_file(diff, json_path)
+        logging.info(f"JSON output saved to: {json_path}")
+    return 0
@@ -0,0 +1,247 @@
+# dump_store.py
+import hashlib
+import logging
+import sqlite3
+import time
+from contextlib import closing
+from itertools import islice
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from timestamps import parse_time_ms
+
+# Rows per executemany call when recording a dump.
+INSERT_BATCH_SIZE = 1000
+# Width of the stored per-level count buckets.
+BUCKET_MS = 60 * 60 * 1000
+# Bucket widths accepted by DumpStore.timeline.
+TREND_RESOLUTIONS = {'hour': BUCKET_MS, 'day': 24 * BUCKET_MS}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dumps (
+    id INTEGER PRIMARY KEY,
+    digest TEXT NOT NULL UNIQUE,
+    name TEXT,
+    version TEXT,
+    analyzed_at REAL NOT NULL,
+    entry_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS dump_stats (
+    dump_id INTEGER NOT NULL REFERENCES dumps(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    value TEXT,
+    PRIMARY KEY (dump_id, name)
+);
+CREATE TABLE IF NOT EXISTS signatures (
+    dump_id INTEGER NOT NULL REFERENCES dumps(id) ON DELETE CASCADE,
+    signature TEXT NOT NULL,
+    level REAL NOT NULL,
+    template TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    first_seen INTEGER,
+    last_seen INTEGER
+);
+CREATE INDEX IF NOT EXISTS signatures_by_signature ON signatures (signature, first_seen);
+CREATE INDEX IF NOT EXISTS signatures_by_time ON signatures (first_seen);
+CREATE TABLE IF NOT EXISTS buckets (
+    dump_id INTEGER NOT NULL REFERENCES dumps(id) ON DELETE CASCADE,
+    level REAL NOT NULL,
+    start INTEGER NOT NULL,
+    count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS buckets_by_time ON buckets (start, level);
+"""
+
+def signature_of(form: str) -> str:
+    """Returns the stable id of a masked log message (see clustering.TemplateMiner.forms)."""
+    return hashlib.sha1(form.encode('utf-8')).hexdigest()[:16]
+
+def directory_digest(dump_path: Path) -> str:
+    """Identifies a dump directory by its files' names, sizes and modification times (without reading them)."""
+    digest = hashlib.sha256(str(Path(dump_path).resolve()).encode('utf-8'))
+    for path in sorted(Path(dump_path).iterdir()):
+        if path.is_file():
+            stat = path.stat()
+            digest.update(f"\0{path.name}\0{stat.st_size}\0{stat.st_mtime_ns}".encode('utf-8'))
+    return digest.hexdigest()
+
+def _time_ms(time_str) -> Optional[int]:
+    parsed = parse_time_ms(time_str) if time_str else None
+    return parsed[0] if parsed else None
+
+def _batches(rows: Iterable[tuple], size: int = INSERT_BATCH_SIZE):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+class DumpStore:
+    """
+    Local SQLite store of analyzed dumps, for trend queries across dumps.
+
+    Each recorded dump keeps its metadata and statistics, its error
+    signatures per level (one per masked message, with its template as
+    display text) and its entry counts per level and hour. Indexes on
+    signature and time serve the trend queries straight from the store.
+    Connections are opened per call, so any thread or Gunicorn worker can
+    use the same database file; SQLite serializes the writers.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as db:
+            db.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=30)
+        db.row_factory = sqlite3.Row
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('PRAGMA foreign_keys=ON')
+        return db
+
+    def record(self, digest: str, outputs: dict, name: Optional[str] = None) -> int:
+        """
+        Stores an analyzed dump, unless a dump with the same digest is stored already.
+
+        Args:
+            digest: Identity of the dump (the upload's SHA-256, or a
+                directory_digest)
+            outputs: pipeline.run_sections outputs; the log output must be a
+                LogAggregator (snapshots lack the per-level aggregates)
+            name: Display name of the dump
+
+        Returns:
+            The id of the stored dump
+        """
+        statistics = outputs.get('statistics') or []
+        version = next((item['Value'] for item in statistics if item['Statistic'] == 'Version'), None)
+        log_index = outputs.get('logs')
+        levels = log_index.level_aggregates() if log_index is not None else []
+
+        with closing(self._connect()) as db:
+            row = db.execute('SELECT id FROM dumps WHERE digest = ?', (digest,)).fetchone()
+            if row is not None:
+                return row['id']
+            try:
+                with db:  # one transaction per dump
+                    dump_id = self._insert(db, digest, name, version, statistics, levels)
+            except sqlite3.IntegrityError:
+                # Another worker stored the same dump in the meantime.
+                return db.execute('SELECT id FROM dumps WHERE digest = ?', (digest,)).fetchone()['id']
+        logging.info(f"Stored dump {digest[:12]} as #{dump_id} in {self.path}")
+        return dump_id
+
+    def _insert(self, db, digest, name, version, statistics, levels):
+        dump_id = db.execute(
+            'INSERT INTO dumps (digest, name, version, analyzed_at, entry_count) VALUES (?, ?, ?, ?, ?)',
+            (digest, name, version, time.time(), sum(count for _, count, _, _ in levels))
+        ).lastrowid
+        db.executemany(
+            'INSERT OR REPLACE INTO dump_stats (dump_id, name, value) VALUES (?, ?, ?)',
+            [(dump_id, item['Statistic'], item['Value']) for item in statistics]
+        )
+        signature_rows = (
+            (dump_id, signature_of(row['Form']), level, row['Message'], row['Count'], _time_ms(row['FirstSeen']), _time_ms(row['LastSeen']))
+            for level, _, forms, _ in levels for row in forms
+        )
+        for batch in _batches(signature_rows):
+            db.executemany('INSERT INTO signatures VALUES (?, ?, ?, ?, ?, ?, ?)', batch)
+        for batch in _batches(self._bucket_rows(dump_id, levels)):
+            db.executemany('INSERT INTO buckets VALUES (?, ?, ?, ?)', batch)
+        return dump_id
+
+    @staticmethod
+    def _bucket_rows(dump_id, levels):
+        for level, _, _, minutes in levels:
+            buckets = {}
+            for minute, count in minutes.items():
+                start = minute * 60000 // BUCKET_MS * BUCKET_MS
+                buckets[start] = buckets.get(start, 0) + count
+            for start, count in sorted(buckets.items()):
+                yield dump_id, level, start, count
+
+    def dumps(self) -> List[dict]:
+        """Lists the stored dumps, most recently analyzed first."""
+        with closing(self._connect()) as db:
+            rows = db.execute('SELECT id, digest, name, version, analyzed_at, entry_count FROM dumps ORDER BY analyzed_at DESC').fetchall()
+        return [dict(row) for row in rows]
+
+    def signatures(self, search: Optional[str] = None, min_level: Optional[float] = None, limit: int = 50) -> List[dict]:
+        """
+        Summarizes error signatures across all stored dumps.
+
+        Args:
+            search: Only templates containing this text (case-insensitive)
+            min_level: Only signatures logged at or above this level
+            limit: Maximum number of signatures
+
+        Returns:
+            One dict per signature with its 'template', the number of 'dumps'
+            and entries ('total') it appeared in, and when it was 'first_seen'
+            and 'last_seen' (epoch milliseconds), earliest first
+        """
+        clauses, params = [], []
+        if search:
+            clauses.append("template LIKE ? ESCAPE '\\'")
+            params.append('%' + search.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%')
+        if min_level is not None:
+            clauses.append('level >= ?')
+            params.append(min_level)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        with closing(self._connect()) as db:
+            rows = db.execute(
+                f"""SELECT signature, MIN(template) AS template, COUNT(DISTINCT dump_id) AS dumps, SUM(count) AS total,
+                           MIN(first_seen) AS first_seen, MAX(last_seen) AS last_seen
+                    FROM signatures {where}
+                    GROUP BY signature ORDER BY first_seen IS NULL, first_seen LIMIT ?""",
+                (*params, limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def signature_history(self, signature: str) -> List[dict]:
+        """Returns the occurrences of one signature per dump, earliest first."""
+        with closing(self._connect()) as db:
+            rows = db.execute(
+                """SELECT d.id AS dump_id, d.name, d.version, s.level, s.count, s.first_seen, s.last_seen
+                   FROM signatures s JOIN dumps d ON d.id = s.dump_id
+                   WHERE s.signature = ? ORDER BY s.first_seen IS NULL, s.first_seen""",
+                (signature,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def timeline(self, min_level: Optional[float] = None, since: Optional[int] = None, until: Optional[int] = None,
+                 resolution: str = 'day') -> List[dict]:
+        """
+        Returns entry counts per time bucket summed over all stored dumps.
+
+        Args:
+            min_level: Only entries at or above this level
+            since: Only buckets starting at or after this epoch millisecond
+            until: Only buckets starting before this epoch millisecond
+            resolution: 'hour' or 'day' (UTC)
+
+        Returns:
+            List of {'start': epoch milliseconds, 'count', 'dumps'} dicts in time order
+
+        Raises:
+            ValueError: If the resolution is unknown
+        """
+        if resolution not in TREND_RESOLUTIONS:
+            raise ValueError(f"Unknown resolution '{resolution}', expected one of {', '.join(TREND_RESOLUTIONS)}")
+        width = TREND_RESOLUTIONS[resolution]
+        clauses, params = [], [width, width]
+        for clause, value in (('level >= ?', min_level), ('start >= ?', since), ('start < ?', until)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        with closing(self._connect()) as db:
+            rows = db.execute(
+                f"""SELECT start / ? * ? AS start, SUM(count) AS count, COUNT(DISTINCT dump_id) AS dumps
+                    FROM buckets {where} GROUP BY 1 ORDER BY 1""",
+                params
+            ).fetchall()
+        return [dict(row) for row in rows]
@@ -0,0 +1,280 @@
+# entry_index.py
+import bisect
+import json
+import logging
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from timestamps import NO_TIME, TimestampParser
+from search_index import SearchIndex, SearchIndexWriter
+from timeline import build_timeline
+
+# Stored in the pid column for entries without an integer pid.
+NO_PID = -1
+# Filtered orderings kept per open index, so paging through one view is a bisect.
+VIEW_CACHE_SIZE = 8
+# Indexes kept open by open_index.
+OPEN_INDEX_CACHE_SIZE = 4
+# Largest page returned by EntryIndex.query.
+MAX_PAGE_SIZE = 500
+
+ORDERS = ('asc', 'desc')
+
+class EntryIndexWriter:
+    """
+    Writes every log entry of an analysis to a compact on-disk index.
+
+    Entries are appended as compact JSON lines to ``entries.jsonl``; alongside
+    it, typed arrays hold each entry's byte offset, level, epoch-millisecond
+    time, pid and host id, which is all EntryIndex needs to filter and sort
+    without decoding entries. Only entries with a numeric level are indexed,
+    as in analyzer.LogAggregator. Their message text also goes into a
+    search_index.SearchIndexWriter for full-text queries.
+    """
+
+    ENTRIES_NAME = 'entries.jsonl'
+    META_NAME = 'meta.json'
+    COLUMNS = {'offsets': 'q', 'levels': 'd', 'times': 'q', 'pids': 'q', 'hosts': 'l'}
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.columns = {name: array(typecode) for name, typecode in self.COLUMNS.items()}
+        self.host_names = []
+        self._host_ids = {}
+        self._parser = TimestampParser()
+        self.search = SearchIndexWriter(self.root)
+        self._file = open(self.root / self.ENTRIES_NAME, 'wb')
+        self._offset = 0
+
+    def add(self, entry) -> None:
+        if not isinstance(entry, dict):
+            return
+        level = entry.get('level')
+        if not isinstance(level, (int, float)):
+            return
+        line = json.dumps(entry, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8') + b'\n'
+        self._file.write(line)
+
+        time_str = entry.get('time')
+        parsed = self._parser.parse(time_str) if time_str else None
+        pid = entry.get('pid')
+        host = entry.get('hostname')
+        host = host if isinstance(host, str) else ''
+        host_id = self._host_ids.get(host)
+        if host_id is None:
+            host_id = self._host_ids[host] = len(self.host_names)
+            self.host_names.append(host)
+
+        columns = self.columns
+        self.search.add(len(columns['offsets']), entry)
+        columns['offsets'].append(self._offset)
+        columns['levels'].append(level)
+        columns['times'].append(parsed[0] if parsed else NO_TIME)
+        columns['pids'].append(pid if type(pid) is int and 0 <= pid < 2 ** 63 else NO_PID)
+        columns['hosts'].append(host_id)
+        self._offset += len(line)
+
+    def close(self) -> None:
+        """Flushes the entries and writes the column files and metadata."""
+        self._file.close()
+        for name, column in self.columns.items():
+            with open(self.root / f'{name}.bin', 'wb') as f:
+                column.tofile(f)
+        self.search.close()
+        meta = {'count': len(self.columns['offsets']), 'hosts': self.host_names}
+        tmp_path = self.root / f'.{self.META_NAME}.{os.getpid()}'
+        tmp_path.write_text(json.dumps(meta), encoding='utf-8')
+        # The metadata is written last; its presence marks a complete index.
+        os.replace(tmp_path, self.root / self.META_NAME)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+
+def build_index(entries, root: Path) -> int:
+    """Writes an index for an iterable of decoded log entries. Returns the number indexed."""
+    with EntryIndexWriter(root) as writer:
+        for entry in entries:
+            writer.add(entry)
+    return len(writer.columns['offsets'])
+
+def parse_cursor(cursor: str):
+    """Decodes a pagination cursor ('<time>_<position>'); raises ValueError if malformed."""
+    time_ms, position = cursor.split('_')
+    return int(time_ms), int(position)
+
+class EntryIndex:
+    """
+    Read side of an EntryIndexWriter index: filtered, sorted, cursor-paged queries.
+
+    A query's matching entries are ordered by (time, position) once and kept
+    in a small cache, so fetching the following pages of the same view only
+    bisects to the cursor and reads the page's lines from ``entries.jsonl``.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        meta = json.loads((self.root / EntryIndexWriter.META_NAME).read_text(encoding='utf-8'))
+        self.count = meta['count']
+        self.host_names = meta['hosts']
+        self.columns = {}
+        for name, typecode in EntryIndexWriter.COLUMNS.items():
+            column = array(typecode)
+            with open(self.root / f'{name}.bin', 'rb') as f:
+                column.fromfile(f, self.count)
+            self.columns[name] = column
+        self.search = SearchIndex(self.root)
+        self._views = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def exists(root: Path) -> bool:
+        return (Path(root) / EntryIndexWriter.META_NAME).is_file()
+
+    def _matching(self, q, min_level, level, host, pid, since, until):
+        levels, times, pids, hosts = (self.columns[name] for name in ('levels', 'times', 'pids', 'hosts'))
+        positions = self.search.search(q) if q else range(self.count)
+        if min_level is not None:
+            positions = [p for p in positions if levels[p] >= min_level]
+        if level is not None:
+            positions = [p for p in positions if levels[p] == level]
+        if host is not None:
+            host_id = self.host_names.index(host) if host in self.host_names else -1
+            positions = [p for p in positions if hosts[p] == host_id]
+        if pid is not None:
+            positions = [p for p in positions if pids[p] == pid]
+        if since is not None:
+            positions = [p for p in positions if times[p] != NO_TIME and times[p] >= since]
+        if until is not None:
+            positions = [p for p in positions if times[p] != NO_TIME and times[p] < until]
+        return positions
+
+    def _view(self, q, min_level, level, host, pid, since, until):
+        """Positions of the matching entries, sorted by (time, position)."""
+        key = (q, min_level, level, host, pid, since, until)
+        with self._lock:
+            view = self._views.get(key)
+            if view is not None:
+                self._views.move_to_end(key)
+                return view
+        times = self.columns['times']
+        view = sorted(self._matching(q, min_level, level, host, pid, since, until), key=lambda p: (times[p], p))
+        with self._lock:
+            self._views[key] = view
+            while len(self._views) > VIEW_CACHE_SIZE:
+                self._views.popitem(last=False)
+        return view
+
+    def _read(self, positions):
+        offsets = self.columns['offsets']
+        entries = []
+        with open(self.root / EntryIndexWriter.ENTRIES_NAME, 'rb') as f:
+            for p in positions:
+                f.seek(offsets[p])
+                entries.append(json.loads(f.readline()))
+        return entries
+
+    def query(self, q: Optional[str] = None, min_level: Optional[float] = None, level: Optional[float] = None,
+              host: Optional[str] = None, pid: Optional[int] = None,
+              since: Optional[int] = None, until: Optional[int] = None, order: str = 'asc',
+              cursor: Optional[str] = None, limit: int = 50) -> dict:
+        """
+        Returns one page of matching entries.
+
+        Args:
+            q: Only entries whose text matches this search query (see
+                search_index.parse_query)
+            min_level: Only entries at or above this level
+            level: Only entries of exactly this level
+            host: Only entries from this hostname
+            pid: Only entries from this pid
+            since: Only entries at or after this epoch millisecond
+            until: Only entries before this epoch millisecond
+            order: 'asc' (oldest first) or 'desc'; entries without a time
+                sort before all others
+            cursor: 'next_cursor' of the previous page, None for the first
+            limit: Page size (capped at MAX_PAGE_SIZE)
+
+        Returns:
+            Dict with the page's 'entries', the 'total' number of matches,
+            the 'next_cursor' (None on the last page) and the prefixes of
+            ``q`` that were 'truncated' (see SearchIndex.truncated)
+
+        Raises:
+            ValueError: If ``order``, ``cursor`` or ``q`` is invalid
+        """
+        if order not in ORDERS:
+            raise ValueError(f"Unknown order '{order}', expected one of {', '.join(ORDERS)}")
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        view = self._view(q, min_level, level, host, pid, since, until)
+        times = self.columns['times']
+        sort_key = lambda p: (times[p], p)
+
+        if order == 'asc':
+            start = bisect.bisect_right(view, parse_cursor(cursor), key=sort_key) if cursor else 0
+            page = view[start:start + limit]
+            more = start + limit < len(view)
+        else:
+            end = bisect.bisect_left(view, parse_cursor(cursor), key=sort_key) if cursor else len(view)
+            page = view[max(0, end - limit):end][::-1]
+            more = end - limit > 0
+        next_cursor = None
+        if more and page:
+            last = page[-1]
+            next_cursor = f"{times[last]}_{last}"
+        truncated = self.search.truncated(q) if q else []
+        return {'entries': self._read(page), 'total': len(view), 'next_cursor': next_cursor, 'truncated': truncated}
+
+    def timeline(self, max_points: int, q: Optional[str] = None, min_level: Optional[float] = None, level: Optional[float] = None,
+                 host: Optional[str] = None, pid: Optional[int] = None, since: Optional[int] = None,
+                 until: Optional[int] = None) -> dict:
+        """
+        Counts the matching entries per time bucket.
+
+        Takes the filters of query() and returns timeline.build_timeline data
+        for at most ``max_points`` buckets, labelled in UTC.
+        """
+        times = self.columns['times']
+        minutes = {}
+        for p in self._view(q, min_level, level, host, pid, since, until):
+            if times[p] != NO_TIME:
+                minute = times[p] // 60000
+                minutes[minute] = minutes.get(minute, 0) + 1
+        return build_timeline([(minute, count, None) for minute, count in sorted(minutes.items())], max_points)
+
+_open_indexes = OrderedDict()
+_open_lock = threading.Lock()
+
+def open_index(root: Path) -> Optional[EntryIndex]:
+    """Returns the index at ``root``, reusing recently opened ones; None if there is no complete index."""
+    root = Path(root)
+    try:
+        stamp = (root / EntryIndexWriter.META_NAME).stat().st_mtime_ns
+    except OSError:
+        return None
+    key = (str(root), stamp)
+    with _open_lock:
+        index = _open_indexes.get(key)
+        if index is not None:
+            _open_indexes.move_to_end(key)
+            return index
+    try:
+        index = EntryIndex(root)
+    except (OSError, ValueError, EOFError, KeyError) as e:
+        logging.warning(f"Could not open entry index at '{root}': {e}")
+        return None
+    with _open_lock:
+        _open_indexes[key] = index
+        while len(_open_indexes) > OPEN_INDEX_CACHE_SIZE:
+            _open_indexes.popitem(last=False)
+    return index
@@ -0,0 +1,225 @@
+# jobs.py
+import json
+import logging
+import os
+import re
+import shutil
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from utils import ValidationError
+
+# Job lifecycle states reported by the status endpoint.
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+_JOB_ID = re.compile(r'^[0-9a-f]{32}$')
+# Error recorded for a job whose owning process went away before finishing it.
+INTERRUPTED_ERROR = 'Analysis interrupted because its worker restarted. Please upload the dump again.'
+
+def _pid_alive(pid: int) -> bool:
+    """Whether a process with this id exists on this host."""
+    if os.name == 'nt':
+        # os.kill would terminate the process on Windows; rely on the heartbeat.
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True  # exists, owned by another user
+    return True
+
+class JobStore:
+    """
+    On-disk job state, one directory per job.
+
+    Status lives in a small JSON file rather than in memory so that any
+    Gunicorn worker can answer a status poll or serve the finished report,
+    whichever worker happened to run the job. Every write stamps the writing
+    process and a heartbeat; a queued or running job whose process is gone,
+    or whose heartbeat is older than ``heartbeat_timeout`` seconds, is marked
+    failed when its status is next read.
+    """
+
+    UPLOAD_NAME = 'upload.zip'
+    STATUS_NAME = 'status.json'
+    REPORT_NAME = 'report.html'
+    ENTRIES_NAME = 'entries'
+
+    def __init__(self, root: Path, heartbeat_timeout: float = 120):
+        self.root = Path(root)
+        self.heartbeat_timeout = heartbeat_timeout
+
+    def job_dir(self, job_id: str) -> Optional[Path]:
+        """Returns the directory of a job, or None for malformed ids."""
+        if not isinstance(job_id, str) or not _JOB_ID.match(job_id):
+            return None
+        return self.root / job_id
+
+    def create(self) -> str:
+        """Creates an empty job directory and returns the new job id."""
+        job_id = uuid.uuid4().hex
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.job_dir(job_id).mkdir()
+        return job_id
+
+    def upload_path(self, job_id: str) -> Path:
+        return self.job_dir(job_id) / self.UPLOAD_NAME
+
+    def report_path(self, job_id: str) -> Path:
+        return self.job_dir(job_id) / self.REPORT_NAME
+
+    def entries_path(self, job_id: str) -> Path:
+        """Directory of the job's entry index (see entry_index.EntryIndexWriter)."""
+        return self.job_dir(job_id) / self.ENTRIES_NAME
+
+    def write_status(self, job_id: str, status: str, **fields) -> dict:
+        """Atomically replaces the status file of a job."""
+        job_dir = self.job_dir(job_id)
+        previous = self._load_status(job_id) or {'id': job_id, 'created': time.time()}
+        now = time.time()
+        data = {**previous, **fields, 'status': status, 'updated': now,
+                'pid': os.getpid(), 'host': socket.gethostname(), 'heartbeat': now}
+        tmp_path = job_dir / f'.{self.STATUS_NAME}.{os.getpid()}.{threading.get_ident()}'
+        tmp_path.write_text(json.dumps(data), encoding='utf-8')
+        os.replace(tmp_path, job_dir / self.STATUS_NAME)
+        return data
+
+    def _load_status(self, job_id: str) -> Optional[dict]:
+        job_dir = self.job_dir(job_id)
+        if job_dir is None:
+            return None
+        try:
+            return json.loads((job_dir / self.STATUS_NAME).read_text(encoding='utf-8'))
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def is_orphaned(self, status: dict) -> bool:
+        """Whether a queued or running job has lost the process that owns it."""
+        if status.get('status') not in (QUEUED, RUNNING):
+            return False
+        if 'pid' in status and status.get('host') == socket.gethostname() and not _pid_alive(status['pid']):
+            return True
+        heartbeat = status.get('heartbeat', status.get('updated', 0))
+        return heartbeat < time.time() - self.heartbeat_timeout
+
+    def read_status(self, job_id: str) -> Optional[dict]:
+        """Returns the status of a job, or None if it does not exist; orphaned jobs come back failed."""
+        status = self._load_status(job_id)
+        if status is not None and self.is_orphaned(status):
+            logging.warning(f"Analysis job {job_id} lost its worker (pid {status.get('pid')}); marking it failed")
+            status = self.write_status(job_id, FAILED, error=INTERRUPTED_ERROR, finished=time.time())
+        return status
+
+    def sweep(self, max_age: float) -> int:
+        """Deletes finished jobs last updated more than ``max_age`` seconds ago. Returns the count."""
+        if not self.root.is_dir():
+            return 0
+        removed = 0
+        cutoff = time.time() - max_age
+        for job_dir in self.root.iterdir():
+            if not _JOB_ID.match(job_dir.name):
+                continue
+            status = self.read_status(job_dir.name)
+            if status and status['status'] in (QUEUED, RUNNING):
+                continue
+            updated = status['updated'] if status else job_dir.stat().st_mtime
+            if updated < cutoff:
+                shutil.rmtree(job_dir, ignore_errors=True)
+                removed += 1
+        return removed
+
+class JobManager:
+    """
+    Runs analysis jobs on a local thread pool and records their progress in a JobStore.
+
+    The pool is created lazily in the process that first submits a job, so it
+    is never inherited across Gunicorn's fork of a preloaded app. A daemon
+    thread next to it rewrites the status of every queued or running job
+    several times per heartbeat timeout, so other workers can tell these jobs
+    from those orphaned by a restart.
+    """
+
+    def __init__(self, store: JobStore, max_workers: int = 2, max_age: float = 3600):
+        self.store = store
+        self.max_workers = max_workers
+        self.max_age = max_age
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._status_lock = threading.Lock()
+        self._active = {}  # job id -> status, for the jobs this process owns
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='analysis-job')
+                self._pid = os.getpid()
+                self._active = {}
+                threading.Thread(target=self._heartbeat, name='analysis-job-heartbeat', daemon=True).start()
+            return self._executor
+
+    def _set_status(self, job_id: str, status: str, **fields) -> dict:
+        # Serialized with the heartbeat so a beat never rewrites a finished job as running.
+        with self._status_lock:
+            if status in (QUEUED, RUNNING):
+                self._active[job_id] = status
+            else:
+                self._active.pop(job_id, None)
+            return self.store.write_status(job_id, status, **fields)
+
+    def _heartbeat(self) -> None:
+        interval = max(self.store.heartbeat_timeout / 4, 0.05)
+        while True:
+            time.sleep(interval)
+            with self._status_lock:
+                for job_id, status in list(self._active.items()):
+                    try:
+                        self.store.write_status(job_id, status)
+                    except OSError as e:
+                        logging.warning(f"Heartbeat of analysis job {job_id} failed: {e}")
+
+    def submit(self, job_id: str, func: Callable[[Path], Iterable[str]], **metadata) -> dict:
+        """
+        Queues ``func(upload_path)`` for a job whose upload is already stored.
+
+        ``func`` returns the rendered report as a string or an iterable of
+        chunks; a ValidationError marks the job failed with its message, any
+        other exception with a generic one.
+        """
+        self.store.sweep(self.max_age)
+        executor = self._get_executor()
+        status = self._set_status(job_id, QUEUED, **metadata)
+        executor.submit(self._run, job_id, func)
+        return status
+
+    def _run(self, job_id: str, func: Callable[[Path], Iterable[str]]) -> None:
+        started = time.time()
+        self._set_status(job_id, RUNNING, started=started)
+        try:
+            html_report = func(self.store.upload_path(job_id))
+            if isinstance(html_report, str):
+                html_report = (html_report,)
+            with open(self.store.report_path(job_id), 'w', encoding='utf-8') as f:
+                for chunk in html_report:
+                    f.write(chunk)
+        except ValidationError as e:
+            self._set_status(job_id, FAILED, error=str(e), finished=time.time())
+        except Exception as e:
+            logging.exception(f"Analysis job {job_id} failed: {e}")
+            self._set_status(job_id, FAILED, error='Analysis failed unexpectedly.', finished=time.time())
+        else:
+            finished = time.time()
+            logging.info(f"Analysis job {job_id} finished in {finished - started:.2f}s")
+            self._set_status(job_id, DONE, finished=finished)
+        finally:
+            # The report is all that is needed once the job has run.
+            try:
+                self.store.upload_path(job_id).unlink()
+            except OSError:
+                pass
@@ -0,0 +1,64 @@
+# json_backend.py
+import json
+from pathlib import Path
+
+try:
+    import orjson
+except ImportError:  # optional: the standard library decodes the same values, only slower
+    orjson = None
+
+def _stdlib_loads(data):
+    # json.loads sniffs the encoding of bytes in Python, which costs more than the
+    # decode; the 'utf-8-sig' codec is slow too, so a byte order mark is dropped here.
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode('utf-8')
+        if data.startswith('\ufeff'):
+            data = data[1:]
+    return json.loads(data)
+
+def _orjson_loads(data):
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        # NaN, integers beyond 64 bits, lone surrogates and byte order marks
+        # are accepted by the standard library, which also raises the errors.
+        return json.loads(data)
+
+# JSON decoders by name. All accept UTF-8 bytes or str and give the same
+# results; they differ only in speed.
+BACKENDS = {'json': _stdlib_loads}
+if orjson is not None:
+    BACKENDS['orjson'] = _orjson_loads
+# The fastest backend installed.
+DEFAULT_BACKEND = 'orjson' if orjson is not None else 'json'
+
+backend = DEFAULT_BACKEND
+loads = BACKENDS[DEFAULT_BACKEND]
+
+def use_backend(name: str) -> None:
+    """Switches every later loads call to the named backend."""
+    global backend, loads
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown JSON backend '{name}', expected one of {', '.join(BACKENDS)}")
+    backend = name
+    loads = BACKENDS[name]
+
+def load_file(file_path):
+    """Decodes a whole JSON file from its raw bytes (``file_path`` may be a Path or a zip_dump.ZipMember)."""
+    with file_path.open('rb') as f:
+        return loads(f.read())
+
+def dump_bytes(obj, indent: bool = False) -> bytes:
+    """
+    Encodes ``obj`` as UTF-8 JSON with the standard library, whichever backend
+    decodes: orjson formats floats differently (1e16 rather than 1e+16), so
+    written results would otherwise depend on an optional package.
+    """
+    if indent:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def dump_file(obj, file_path: Path, indent: bool = True) -> None:
+    """Writes ``obj`` as UTF-8 JSON, indented by two spaces unless ``indent`` is false."""
+    with open(file_path, 'wb') as f:
+        f.write(dump_bytes(obj, indent))
@@ -0,0 +1,172 @@
+# knowledge_base.py
+import hashlib
+import json
+import logging
+import re
+import threading
+from pathlib import Path
+
+KNOWLEDGE_BASE_PATH = Path(__file__).resolve().parent / 'knowledge_base.json'
+
+# Upper bound on the number of distinct messages whose match results are memoized.
+MATCH_CACHE_SIZE = 50000
+
+# Leading global inline flags, e.g. the "(?i)" most knowledge base patterns start with.
+_LEADING_FLAGS = re.compile(r'^\(\?([aiLmsux]+)\)')
+# Backreferences depend on group numbering, which changes once patterns are combined.
+_BACKREFERENCE = re.compile(r'\\[1-9]|\(\?P=')
+
+def _scope_pattern(pattern):
+    """Rewrites a pattern so it can be embedded in a larger alternation."""
+    match = _LEADING_FLAGS.match(pattern)
+    if match:
+        return f"(?{match.group(1)}:{pattern[match.end():]})"
+    return f"(?:{pattern})"
+
+class KnowledgeBaseMatcher:
+    """
+    Matches log messages against the knowledge base patterns.
+
+    All patterns are compiled once and combined into a single alternation used
+    as a prefilter: the vast majority of messages match nothing, and for those
+    one scan replaces a ``re.search`` per pattern. Results are memoized per
+    distinct message, so repeated messages cost a dictionary lookup.
+    """
+
+    def __init__(self, knowledge_base, cache_size=MATCH_CACHE_SIZE):
+        self.entries = []
+        self._patterns = []
+        for kb_entry in knowledge_base or []:
+            try:
+                self._patterns.append(re.compile(kb_entry['pattern']))
+                self.entries.append(kb_entry)
+            except (KeyError, TypeError, re.error) as e:
+                logging.warning(f"Skipping invalid knowledge base entry {kb_entry.get('title') if isinstance(kb_entry, dict) else kb_entry!r}: {e}")
+
+        self.title_count = len({kb_entry.get('title') for kb_entry in self.entries})
+        self._cache = {}
+        self._cache_size = cache_size
+
+        # Patterns using backreferences cannot be combined and are always checked.
+        self._unfiltered = [i for i, p in enumerate(self._patterns) if _BACKREFERENCE.search(p.pattern)]
+        combinable = [p.pattern for i, p in enumerate(self._patterns) if i not in self._unfiltered]
+        self._prefilter = None
+        if combinable:
+            try:
+                self._prefilter = re.compile('|'.join(_scope_pattern(p) for p in combinable))
+            except re.error as e:
+                logging.warning(f"Could not combine knowledge base patterns, matching them one by one: {e}")
+                self._unfiltered = list(range(len(self._patterns)))
+
+    def _match_uncached(self, msg):
+        if self._prefilter is not None and self._prefilter.search(msg):
+            return tuple(self.entries[i] for i, p in enumerate(self._patterns) if p.search(msg))
+        return tuple(self.entries[i] for i in self._unfiltered if self._patterns[i].search(msg))
+
+    def match(self, msg):
+        """Returns the knowledge base entries whose pattern matches ``msg``, in file order."""
+        if not isinstance(msg, str):
+            return ()
+        matches = self._cache.get(msg)
+        if matches is None:
+            matches = self._match_uncached(msg)
+            if len(self._cache) >= self._cache_size:
+                self._cache.clear()
+            self._cache[msg] = matches
+        return matches
+
+def validate_knowledge_base(data):
+    """
+    Validates parsed knowledge base content.
+
+    Args:
+        data: Decoded knowledge_base.json content
+
+    Returns:
+        The list of usable entries (dicts with string ``pattern`` and ``title``)
+
+    Raises:
+        ValueError: If the content is not a list of entries
+    """
+    if not isinstance(data, list):
+        raise ValueError(f"expected a list of entries, got {type(data).__name__}")
+    valid = []
+    for position, kb_entry in enumerate(data):
+        if not isinstance(kb_entry, dict) or not isinstance(kb_entry.get('pattern'), str) or not isinstance(kb_entry.get('title'), str):
+            logging.warning(f"Skipping knowledge base entry #{position}: 'pattern' and 'title' must be strings.")
+            continue
+        valid.append(kb_entry)
+    return valid
+
+_NOT_LOADED = object()
+
+class KnowledgeBaseRegistry:
+    """
+    Process-wide cache of the compiled knowledge base.
+
+    The file is read, validated and compiled once. Later lookups only ``stat``
+    the file and reload when its mtime or size changes *and* its content hash
+    differs, so an unchanged knowledge base is never re-parsed. With Gunicorn's
+    ``preload_app`` the compiled copy is built in the master and shared by the
+    forked workers.
+    """
+
+    def __init__(self, path=KNOWLEDGE_BASE_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._stat_key = _NOT_LOADED
+        self._digest = None
+        self._matcher = KnowledgeBaseMatcher([])
+
+    def _stat(self):
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _reload(self, stat_key):
+        try:
+            raw = self.path.read_bytes()
+        except OSError as e:
+            logging.warning(f"Knowledge base not found at {self.path}: {e}")
+            self._stat_key, self._digest, self._matcher = stat_key, None, KnowledgeBaseMatcher([])
+            return
+        digest = hashlib.sha256(raw).hexdigest()
+        self._stat_key = stat_key
+        if digest == self._digest:
+            return
+        try:
+            entries = validate_knowledge_base(json.loads(raw))
+        except (ValueError, UnicodeDecodeError) as e:
+            # Keep serving the last good copy rather than dropping every recommendation.
+            logging.warning(f"Knowledge base at {self.path} is invalid, keeping version {self.version}: {e}")
+            return
+        self._matcher = KnowledgeBaseMatcher(entries)
+        self._digest = digest
+        logging.info(f"Loaded knowledge base {self.path.name} version {self.version} ({len(entries)} entries).")
+
+    def get(self):
+        """Returns the current KnowledgeBaseMatcher, reloading the file if it changed."""
+        stat_key = self._stat()
+        if stat_key != self._stat_key:
+            with self._lock:
+                if stat_key != self._stat_key:
+                    self._reload(stat_key)
+        return self._matcher
+
+    @property
+    def version(self):
+        """Short content hash identifying the loaded knowledge base ('none' if empty)."""
+        return self._digest[:12] if self._digest else 'none'
+
+registry = KnowledgeBaseRegistry()
+
+def get_matcher():
+    """Returns the process-wide matcher for the bundled knowledge base."""
+    return registry.get()
+
+def get_version():
+    """Returns the version id of the process-wide knowledge base."""
+    registry.get()
+    return registry.version
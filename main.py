@@ -3,86 +3,160 @@ import argparse
 import webbrowser
 import logging
 import json
-from datetime import datetime
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime, timezone
 from pathlib import Path
 import analyzer
+import batch
+import json_backend
+import dump_diff
+import metrics
+import pipeline
+import search_index
+from dump_store import DumpStore, directory_digest
+from entry_index import EntryIndex
+from retention import DEFAULT_RETENTION, RETENTION_STRATEGIES
 import reporter
+from config import Config
+from utils import LOG_LEVEL_NAMES
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def find_file(directory: Path, pattern: str):
-    """Finds the first file in a directory that matches a pattern."""
-    try:
-        return next(directory.glob(f'*{pattern}'))
-    except StopIteration:
-        return None
+# Time buckets listed for each --search query.
+SEARCH_TIMELINE_POINTS = 24
 
-def main():
-    parser = argparse.ArgumentParser(description="Analyze Rocket.Chat support dumps.")
-    parser.add_argument("dump_path", type=Path, help="Path to the support dump directory.")
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    # --batch and --compare hand the remaining arguments to their own parsers.
+    modes = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    mode = modes.add_mutually_exclusive_group()
+    mode.add_argument("--batch", action="store_true", help="Analyze many dumps in parallel; see 'main.py --batch --help'.")
+    mode.add_argument("--compare", action="store_true", help="Show what changed between dumps, oldest first; see 'main.py --compare --help'.")
+    chosen, rest = modes.parse_known_args(argv)
+    if chosen.batch:
+        return batch.main(rest)
+    if chosen.compare:
+        return dump_diff.main(rest)
+
+    parser = argparse.ArgumentParser(
+        description="Analyze Rocket.Chat support dumps.",
+        epilog="Use 'main.py --batch PATH...' to analyze many dumps in parallel, "
+               "'main.py --compare OLD NEW...' to see what changed between dumps.",
+        parents=[modes]
+    )
+    parser.add_argument("dump_path", type=Path, nargs='?', help="Path to the support dump directory (optional with --trend).")
     parser.add_argument("--output-dir", type=Path, default=Path(__file__).parent / 'reports', help="Directory for output reports.")
     parser.add_argument("--log-level", type=int, default=50, help="Minimum log level to report (e.g., 30 for WARNING, 40 for ERROR).")
     parser.add_argument("--json-output", action="store_true", help="Output a JSON file with the raw analysis results.")
     parser.add_argument("--no-browser", action="store_true", help="Do not open the report in a browser.")
-    args = parser.parse_args()
+    parser.add_argument("--executor", choices=pipeline.EXECUTORS, default='thread', help="How report sections are analyzed concurrently (default: thread).")
+    parser.add_argument("--workers", type=int, default=None, help="Number of workers for the section analysis pool.")
+    parser.add_argument("--log-workers", type=int, default=1, help="Processes used to parse large NDJSON log files (default: 1, serial).")
+    parser.add_argument("--summary-max-messages", type=int, default=analyzer.SUMMARY_MAX_MESSAGES, help="Distinct log messages tracked per level before Error Summary counts become estimates (default: 20000).")
+    parser.add_argument("--summary-min-level", type=int, default=analyzer.SUMMARY_MIN_LEVEL, help="Lowest log level summarized and matched against the knowledge base when --log-level is higher; lower levels are only counted and listed (default: 30).")
+    parser.add_argument("--retention", choices=RETENTION_STRATEGIES, default=DEFAULT_RETENTION, help="Log entries kept for the report's log table: the most recent, a uniform sample, or the first and last of each error template (default: tail).")
+    parser.add_argument("--timeline-points", type=int, default=None, help="Maximum points in the timeline chart before hourly/daily buckets are used (default: 500).")
+    parser.add_argument("--search", action="append", metavar="QUERY", help="Print the log entries (of any level) matching a query: words, prefix*, \"a phrase\". Repeatable.")
+    parser.add_argument("--search-limit", type=int, default=20, help="Entries printed per search, newest first (default: 20).")
+    parser.add_argument("--store", type=Path, metavar="DB", help="SQLite dump store to add this dump to, and to read --trend from.")
+    parser.add_argument("--trend", metavar="TEXT", help="Print when error signatures containing TEXT ('' for all) appeared across the stored dumps.")
+    parser.add_argument("--profile", action="store_true", help="Log the time, entries and peak memory of each stage and write them to a .profile.json next to the report (traces memory, so runs slower).")
+    args = parser.parse_args(argv)
+
+    if args.trend is not None and not args.store:
+        parser.error("--trend requires --store")
+    if args.dump_path is None:
+        if args.trend is None:
+            parser.error("dump_path is required")
+        print_trend(DumpStore(args.store), args.trend)
+        return
 
     if not args.dump_path.is_dir():
         logging.error(f"Directory not found at '{args.dump_path}'")
         return
 
-    # Configuration for each report section
-    report_sections = {
-        'recommendations': {'pattern': 'log.json', 'title': 'Recommendations'},
-        'summary': {'pattern': 'log.json', 'headers': ['Message', 'Count', 'LastSeen'], 'title': 'Error Summary'},
-        'statistics': {'pattern': 'server-statistics.json', 'analyzer': analyzer.analyze_statistics, 'headers': ['Statistic', 'Value'], 'title': 'Server Statistics'},
-        'settings': {'pattern': 'settings.json', 'analyzer': analyzer.analyze_settings, 'headers': ['Setting', 'Value'], 'title': 'Workspace Settings'},
-        'omnichannel': {'pattern': 'omnichannel-settings.json', 'analyzer': analyzer.analyze_omnichannel, 'headers': ['Setting', 'Value'], 'title': 'Omnichannel Settings'},
-        'apps': {'pattern': 'apps-installed.json', 'analyzer': analyzer.analyze_apps, 'headers': ['Name', 'Version', 'Status'], 'title': 'Installed Apps'},
-        'logs': {'pattern': 'log.json', 'headers': ['level', 'time', 'pid', 'hostname', 'name', 'msg'], 'title': 'All Log Entries'},
-    }
-
-    logging.info("--- Finding files in dump directory ---")
-    files_found = {}
-    for key, config in report_sections.items():
-        if key == 'settings':
-            all_settings = list(args.dump_path.glob('*settings.json'))
-            file_path = next((f for f in all_settings if 'omnichannel' not in f.name.lower()), None)
-        else:
-            file_path = find_file(args.dump_path, config['pattern'])
-        files_found[key] = file_path
-        logging.info(f"{config['title']:<25} File: {file_path.name if file_path else 'Not Found'}")
-    logging.info("---------------------------------------")
+    if args.profile:
+        tracemalloc.start()
+    with metrics.tracing(trace_memory=args.profile) as trace:
+        with tempfile.TemporaryDirectory() as index_dir:
+            logging.info("--- Finding files in dump directory ---")
+            with metrics.span('analyze') as span:
+                analysis = pipeline.analyze_dump(
+                    args.dump_path, args.log_level, executor=args.executor, max_workers=args.workers, log_workers=args.log_workers,
+                    timeline_points=args.timeline_points, entry_index_dir=Path(index_dir) if args.search else None,
+                    summary_max_messages=args.summary_max_messages, retention=args.retention, summary_min_level=args.summary_min_level
+                )
+                span.bytes = sum(path.stat().st_size for path in analysis['files'].values() if path)
+            if args.search:
+                with metrics.span('search'):
+                    run_searches(Path(index_dir), args.search, args.search_limit)
+        if args.store:
+            with metrics.span('store'):
+                store = DumpStore(args.store)
+                store.record(directory_digest(args.dump_path), analysis['outputs'], args.dump_path.name)
+            if args.trend is not None:
+                print_trend(store, args.trend)
+        html_path = report(args, analysis)
+    if args.profile:
+        tracemalloc.stop()
+        write_profile(trace, html_path.with_suffix('.profile.json'))
 
-    # Analyze data and build results
-    results = {}
-    log_data = analyzer.analyze_logs(files_found['logs'], args.log_level) if files_found['logs'] else \
-               {'summary': [], 'all_errors': [], 'total_error_count': 0, 'recommendations': []}
+def print_trend(store, text):
+    """Logs the stored error signatures containing ``text``, earliest first."""
+    signatures = store.signatures(search=text or None)
+    logging.info(f"--- {len(signatures)} signatures matching '{text}' in {len(store.dumps())} stored dumps ---")
+    for row in signatures:
+        first_seen, last_seen = (datetime.fromtimestamp(row[key] / 1000, timezone.utc).strftime('%Y-%m-%d %H:%M') if row[key] is not None else 'N/A' for key in ('first_seen', 'last_seen'))
+        logging.info(f"{row['signature']}  {first_seen} .. {last_seen}  dumps={row['dumps']:<4} entries={row['total']:<7} {row['template'][:100]}")
 
-    statistics_content = analyzer.analyze_statistics(files_found['statistics']) if files_found['statistics'] else []
-    version = next((item['Value'] for item in statistics_content if item['Statistic'] == 'Version'), 'N/A')
-    logging.info(f"Detected Rocket.Chat Version: {version}")
-
-    for key, config in report_sections.items():
-        # Handle log-derived sections first
-        if key == 'recommendations':
-            results[key] = {'title': config['title'], 'content': log_data['recommendations']}
-            continue
-        if key == 'summary':
-            results[key] = {'title': config['title'], 'content': log_data['summary'], 'headers': config['headers']}
-            continue
-        if key == 'logs':
-            results[key] = {'title': config['title'], 'content': log_data['all_errors'], 'headers': config['headers'], 'total_count': log_data['total_error_count']}
+def run_searches(index_dir, queries, limit):
+    """Prints the newest entries and the hits per time bucket for each query."""
+    if not EntryIndex.exists(index_dir):
+        logging.warning("No log file to search.")
+        return
+    index = EntryIndex(index_dir)
+    for query in queries:
+        try:
+            page = index.query(q=query, order='desc', limit=limit)
+        except ValueError as e:
+            logging.error(f"Search '{query}' failed: {e}")
             continue
+        timeline = index.timeline(SEARCH_TIMELINE_POINTS, q=query)
+        logging.info(f"--- Search '{query}': {page['total']} entries ---")
+        if page['truncated']:
+            logging.warning(f"Only the first {search_index.MAX_PREFIX_TERMS} terms starting with {', '.join(page['truncated'])} were searched; use a longer prefix to see every match.")
+        for label, count in zip(timeline['labels'], timeline['data']):
+            logging.info(f"{label:<20} {count}")
+        for entry in page['entries']:
+            print(json.dumps(entry, ensure_ascii=False))
 
-        # Handle other file-based sections
-        if key == 'statistics':
-             results[key] = {'title': config['title'], 'content': statistics_content, 'headers': config['headers']}
-             continue
+def write_profile(trace, path):
+    """Logs the per-stage breakdown of a run and writes it as JSON."""
+    logging.info("--- Profile ---")
+    for span in trace.spans:
+        entries = f"{span.entries} entries" if span.entries is not None else ''
+        peak = f"peak {span.peak_bytes / 1e6:.1f} MB" if span.peak_bytes is not None else ''
+        logging.info(f"{span.name:<25} {span.seconds:8.3f}s  {entries:<16} {peak}")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'stages': trace.breakdown()}, f, indent=2)
+    logging.info(f"Profile saved to: {path}")
 
-        file_path = files_found[key]
-        content = config['analyzer'](file_path) if file_path else []
-        results[key] = {'title': config['title'], 'content': content, 'headers': config['headers']}
+def report(args, analysis):
+    """Logs the analysis summary and writes the HTML (and JSON) report; returns the HTML report's path."""
+    for key, file_path in analysis['files'].items():
+        logging.info(f"{pipeline.REPORT_SECTIONS[key]['title']:<25} File: {file_path.name if file_path else 'Not Found'}")
+    logging.info("---------------------------------------")
+    for key, seconds in analysis['timings'].items():
+        logging.info(f"{pipeline.REPORT_SECTIONS[key]['title']:<25} Analyzed in {seconds:.3f}s")
+    for key, error in analysis['errors'].items():
+        logging.error(f"{pipeline.REPORT_SECTIONS[key]['title']:<25} Failed: {error}")
+
+    results = analysis['results']
+    version = next((item['Value'] for item in results['statistics']['content'] if item['Statistic'] == 'Version'), 'N/A')
+    logging.info(f"Detected Rocket.Chat Version: {version}")
 
     # Generate Report
     timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
@@ -91,15 +165,20 @@ def main():
     # HTML Report
     output_filename_html = f"RocketChat-Analysis-Report_{timestamp}.html"
     output_path_html = args.output_dir / output_filename_html
-    generated_path = reporter.generate_report(results, output_path_html)
+    with metrics.span('render'):
+        generated_path = reporter.generate_report(
+            results,
+            output_path_html,
+            log_level_name=LOG_LEVEL_NAMES.get(args.log_level, str(args.log_level)),
+            version=Config.VERSION
+        )
     logging.info(f"HTML report saved to: {generated_path}")
 
     # Optional JSON Output
     if args.json_output:
         output_filename_json = f"RocketChat-Analysis-Report_{timestamp}.json"
         output_path_json = args.output_dir / output_filename_json
-        with open(output_path_json, 'w', encoding='utf-8') as f:
-            json.dump(results, f, indent=2, ensure_ascii=False)
+        json_backend.dump_file(results, output_path_json)
         logging.info(f"JSON output saved to: {output_path_json}")
 
     if not args.no_browser:
@@ -107,6 +186,7 @@ def main():
             webbrowser.open(output_path_html.resolve().as_uri())
         except Exception as e:
             logging.warning(f"Could not open report automatically: {e}")
+    return generated_path
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
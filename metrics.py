@@ -0,0 +1,247 @@
+# metrics.py
+import contextvars
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Histogram buckets of stage durations, in seconds.
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+# Histogram buckets of the bytes a stage processed.
+BYTES_BUCKETS = (1e3, 1e4, 1e5, 1e6, 1e7, 1e8, 1e9)
+# Content type of the Prometheus text exposition format.
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# The trace the current request or CLI run adds its spans to, if any.
+_current_trace = contextvars.ContextVar('metrics_trace', default=None)
+# Highest traced memory seen so far by each open memory-traced span, outermost first.
+_open_peaks = contextvars.ContextVar('metrics_open_peaks', default=())
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format(value: float) -> str:
+    return repr(float(value)) if value != float('inf') else '+Inf'
+
+class Histogram:
+    """A Prometheus histogram labelled by stage."""
+
+    def __init__(self, name: str, help_text: str, buckets: Iterable[float]):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets) + (float('inf'),)
+        self._series: Dict[str, list] = {}  # stage -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, value: float) -> None:
+        with self._lock:
+            series = self._series.setdefault(stage, [0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {stage: list(values) for stage, values in self._series.items()}
+        for stage, values in sorted(series.items()):
+            label = f'stage="{_escape(stage)}"'
+            for bound, count in zip(self.buckets, values):
+                lines.append(f'{self.name}_bucket{{{label},le="{_format(bound)}"}} {count}')
+            lines.append(f"{self.name}_sum{{{label}}} {_format(values[-2])}")
+            lines.append(f"{self.name}_count{{{label}}} {values[-1]}")
+        return lines
+
+class Metric:
+    """A Prometheus counter or gauge labelled by stage."""
+
+    def __init__(self, name: str, help_text: str, kind: str):
+        self.name = name
+        self.help_text = help_text
+        self.kind = kind
+        self._values: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, stage: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[stage] = self._values.get(stage, 0) + amount
+
+    def set(self, stage: str, value: float) -> None:
+        with self._lock:
+            self._values[stage] = value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            values = dict(self._values)
+        lines.extend(f'{self.name}{{stage="{_escape(stage)}"}} {_format(value)}' for stage, value in sorted(values.items()))
+        return lines
+
+class Registry:
+    """
+    The per-stage metrics of one process.
+
+    Each Gunicorn worker keeps its own registry, so /metrics reports the
+    worker that served the scrape.
+    """
+
+    def __init__(self):
+        self.durations = Histogram('rcanalyzer_stage_duration_seconds', 'Time spent in each analysis stage.', DURATION_BUCKETS)
+        self.bytes = Histogram('rcanalyzer_stage_bytes', 'Bytes processed by each analysis stage.', BYTES_BUCKETS)
+        self.entries = Metric('rcanalyzer_stage_entries_total', 'Log entries parsed by each analysis stage.', 'counter')
+        self.peak_memory = Metric('rcanalyzer_stage_peak_memory_bytes', 'Peak memory at the end of the latest run of each stage.', 'gauge')
+
+    def observe(self, span: 'Span') -> None:
+        self.durations.observe(span.name, span.seconds)
+        if span.bytes is not None:
+            self.bytes.observe(span.name, span.bytes)
+        if span.entries is not None:
+            self.entries.inc(span.name, span.entries)
+        if span.peak_bytes is not None:
+            self.peak_memory.set(span.name, span.peak_bytes)
+
+    def render(self) -> str:
+        """Returns every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in (self.durations, self.bytes, self.entries, self.peak_memory):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+REGISTRY = Registry()
+
+class Span:
+    """One timed stage: its duration and, where known, bytes, entries and peak memory."""
+
+    __slots__ = ('name', 'seconds', 'bytes', 'entries', 'peak_bytes')
+
+    def __init__(self, name: str, seconds: float = 0.0, bytes: Optional[int] = None, entries: Optional[int] = None,
+                 peak_bytes: Optional[int] = None):
+        self.name = name
+        self.seconds = seconds
+        self.bytes = bytes
+        self.entries = entries
+        self.peak_bytes = peak_bytes
+
+    def to_dict(self) -> dict:
+        return {key: getattr(self, key) for key in self.__slots__}
+
+class Trace:
+    """
+    The spans of one request or CLI run.
+
+    With ``trace_memory`` (and tracemalloc running) each span's peak is the
+    Python memory allocated during that stage; otherwise it is the process
+    high-water mark, which is cheap but only ever grows.
+    """
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.spans: List[Span] = []
+
+    def server_timing(self) -> str:
+        """Formats the spans as a Server-Timing header value."""
+        return ', '.join(f"{span.name};dur={span.seconds * 1000:.1f}" for span in self.spans)
+
+    def breakdown(self) -> List[dict]:
+        return [span.to_dict() for span in self.spans]
+
+def _process_peak_bytes() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def record(span: Span) -> Span:
+    """Adds a finished span to the registry and the current trace."""
+    REGISTRY.observe(span)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.spans.append(span)
+    return span
+
+@contextmanager
+def span(name: str, bytes: Optional[int] = None, entries: Optional[int] = None) -> Iterator[Span]:
+    """
+    Times the enclosed stage and records it, even when it raises.
+
+    The yielded Span's ``bytes`` and ``entries`` may be filled in by the
+    stage itself once it knows them. A memory-traced span resets the
+    tracemalloc peak, so the peak reached so far is first folded into every
+    enclosing span, and its own peak back into them when it ends.
+    """
+    trace = _current_trace.get()
+    traced = trace is not None and trace.trace_memory and tracemalloc.is_tracing()
+    if traced:
+        parents = _open_peaks.get()
+        reached = tracemalloc.get_traced_memory()[1]
+        for peak in parents:
+            peak[0] = max(peak[0], reached)
+        tracemalloc.reset_peak()
+        held = tracemalloc.get_traced_memory()[0]
+        own = [held]
+        token = _open_peaks.set(parents + (own,))
+    current = Span(name, bytes=bytes, entries=entries)
+    start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        current.seconds = time.perf_counter() - start
+        if traced:
+            _open_peaks.reset(token)
+            own[0] = max(own[0], tracemalloc.get_traced_memory()[1])
+            for peak in parents:
+                peak[0] = max(peak[0], own[0])
+            current.peak_bytes = own[0] - held
+        else:
+            current.peak_bytes = _process_peak_bytes()
+        record(current)
+
+def timed_chunks(name: str, chunks: Iterable[str]) -> Iterator[str]:
+    """
+    Passes a lazily rendered stream through, recording the time spent
+    producing it (not sending it) and its size in UTF-8 bytes, as sent.
+    """
+    current = Span(name, bytes=0)
+    iterator = iter(chunks)
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                current.seconds += time.perf_counter() - start
+            current.bytes += len(chunk.encode('utf-8'))
+            yield chunk
+    finally:
+        current.peak_bytes = _process_peak_bytes()
+        record(current)
+
+@contextmanager
+def tracing(trace_memory: bool = False) -> Iterator[Trace]:
+    """Collects the spans recorded in this context into a new Trace."""
+    trace = Trace(trace_memory)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+def start_trace() -> tuple:
+    """Starts collecting spans into a new Trace; returns it with the token for end_trace."""
+    trace = Trace()
+    return trace, _current_trace.set(trace)
+
+def end_trace(token) -> None:
+    _current_trace.reset(token)
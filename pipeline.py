@@ -0,0 +1,243 @@
+# pipeline.py
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+
+import analyzer
+import metrics
+from retention import DEFAULT_RETENTION, RETENTION_LABELS
+
+# Configuration for each report section. Sections with an 'analyzer' read their
+# own file; the others are all derived from the single index_logs pass.
+REPORT_SECTIONS = {
+    'summary': {'pattern': 'log.json', 'headers': ['Message', 'Count', 'FirstSeen', 'LastSeen', 'Examples'], 'title': 'Error Summary'},
+    'statistics': {'pattern': 'server-statistics.json', 'analyzer': analyzer.analyze_statistics, 'headers': ['Statistic', 'Value'], 'title': 'Server Statistics'},
+    'settings': {'pattern': 'settings.json', 'analyzer': analyzer.analyze_settings, 'headers': ['Setting', 'Value'], 'title': 'Workspace Settings'},
+    'omnichannel': {'pattern': 'omnichannel-settings.json', 'analyzer': analyzer.analyze_omnichannel, 'headers': ['Setting', 'Value'], 'title': 'Omnichannel Settings'},
+    'apps': {'pattern': 'apps-installed.json', 'analyzer': analyzer.analyze_apps, 'headers': ['Name', 'Version', 'Status'], 'title': 'Installed Apps'},
+    'logs': {'pattern': 'log.json', 'headers': ['level', 'time', 'pid', 'hostname', 'name', 'msg'], 'title': 'All Log Entries'},
+    'recommendations': {'pattern': 'log.json', 'title': 'Recommendations'},
+}
+
+EXECUTORS = ('thread', 'process', 'serial')
+
+# Bumped whenever the snapshot_outputs layout changes, to invalidate stored snapshots.
+SNAPSHOT_FORMAT = 4
+
+# Process pools are expensive to start, so one is kept per process and reused.
+_process_pool = None
+_process_pool_workers = None
+
+def find_section_files(dump_path: Path) -> Dict[str, Optional[Path]]:
+    """
+    Locates the file backing each report section in a dump directory.
+
+    Args:
+        dump_path: Directory containing the support dump files (a Path or a
+            zip_dump.ZipDirectory)
+
+    Returns:
+        Mapping of section key to file path, or None when the file is missing
+    """
+    files_found = {}
+    for key, config_section in REPORT_SECTIONS.items():
+        if key == 'settings':
+            all_settings_files = list(dump_path.glob('*settings.json'))
+            files_found[key] = next((f for f in all_settings_files if 'omnichannel' not in f.name.lower()), None)
+        else:
+            files_found[key] = next(dump_path.glob(f"*{config_section['pattern']}"), None)
+    return files_found
+
+def _timed(func, *args):
+    """Runs an analyzer and returns its result with the elapsed wall time."""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def _get_executor(executor: str, max_workers: Optional[int]):
+    global _process_pool, _process_pool_workers
+    if executor == 'process':
+        if _process_pool is None or _process_pool_workers != max_workers:
+            if _process_pool is not None:
+                _process_pool.shutdown(wait=False)
+            _process_pool = ProcessPoolExecutor(max_workers=max_workers)
+            _process_pool_workers = max_workers
+        return _process_pool, False
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analyzer'), True
+
+def run_sections(files_found: Dict[str, Optional[Path]], executor: str = 'thread', max_workers: Optional[int] = None, log_workers: int = 1, entry_index_dir: Optional[Path] = None,
+                 summary_max_messages: Optional[int] = analyzer.SUMMARY_MAX_MESSAGES, retention: str = DEFAULT_RETENTION,
+                 summary_min_level: Optional[int] = None) -> dict:
+    """
+    Runs the per-file analyzers, concurrently unless ``executor`` is 'serial'.
+
+    Args:
+        files_found: Section key to file path, as returned by find_section_files
+        executor: 'thread', 'process' or 'serial'
+        max_workers: Pool size (None lets concurrent.futures decide)
+        log_workers: Processes used by index_logs for large NDJSON logs
+        entry_index_dir: Where index_logs writes the entry index of the log
+            explorer (None skips it)
+        summary_max_messages: Distinct messages tracked per level for the
+            Error Summary (None for no limit)
+        retention: Entries kept for the log table: 'tail', 'reservoir' or
+            'exemplars' (see analyzer.LogAggregator)
+        summary_min_level: Lowest log level mined for the Error Summary
+            and recommendations (None for every level)
+
+    Returns:
+        Dict with the raw analyzer 'outputs' per job (the log output is a
+        level-indexed analyzer.LogAggregator), plus per-job 'timings'
+        (seconds) and 'errors' (message) for jobs that raised
+    """
+    if executor not in EXECUTORS:
+        raise ValueError(f"Unknown executor '{executor}', expected one of {', '.join(EXECUTORS)}")
+
+    jobs = {}
+    log_file_path = files_found.get('logs')
+    if log_file_path and log_file_path.exists():
+        jobs['logs'] = (analyzer.index_logs, log_file_path, log_workers, entry_index_dir, summary_max_messages, retention, summary_min_level)
+    for key, config_section in REPORT_SECTIONS.items():
+        file_to_analyze = files_found.get(key)
+        if 'analyzer' in config_section and file_to_analyze and file_to_analyze.exists():
+            jobs[key] = (config_section['analyzer'], file_to_analyze)
+
+    outputs, timings, errors = {}, {}, {}
+    if executor == 'serial' or len(jobs) <= 1:
+        for key, (func, *args) in jobs.items():
+            try:
+                outputs[key], timings[key] = _timed(func, *args)
+            except Exception as e:
+                errors[key] = str(e)
+                logging.error(f"Section '{key}' failed: {e}")
+        return {'outputs': outputs, 'timings': timings, 'errors': errors}
+
+    pool, owned = _get_executor(executor, max_workers)
+    try:
+        futures = {key: pool.submit(_timed, func, *args) for key, (func, *args) in jobs.items()}
+        for key, future in futures.items():
+            try:
+                outputs[key], timings[key] = future.result()
+            except Exception as e:
+                errors[key] = str(e)
+                logging.error(f"Section '{key}' failed: {e}")
+    finally:
+        if owned:
+            pool.shutdown(wait=True)
+    return {'outputs': outputs, 'timings': timings, 'errors': errors}
+
+def build_results(outputs: dict, min_level: int, timeline_points: Optional[int] = None) -> dict:
+    """
+    Assembles the template-ready report sections from analyzer outputs.
+
+    The log sections are resolved at ``min_level`` from the level-indexed log
+    output (a LogAggregator or LogSnapshot), so the same outputs can be
+    rendered at any threshold. ``timeline_points`` caps the timeline chart
+    (default analyzer.TIMELINE_MAX_POINTS).
+    """
+    log_index = outputs.get('logs') or analyzer.LogAggregator()
+    log_data = log_index.result(min_level, timeline_points)
+    results = {}
+    for key, config_section in REPORT_SECTIONS.items():
+        if key == 'summary':
+            results[key] = {
+                'title': config_section.get('title'),
+                'content': log_data.get('summary', []),
+                'headers': config_section.get('headers'),
+                'floor': log_data.get('summary_floor', 0),
+                'min_level': analyzer.summary_level_name(log_data),
+            }
+        elif key == 'recommendations':
+            results[key] = {'title': config_section.get('title'), 'content': log_data.get('recommendations', [])}
+        elif key == 'logs':
+            results[key] = {
+                'title': config_section.get('title'),
+                'content': log_data.get('all_errors', []),
+                'headers': config_section.get('headers'),
+                'retention': RETENTION_LABELS[log_data.get('retention', DEFAULT_RETENTION)],
+                'total_count': log_data.get('total_error_count'),
+                'chart_data_timeline': log_data.get('chart_data_timeline', {}),
+                'chart_data_severity': log_data.get('chart_data_severity', {}),
+                'levels': log_index.level_views(timeline_points=timeline_points),
+            }
+        else:
+            results[key] = {'title': config_section.get('title'), 'content': outputs.get(key, []), 'headers': config_section.get('headers')}
+    return results
+
+def analyze_dump(dump_path: Path, min_level: int, executor: str = 'thread', max_workers: Optional[int] = None, log_workers: int = 1, timeline_points: Optional[int] = None, entry_index_dir: Optional[Path] = None,
+                 summary_max_messages: Optional[int] = analyzer.SUMMARY_MAX_MESSAGES, retention: str = DEFAULT_RETENTION,
+                 summary_min_level: Optional[int] = analyzer.SUMMARY_MIN_LEVEL) -> dict:
+    """
+    Analyzes every section of a support dump directory.
+
+    Args:
+        dump_path: Directory containing the support dump files (a Path or a
+            zip_dump.ZipDirectory)
+        min_level: Minimum log level to report
+        executor: 'thread', 'process' or 'serial'
+        max_workers: Pool size (None lets concurrent.futures decide)
+        log_workers: Processes used by index_logs for large NDJSON logs
+        timeline_points: Point budget of the timeline chart
+        entry_index_dir: Where to write the entry index of the log explorer
+            (None skips it)
+        summary_max_messages: Distinct messages tracked per level for the
+            Error Summary (None for no limit)
+        retention: Entries kept for the log table ('tail', 'reservoir' or
+            'exemplars')
+        summary_min_level: Lowest log level mined for the Error Summary and
+            recommendations, lowered to ``min_level`` when that is below it
+            (None for every level)
+
+    Returns:
+        Dict with the report 'results', the raw analyzer 'outputs' (which can
+        be rebuilt at another level with build_results), the 'files' found per
+        section, and the per-section 'timings' and 'errors'
+    """
+    start = time.perf_counter()
+    files_found = find_section_files(dump_path)
+    if summary_min_level is not None:
+        summary_min_level = min(summary_min_level, min_level)
+    run = run_sections(files_found, executor, max_workers, log_workers, entry_index_dir, summary_max_messages, retention, summary_min_level)
+    elapsed = time.perf_counter() - start
+
+    breakdown = ', '.join(f"{key}={seconds:.3f}s" for key, seconds in sorted(run['timings'].items(), key=lambda item: -item[1]))
+    logging.info(f"Analyzed dump in {elapsed:.3f}s ({executor}): {breakdown or 'no sections'}")
+
+    log_index = run['outputs'].get('logs')
+    for key, seconds in run['timings'].items():
+        metrics.record(metrics.Span(f"analyze.{key}", seconds, entries=log_index.position if key == 'logs' and log_index is not None else None))
+
+    return {
+        'results': build_results(run['outputs'], min_level, timeline_points),
+        'outputs': run['outputs'],
+        'files': files_found,
+        'timings': run['timings'],
+        'errors': run['errors'],
+        'elapsed': elapsed,
+    }
+
+def snapshot_outputs(outputs: dict, levels, timeline_points: Optional[int] = None) -> dict:
+    """
+    Converts analyzer outputs to plain JSON data, resolving the log index at each of ``levels``.
+
+    Args:
+        outputs: Raw analyzer outputs, as returned by analyze_dump
+        levels: Log level thresholds the snapshot must be able to render
+        timeline_points: Point budget of the timeline chart
+
+    Returns:
+        JSON-serializable dict accepted by restore_outputs
+    """
+    log_index = outputs.get('logs') or analyzer.LogAggregator()
+    return {
+        'sections': {key: value for key, value in outputs.items() if key != 'logs'},
+        'logs': log_index.snapshot(levels, timeline_points).to_dict(),
+    }
+
+def restore_outputs(snapshot: dict) -> dict:
+    """Rebuilds analyzer outputs, usable with build_results, from snapshot_outputs data."""
+    outputs = dict(snapshot['sections'])
+    outputs['logs'] = analyzer.LogSnapshot.from_dict(snapshot['logs'])
+    return outputs
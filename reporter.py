@@ -1,23 +1,87 @@
 # reporter.py
-from jinja2 import Environment, FileSystemLoader
+import os
+import threading
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 from pathlib import Path
+from typing import Iterator
 
-def generate_report(results, template_path: Path):
+TEMPLATE_DIR = Path(__file__).resolve().parent / 'templates'
+REPORT_TEMPLATE = 'report_template.html'
+# Rendered output is handed on in pieces of roughly this many characters.
+STREAM_BUFFER_SIZE = 64 * 1024
+
+_environment = None
+_environment_lock = threading.Lock()
+
+def get_environment() -> Environment:
+    """
+    Returns the process-wide Jinja environment for reports.
+
+    Compiled templates stay in the environment's cache between reports, and
+    the bytecode cache lets fresh worker processes skip compiling them again.
+    Templates are still reloaded when their file changes.
+    """
+    global _environment
+    if _environment is None:
+        with _environment_lock:
+            if _environment is None:
+                _environment = Environment(
+                    loader=FileSystemLoader(TEMPLATE_DIR),
+                    autoescape=True,
+                    bytecode_cache=FileSystemBytecodeCache(),
+                )
+    return _environment
+
+def warm_templates(*template_names: str) -> None:
+    """Compiles templates ahead of the first report (default: the main report template)."""
+    env = get_environment()
+    for template_name in template_names or (REPORT_TEMPLATE,):
+        env.get_template(template_name)
+
+def stream_report(results, template_name: str = REPORT_TEMPLATE, buffer_size: int = STREAM_BUFFER_SIZE, **context) -> Iterator[str]:
     """
-    Generates an HTML report from the analysis results and returns it as a string.
-    
-    v2.0 Change: Instead of writing to an output file, this function now
-    loads the template and returns the rendered HTML content.
+    Renders a report incrementally.
+
+    Args:
+        results: Report sections, as built by pipeline.build_results
+        template_name: Template in TEMPLATE_DIR
+        buffer_size: Approximate number of characters per yielded chunk
+        **context: Extra template variables (log_level_name, version, ...)
+
+    Yields:
+        Consecutive chunks of the rendered HTML
+    """
+    template = get_environment().get_template(template_name)
+    buffer, buffered = [], 0
+    for piece in template.generate(results=results, **context):
+        buffer.append(piece)
+        buffered += len(piece)
+        if buffered >= buffer_size:
+            yield ''.join(buffer)
+            buffer, buffered = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+def generate_report(results, output_path: Path, template_name: str = REPORT_TEMPLATE, **context) -> Path:
+    """
+    Renders a report straight to a file.
+
+    Args:
+        results: Report sections, as built by pipeline.build_results
+        output_path: HTML file to write
+        template_name: Template in TEMPLATE_DIR
+        **context: Extra template variables (log_level_name, version, ...)
+
+    Returns:
+        The path of the written report
     """
-    
-    template_dir = template_path.parent
-    template_file = template_path.name
-    
-    # Set up the Jinja2 environment to load the template
-    env = Environment(loader=FileSystemLoader(template_dir), autoescape=True)
-    template = env.get_template(template_file)
-
-    # Render the template with the analysis results
-    html_content = template.render(results=results)
-    
-    return html_content
\ No newline at end of file
+    output_path = Path(output_path)
+    tmp_path = output_path.with_name(f".{output_path.name}.{os.getpid()}")
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for chunk in stream_report(results, template_name, **context):
+                f.write(chunk)
+        os.replace(tmp_path, output_path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return output_path
@@ -0,0 +1,92 @@
+# result_cache.py
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+class ResultCache:
+    """
+    On-disk cache of analysis results, keyed by upload content.
+
+    Entries are JSON files named by a hash of the upload digest, the analyzer
+    version, the knowledge base version and the analysis options, so a new
+    release or knowledge base edit never serves stale results. Reads refresh
+    an entry's mtime; when the cache grows past ``max_bytes`` the least
+    recently used entries are evicted.
+    """
+
+    SUFFIX = '.json'
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(upload_digest: str, analyzer_version: str, kb_version: str, **options) -> str:
+        """Builds the cache key for an upload and the settings it was analyzed with."""
+        parts = [upload_digest, analyzer_version, kb_version] + [f"{name}={options[name]}" for name in sorted(options)]
+        return hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}{self.SUFFIX}"
+
+    def get(self, key: str) -> Optional[dict]:
+        """Returns the cached results for ``key``, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                results = json.load(f)
+        except FileNotFoundError:
+            logging.info(f"Result cache miss for {key[:12]}")
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            logging.warning(f"Discarding unreadable result cache entry {key[:12]}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        logging.info(f"Result cache hit for {key[:12]}")
+        return results
+
+    def put(self, key: str, results: dict) -> None:
+        """Stores results under ``key`` and evicts old entries beyond the size cap."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            logging.warning(f"Could not cache results {key[:12]}: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+        self.evict()
+
+    def evict(self) -> int:
+        """Deletes least recently used entries until the cache fits ``max_bytes``. Returns the count."""
+        with self._lock:
+            entries = []
+            for path in self.root.glob(f"*{self.SUFFIX}"):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                removed += 1
+            if removed:
+                logging.info(f"Evicted {removed} result cache entries ({total} bytes remain)")
+            return removed
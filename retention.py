@@ -0,0 +1,79 @@
+# retention.py
+import heapq
+import random
+from collections import deque
+from operator import itemgetter
+
+# Ways of choosing the entries shown in the report's log table.
+RETENTION_STRATEGIES = ('tail', 'reservoir', 'exemplars')
+DEFAULT_RETENTION = 'tail'
+# First and last entries kept per error template by the 'exemplars' strategy.
+EXEMPLARS_PER_SIGNATURE = 3
+# How the log table describes each strategy's entries.
+RETENTION_LABELS = {
+    'tail': 'the most recent entries',
+    'reservoir': 'a uniform random sample of all entries',
+    'exemplars': 'the first and last entries of each error template',
+}
+
+class TailRetention:
+    """Keeps the last ``size`` entries in a ring buffer."""
+
+    __slots__ = ('entries',)
+
+    def __init__(self, size, rng=None):
+        self.entries = deque(maxlen=size)  # (position, entry)
+
+    def add(self, pos, entry):
+        self.entries.append((pos, entry))
+
+    def merge(self, other, offset):
+        """Folds in the entries of a retainer fed the entries following ours."""
+        self.entries.extend((pos + offset, entry) for pos, entry in other.entries)
+
+    @staticmethod
+    def select(retainers, size):
+        """Returns the last ``size`` entries of retainers fed interleaved entries, in file order."""
+        merged = heapq.merge(*(retainer.entries for retainer in retainers), key=itemgetter(0))
+        return [entry for _, entry in deque(merged, maxlen=size)]
+
+class ReservoirRetention:
+    """
+    Keeps a uniform random sample of ``size`` entries.
+
+    Every entry draws a random key and the ``size`` smallest keys are kept
+    (bottom-k sampling), so samples of different parts of a log merge into a
+    uniform sample of the whole by keeping the smallest keys again.
+    """
+
+    __slots__ = ('size', 'rng', 'heap')
+
+    def __init__(self, size, rng=None):
+        self.size = size
+        self.rng = rng or random.Random(0)
+        self.heap = []  # (-key, position, entry); the largest kept key on top
+
+    def _offer(self, item):
+        if len(self.heap) < self.size:
+            heapq.heappush(self.heap, item)
+        elif item[0] > self.heap[0][0]:
+            heapq.heapreplace(self.heap, item)
+
+    def add(self, pos, entry):
+        if self.size:
+            self._offer((-self.rng.random(), pos, entry))
+
+    def merge(self, other, offset):
+        """Folds in the sample of a retainer fed the entries following ours."""
+        for neg_key, pos, entry in other.heap:
+            self._offer((neg_key, pos + offset, entry))
+
+    @staticmethod
+    def select(retainers, size):
+        """Returns a uniform sample of ``size`` entries across the retainers, in file order."""
+        items = heapq.nlargest(size, (item for retainer in retainers for item in retainer.heap), key=itemgetter(0))
+        return [entry for _, _, entry in sorted(items, key=itemgetter(1))]
+
+# Retainers of the strategies that keep entries on their own; 'exemplars'
+# are kept by the template miner alongside each masked message.
+RETAINERS = {'tail': TailRetention, 'reservoir': ReservoirRetention}
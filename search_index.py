@@ -0,0 +1,307 @@
+# search_index.py
+import bisect
+import re
+from array import array
+from itertools import accumulate
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:  # optional: postings are then decoded in pure Python
+    np = None
+
+# Entry fields whose text is searchable; error objects contribute these keys.
+TEXT_FIELDS = ('msg', 'err', 'stack')
+ERROR_FIELDS = ('type', 'message', 'stack')
+# Longer tokens (hashes, base64 blobs) are indexed by their first characters.
+MAX_TOKEN_LENGTH = 64
+# Distinct terms a prefix query expands to at most; SearchIndex.truncated reports the prefixes cut off.
+MAX_PREFIX_TERMS = 1000
+
+_TOKEN = re.compile(r'\w+')
+_QUERY_PART = re.compile(r'"([^"]*)"|(\S+)')
+
+def tokenize(text):
+    """Splits text into lowercase word tokens."""
+    return [token[:MAX_TOKEN_LENGTH] for token in _TOKEN.findall(text.casefold())]
+
+def entry_text(entry):
+    """Returns the searchable text of a log entry (its message, error and stack)."""
+    parts = []
+    for field in TEXT_FIELDS:
+        value = entry.get(field)
+        if isinstance(value, str):
+            parts.append(value)
+        elif isinstance(value, dict):
+            parts.extend(value[key] for key in ERROR_FIELDS if isinstance(value.get(key), str))
+    return '\n'.join(parts)
+
+def parse_query(query):
+    """
+    Parses a search query into clauses that must all match.
+
+    Words match whole tokens, ``word*`` matches tokens starting with ``word``
+    and ``"quoted words"`` match consecutive tokens. A word that tokenizes
+    into several tokens (``room:GENERAL``) is matched as a phrase.
+
+    Returns:
+        List of (tokens, prefix) clauses, ``prefix`` applying to the last token
+
+    Raises:
+        ValueError: If the query has no searchable words
+    """
+    clauses = []
+    for quoted, word in _QUERY_PART.findall(query or ''):
+        text = quoted if quoted else word
+        tokens = tokenize(text)
+        if tokens:
+            clauses.append((tuple(tokens), text.rstrip().endswith('*')))
+    if not clauses:
+        raise ValueError('Empty search query')
+    return clauses
+
+def encode_varints(values):
+    """Encodes non-negative integers as varints: 7 bits per byte, high bit set on all but the last."""
+    out = bytearray()
+    for value in values:
+        while value >= 0x80:
+            out.append(value & 0x7f | 0x80)
+            value >>= 7
+        out.append(value)
+    return bytes(out)
+
+def decode_varints(data):
+    """Inverse of encode_varints; returns the integers as a list."""
+    if not data:
+        return []
+    if np is not None:
+        return _decode_varints_numpy(data).tolist()
+    values = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7f) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = shift = 0
+    return values
+
+def _decode_varints_numpy(data):
+    codes = np.frombuffer(data, dtype=np.uint8)
+    last = codes < 0x80
+    starts = np.flatnonzero(np.concatenate(([True], last[:-1])))
+    # Byte index within its varint gives the shift of its 7 bits; bits never overlap, so a sum assembles them.
+    shifts = (np.arange(len(codes)) - np.repeat(starts, np.diff(np.append(starts, len(codes))))) * 7
+    return np.add.reduceat((codes & 0x7f).astype(np.int64) << shifts, starts)
+
+def encode_postings(positions):
+    """Encodes increasing entry positions as varint-coded gaps."""
+    out = bytearray()
+    previous = 0
+    for position in positions:
+        gap = position - previous
+        previous = position
+        while gap >= 0x80:
+            out.append(gap & 0x7f | 0x80)
+            gap >>= 7
+        out.append(gap)
+    return bytes(out)
+
+def decode_postings(data):
+    """Inverse of encode_postings; returns the positions as a list."""
+    if not data:
+        return []
+    if np is not None:
+        return np.cumsum(_decode_varints_numpy(data)).tolist()
+    return list(accumulate(decode_varints(data)))
+
+def _encode_small(values):
+    """encode_varints of an array('I'), short-cut when every value fits one byte (the usual token offsets)."""
+    if max(values) < 0x80:
+        return array('B', values).tobytes()
+    return encode_varints(values)
+
+def _gaps(positions):
+    previous = 0
+    for position in positions:
+        yield position - previous
+        previous = position
+
+class SearchIndexWriter:
+    """
+    Builds an inverted index over the searchable text of log entries.
+
+    Each token maps to the increasing positions of the entries containing it
+    and, per entry, to the token offsets it occurs at, which is what phrase
+    queries match on. On close the vocabulary is written sorted (so prefix
+    queries are a bisect) next to the postings and the offsets, both stored
+    as varint-coded gaps. The offsets of a term list, for each of its entries
+    in postings order, their count followed by their gaps.
+    """
+
+    TERMS_NAME = 'terms.txt'
+    POSTINGS_NAME = 'postings.bin'
+    OFFSETS_NAME = 'postings_offsets.bin'
+    TOKEN_OFFSETS_NAME = 'token_offsets.bin'
+    TOKEN_OFFSETS_INDEX_NAME = 'token_offsets_index.bin'
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.postings = {}
+        self.token_offsets = {}
+
+    def add(self, position, entry):
+        """Indexes an entry (a dict) under its position."""
+        text = entry_text(entry)
+        if not text:
+            return
+        tokens = tokenize(text)
+        if len(set(tokens)) < len(tokens):
+            occurrences = {}
+            for offset, token in enumerate(tokens):
+                occurrences.setdefault(token, []).append(offset)
+        else:
+            # Usual case: every token occurs once, at its own offset.
+            occurrences = None
+        postings, token_offsets = self.postings, self.token_offsets
+        for offset, token in enumerate(occurrences or tokens):
+            token_postings = postings.get(token)
+            if token_postings is None:
+                token_postings = postings[token] = array('I')
+                token_offsets[token] = array('I')
+            token_postings.append(position)
+            if occurrences is None:
+                token_offsets[token].extend((1, offset))
+            else:
+                offsets = occurrences[token]
+                token_offsets[token].append(len(offsets))
+                token_offsets[token].extend(_gaps(offsets))
+
+    def close(self):
+        terms = sorted(self.postings)
+        self._write(terms, self.POSTINGS_NAME, self.OFFSETS_NAME, lambda term: encode_postings(self.postings[term]))
+        self._write(terms, self.TOKEN_OFFSETS_NAME, self.TOKEN_OFFSETS_INDEX_NAME, lambda term: _encode_small(self.token_offsets[term]))
+        (self.root / self.TERMS_NAME).write_text('\n'.join(terms), encoding='utf-8')
+
+    def _write(self, terms, name, index_name, data_of):
+        """Writes one block per term to ``name`` and the block boundaries to ``index_name``."""
+        bounds = array('q', [0])
+        with open(self.root / name, 'wb') as f:
+            for term in terms:
+                data = data_of(term)
+                f.write(data)
+                bounds.append(bounds[-1] + len(data))
+        with open(self.root / index_name, 'wb') as f:
+            bounds.tofile(f)
+
+class SearchIndex:
+    """Read side of a SearchIndexWriter index: term, prefix and phrase queries."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        terms = (self.root / SearchIndexWriter.TERMS_NAME).read_text(encoding='utf-8')
+        self.terms = terms.split('\n') if terms else []
+        self.offsets = self._read_bounds(SearchIndexWriter.OFFSETS_NAME)
+        self.token_offsets = self._read_bounds(SearchIndexWriter.TOKEN_OFFSETS_INDEX_NAME)
+
+    def _read_bounds(self, name):
+        bounds = array('q')
+        with open(self.root / name, 'rb') as f:
+            bounds.fromfile(f, len(self.terms) + 1)
+        return bounds
+
+    def _read(self, term_ids):
+        """Postings of the given term ids, as one set."""
+        positions = set()
+        with open(self.root / SearchIndexWriter.POSTINGS_NAME, 'rb') as f:
+            for term_id in term_ids:
+                positions.update(decode_postings(_read_block(f, self.offsets, term_id)))
+        return positions
+
+    def _read_occurrences(self, term_ids, candidates):
+        """Token offsets of the given term ids in each candidate entry, as {position: set of offsets}."""
+        occurrences = {}
+        with open(self.root / SearchIndexWriter.POSTINGS_NAME, 'rb') as postings, \
+                open(self.root / SearchIndexWriter.TOKEN_OFFSETS_NAME, 'rb') as token_offsets:
+            for term_id in term_ids:
+                values = decode_varints(_read_block(token_offsets, self.token_offsets, term_id))
+                i = 0
+                for position in decode_postings(_read_block(postings, self.offsets, term_id)):
+                    count = values[i]
+                    if position in candidates:
+                        offsets = occurrences.get(position)
+                        if offsets is None:
+                            offsets = occurrences[position] = set()
+                        offsets.update(accumulate(values[i + 1:i + 1 + count]))
+                    i += 1 + count
+        return occurrences
+
+    def _term_ids(self, token, prefix=False):
+        start = bisect.bisect_left(self.terms, token)
+        if not prefix:
+            return [start] if start < len(self.terms) and self.terms[start] == token else []
+        end = start
+        while end < len(self.terms) and end - start < MAX_PREFIX_TERMS and self.terms[end].startswith(token):
+            end += 1
+        return range(start, end)
+
+    def truncated(self, query):
+        """
+        Lists the prefixes of a query (``word*``) matching more than
+        MAX_PREFIX_TERMS terms, of which search() only looks up the first.
+
+        Raises:
+            ValueError: If the query has no searchable words
+        """
+        prefixes = []
+        for tokens, prefix in parse_query(query):
+            if prefix:
+                end = bisect.bisect_left(self.terms, tokens[-1]) + MAX_PREFIX_TERMS
+                if end < len(self.terms) and self.terms[end].startswith(tokens[-1]):
+                    prefixes.append(tokens[-1] + '*')
+        return prefixes
+
+    def search(self, query):
+        """
+        Finds the entries matching every clause of a query.
+
+        Words are looked up in the postings; phrases then keep the candidate
+        entries in which their tokens occur at consecutive offsets.
+
+        Args:
+            query: Query string, see parse_query
+
+        Returns:
+            Sorted list of matching entry positions
+
+        Raises:
+            ValueError: If the query has no searchable words
+        """
+        matches = None
+        for tokens, prefix in parse_query(query):
+            term_ids = [self._term_ids(token, prefix and i == len(tokens) - 1) for i, token in enumerate(tokens)]
+            candidates = None
+            for ids in term_ids:
+                positions = self._read(ids)
+                candidates = positions if candidates is None else candidates & positions
+                if not candidates:
+                    return []
+            if len(tokens) > 1:
+                candidates = self._phrase_matches(term_ids, candidates)
+            matches = candidates if matches is None else matches & candidates
+            if not matches:
+                return []
+        return sorted(matches)
+
+    def _phrase_matches(self, term_ids, candidates):
+        """The candidates in which the i-th tokens of a phrase occur i offsets after its first."""
+        occurrences = [self._read_occurrences(ids, candidates) for ids in term_ids]
+        first, rest = occurrences[0], list(enumerate(occurrences[1:], 1))
+        return {position for position in candidates
+                if any(all(start + i in offsets[position] for i, offsets in rest) for start in first[position])}
+
+def _read_block(f, bounds, term_id):
+    start, end = bounds[term_id], bounds[term_id + 1]
+    f.seek(start)
+    return f.read(end - start)
@@ -0,0 +1,32 @@
+# conftest.py
+"""Fixtures shared by the test modules."""
+
+import io
+import json
+import zipfile
+
+import pytest
+
+
+# Log message of the dumps built by make_dump_zip unless others are given.
+DUMP_MESSAGE = 'MongoTimeoutError: server selection'
+
+
+@pytest.fixture
+def make_dump_zip():
+    """
+    Returns a function building a minimal support dump zip.
+
+    The function takes the server ``version``, the ``messages`` logged at
+    level 50 and optional ``settings``, and returns the zip as a BytesIO.
+    """
+    def build(version='6.9.0', messages=(DUMP_MESSAGE,), settings=None):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as zf:
+            zf.writestr('dump/server-statistics.json', json.dumps({'version': version}))
+            zf.writestr('dump/log.json', '\n'.join(json.dumps({'level': 50, 'time': '2024-05-01T10:00:12.000Z', 'msg': msg}) for msg in messages))
+            if settings is not None:
+                zf.writestr('dump/settings.json', json.dumps(settings))
+        buffer.seek(0)
+        return buffer
+    return build
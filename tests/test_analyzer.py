@@ -0,0 +1,264 @@
+# test_analyzer.py
+"""Tests for the log analysis pipeline."""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import analyzer
+
+
+def make_entries():
+    """A small, mixed-level set of Rocket.Chat style log entries."""
+    return [
+        {'level': 50, 'time': '2024-05-01T10:00:12.000Z', 'msg': 'MongoTimeoutError: server selection', 'pid': 1, 'hostname': 'rc-1'},
+        {'level': 40, 'time': '2024-05-01T10:00:45.500Z', 'msg': 'User not found', 'pid': 1, 'hostname': 'rc-1'},
+        {'level': 30, 'time': '2024-05-01T10:01:02.000Z', 'msg': 'Slow query', 'pid': 2, 'hostname': 'rc-2'},
+        {'level': 50, 'time': '2024-05-01T10:02:00.000Z', 'msg': 'MongoTimeoutError: server selection', 'pid': 2, 'hostname': 'rc-2'},
+    ]
+
+
+@pytest.fixture
+def ndjson_log(tmp_path):
+    path = tmp_path / 'log.json'
+    path.write_text('\n'.join(json.dumps(e) for e in make_entries()) + '\n', encoding='utf-8')
+    return path
+
+
+@pytest.fixture
+def envelope_log(tmp_path):
+    path = tmp_path / 'log.json'
+    envelope = {'queue': [{'string': json.dumps(e)} for e in make_entries()], 'size': 4}
+    path.write_text(json.dumps(envelope), encoding='utf-8')
+    return path
+
+
+class TestStreamingParser:
+    """Test streaming decoding of log files."""
+
+    def test_ndjson_entries(self, ndjson_log):
+        """NDJSON files yield one entry per line."""
+        assert list(analyzer.iter_log_entries(ndjson_log)) == make_entries()
+
+    def test_queue_envelope_entries(self, envelope_log):
+        """Queue envelopes yield the decoded ``string`` payloads."""
+        assert list(analyzer.iter_log_entries(envelope_log)) == make_entries()
+
+    def test_small_chunks(self, envelope_log, ndjson_log):
+        """Values split across read chunks are reassembled correctly."""
+        assert list(analyzer.iter_log_entries(envelope_log, chunk_size=3)) == make_entries()
+        assert list(analyzer.iter_log_entries(ndjson_log, chunk_size=3)) == make_entries()
+
+    def test_plain_text_lines(self, tmp_path):
+        """Non-JSON lines are kept as level-less messages."""
+        path = tmp_path / 'log.json'
+        path.write_text('{"level": 50, "msg": "boom"}\nplain text\n', encoding='utf-8')
+        assert list(analyzer.iter_log_entries(path)) == [{'level': 50, 'msg': 'boom'}, {'msg': 'plain text', 'level': None}]
+
+
+class TestAnalyzeLogs:
+    """Test aggregation of log entries."""
+
+    def test_formats_give_same_result(self, ndjson_log, envelope_log):
+        """Both supported file formats produce identical reports."""
+        assert analyzer.analyze_logs(ndjson_log, 40) == analyzer.analyze_logs(envelope_log, 40)
+
+    def test_summary_and_charts(self, ndjson_log):
+        """Counts, recommendations and chart data reflect the filtered entries."""
+        result = analyzer.analyze_logs(ndjson_log, min_level=40)
+        assert result['total_error_count'] == 3
+        assert result['summary'][0] == {
+            'Message': 'MongoTimeoutError: server selection', 'Count': 2,
+            'FirstSeen': '2024-05-01T10:00:12.000Z', 'LastSeen': '2024-05-01T10:02:00.000Z',
+            'Examples': ['MongoTimeoutError: server selection'],
+        }
+        assert 'MongoDB Connection Timeout' in [r['title'] for r in result['recommendations']]
+        assert result['chart_data_timeline'] == {'labels': ['2024-05-01 10:00', '2024-05-01 10:02'], 'data': [2, 1], 'resolution': 'minute'}
+        assert result['chart_data_severity'] == {'labels': ['CRITICAL', 'ERROR'], 'data': [2, 1]}
+
+    def test_timeline_keeps_utc_offsets(self, tmp_path):
+        """Minutes are bucketed by instant and labelled in the offset of their first entry."""
+        path = tmp_path / 'log.json'
+        times = ['2024-05-01T12:00:10+02:00', '2024-05-01T10:00:50Z', '2024-05-01T10:01:00Z']
+        path.write_text('\n'.join(json.dumps({'level': 50, 'time': t, 'msg': 'boom'}) for t in times), encoding='utf-8')
+        assert analyzer.analyze_logs(path)['chart_data_timeline'] == {'labels': ['2024-05-01 12:00', '2024-05-01 10:01'], 'data': [2, 1], 'resolution': 'minute'}
+
+    def test_timeline_fits_point_budget(self, tmp_path):
+        """Long time spans fall back to hourly buckets with full-date labels."""
+        path = tmp_path / 'log.json'
+        times = [f'2024-05-0{day}T{hour:02d}:{minute:02d}:00.000Z' for day in (1, 2) for hour in range(24) for minute in (0, 30)]
+        path.write_text('\n'.join(json.dumps({'level': 50, 'time': t, 'msg': 'boom'}) for t in times), encoding='utf-8')
+        assert len(analyzer.analyze_logs(path)['chart_data_timeline']['labels']) == 96
+        timeline = analyzer.index_logs(path).result(50, timeline_points=50)
+        assert timeline['chart_data_timeline']['resolution'] == 'hour'
+        assert timeline['chart_data_timeline']['labels'][:2] == ['2024-05-01 00:00', '2024-05-01 01:00']
+        assert timeline['chart_data_timeline']['data'] == [2] * 48
+
+    def test_tail_is_bounded(self, tmp_path):
+        """Only the most recent entries are kept for the log table."""
+        path = tmp_path / 'log.json'
+        path.write_text('\n'.join(json.dumps({'level': 50, 'msg': f'error {i}'}) for i in range(analyzer.MAX_DISPLAYED_ENTRIES + 10)), encoding='utf-8')
+        result = analyzer.analyze_logs(path)
+        assert result['total_error_count'] == analyzer.MAX_DISPLAYED_ENTRIES + 10
+        assert len(result['all_errors']) == analyzer.MAX_DISPLAYED_ENTRIES
+        assert result['all_errors'][0]['msg'] == 'error 10'
+
+    def test_summary_is_bounded(self, tmp_path):
+        """Past summary_max_messages distinct forms, rare ones are dropped and the floor is reported."""
+        path = tmp_path / 'log.json'
+        words = ['alpha', 'bravo', 'charlie', 'delta', 'echo', 'foxtrot']
+        lines = [{'level': 50, 'msg': 'Disk full'}] * 10 + [{'level': 50, 'msg': f'{word} stopped'} for word in words]
+        path.write_text('\n'.join(json.dumps(line) for line in lines), encoding='utf-8')
+        result = analyzer.analyze_logs(path, summary_max_messages=3)
+        assert result['summary_floor'] > 0
+        assert result['summary'][0]['Message'] == 'Disk full'
+        assert result['summary'][0]['Count'] == 10
+        assert analyzer.analyze_logs(path)['summary_floor'] == 0
+
+    def test_reservoir_samples_the_whole_log(self, tmp_path):
+        """The reservoir strategy keeps a bounded sample from across the log, in file order."""
+        path = tmp_path / 'log.json'
+        path.write_text('\n'.join(json.dumps({'level': 50, 'msg': f'error {i}'}) for i in range(analyzer.MAX_DISPLAYED_ENTRIES * 4)), encoding='utf-8')
+        result = analyzer.analyze_logs(path, retention='reservoir')
+        numbers = [int(entry['msg'].split()[1]) for entry in result['all_errors']]
+        assert result['retention'] == 'reservoir'
+        assert len(numbers) == analyzer.MAX_DISPLAYED_ENTRIES and numbers == sorted(numbers)
+        assert numbers[0] < analyzer.MAX_DISPLAYED_ENTRIES < numbers[-1] - analyzer.MAX_DISPLAYED_ENTRIES * 2
+
+    def test_exemplars_per_template(self, tmp_path):
+        """The exemplars strategy keeps the first and last entries of each template."""
+        path = tmp_path / 'log.json'
+        lines = [{'level': 50, 'msg': f'Room {i} not found'} for i in range(20)] + [{'level': 40, 'msg': 'Disk full'}]
+        path.write_text('\n'.join(json.dumps(line) for line in lines), encoding='utf-8')
+        size = analyzer.EXEMPLARS_PER_SIGNATURE
+        result = analyzer.analyze_logs(path, 40, retention='exemplars')
+        assert [entry['msg'] for entry in result['all_errors']] == (
+            [f'Room {i} not found' for i in range(size)] + [f'Room {i} not found' for i in range(20 - size, 20)] + ['Disk full']
+        )
+
+    def test_missing_file(self, tmp_path):
+        """A missing log file yields an empty result."""
+        assert analyzer.analyze_logs(tmp_path / 'missing.json')['summary'] == []
+
+
+class TestParallelParsing:
+    """Test sharded parsing of NDJSON logs."""
+
+    @pytest.fixture
+    def large_log(self, tmp_path):
+        path = tmp_path / 'log.json'
+        lines = []
+        for i in range(2000):
+            lines.append(json.dumps({
+                'level': (10, 30, 40, 50, 60)[i % 5],
+                'time': f'2024-05-0{1 + i % 3}T1{i % 10}:{i % 60:02d}:00.000Z',
+                'msg': ('Method sendMessage failed for user u{0}', 'User not found', 'MongoTimeoutError {0}')[i % 3].format(i),
+                'pid': i % 4,
+                'hostname': f'rc-{i % 2}',
+            }))
+            if i % 500 == 0:
+                lines.append('plain text line\r')
+        path.write_text('\n'.join(lines), encoding='utf-8')
+        return path
+
+    def test_shards_cover_file_on_line_boundaries(self, large_log):
+        """Shards are contiguous, cover the file and start on new lines."""
+        content = large_log.read_bytes()
+        shards = analyzer._ndjson_shards(large_log, 4)
+        assert shards[0][0] == 0 and shards[-1][1] == len(content)
+        for (_, end), (start, _) in zip(shards, shards[1:]):
+            assert end == start and content[start - 1:start] == b'\n'
+
+    def test_parallel_matches_serial(self, large_log, monkeypatch):
+        """Merged shard results are identical to the serial result."""
+        monkeypatch.setattr(analyzer, 'PARALLEL_MIN_BYTES', 0)
+        for level in (10, 40):
+            assert analyzer.analyze_logs(large_log, level, workers=3) == analyzer.analyze_logs(large_log, level)
+
+    def test_merged_aggregators_match_single_pass(self, large_log):
+        """Aggregating consecutive parts and merging equals one pass over everything."""
+        entries = list(analyzer.iter_log_entries(large_log))
+        single = analyzer.LogAggregator(min_level=10)
+        for entry in entries:
+            single.add(entry)
+        merged = analyzer.LogAggregator(min_level=10)
+        for part in (entries[:7], entries[7:900], entries[900:]):
+            partial = analyzer.LogAggregator(min_level=10)
+            for entry in part:
+                partial.add(entry)
+            merged.merge(partial)
+        for level in (10, 40, 60):
+            assert merged.result(level) == single.result(level)
+
+    def test_merged_exemplars_match_single_pass(self, large_log):
+        """Exemplars of merged parts equal the exemplars of one pass."""
+        entries = list(analyzer.iter_log_entries(large_log))
+        single = analyzer.LogAggregator(min_level=10, retention='exemplars')
+        for entry in entries:
+            single.add(entry)
+        merged = analyzer.LogAggregator(min_level=10, retention='exemplars')
+        for part in (entries[:7], entries[7:900], entries[900:]):
+            partial = analyzer.LogAggregator(min_level=10, retention='exemplars')
+            for entry in part:
+                partial.add(entry)
+            merged.merge(partial)
+        for level in (10, 40):
+            assert merged.result(level)['all_errors'] == single.result(level)['all_errors']
+
+    def test_one_index_answers_every_level(self, large_log):
+        """Results from the level index equal a pass that only saw entries at or above the level."""
+        entries = [e for e in analyzer.iter_log_entries(large_log) if isinstance(e.get('level'), int)]
+        index = analyzer.index_logs(large_log)
+        for level in (10, 30, 45, 60, 70):
+            filtered = analyzer.LogAggregator(matcher=analyzer.get_matcher())
+            for entry in entries:
+                if entry['level'] >= level:
+                    filtered.add(entry)
+            assert index.result(level) == filtered.result(level)
+        assert index.result(70)['total_error_count'] == 0
+
+    def test_snapshot_round_trips_through_json(self, large_log):
+        """A snapshot serialized to JSON gives the same results and level views."""
+        index = analyzer.index_logs(large_log)
+        snapshot = analyzer.LogSnapshot.from_dict(json.loads(json.dumps(index.snapshot([30, 50]).to_dict())))
+        assert snapshot.result(30) == index.result(30)
+        assert snapshot.result(50) == index.result(50)
+        assert snapshot.level_views() == index.level_views()
+        assert [view['total_count'] for view in index.level_views()] == [index.result(level)['total_error_count'] for level in (10, 20, 30, 40, 50)]
+
+    def test_levels_below_summary_min_level_are_not_mined(self, large_log):
+        """Lower levels are counted and listed, but left out of the summary and recommendations."""
+        full = analyzer.index_logs(large_log)
+        index = analyzer.index_logs(large_log, summary_min_level=40)
+        assert index.result(40) == full.result(40)
+        low = index.result(10)
+        assert low['summary_min_level'] == 40
+        assert low['total_error_count'] == full.result(10)['total_error_count']
+        assert low['all_errors'] == full.result(10)['all_errors']
+        assert low['summary'] == full.result(40)['summary']
+        assert [view['summary_min_level'] for view in index.level_views()] == ['ERROR', 'ERROR', 'ERROR', None, None]
+        assert [level for level, _, forms, _ in index.level_aggregates() if forms] == [40, 50, 60]
+
+    def test_results_are_memoized_until_entries_are_added(self, large_log):
+        """Thresholds selecting the same levels share one result until the aggregator grows."""
+        index = analyzer.index_logs(large_log)
+        result = index.result(31)
+        assert index.result(40) is result
+        index.add({'level': 50, 'time': '2024-05-04T10:00:00.000Z', 'msg': 'late entry'})
+        assert index.result(40) is not result
+        assert index.result(40)['total_error_count'] == result['total_error_count'] + 1
+
+    def test_level_views_carry_summary_and_entries(self, large_log, monkeypatch):
+        """Each level view holds that level's Error Summary rows, capped, and retained entries."""
+        monkeypatch.setattr(analyzer, 'LEVEL_VIEW_SUMMARY_ROWS', 2)
+        index = analyzer.index_logs(large_log)
+        for view in index.level_views():
+            result = index.result(view['level'])
+            assert view['summary'] == result['summary'][:2]
+            assert view['summary_count'] == len(result['summary'])
+            assert view['entries'] == result['all_errors']
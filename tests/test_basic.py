@@ -11,7 +11,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from app import create_app
-from utils import validate_zip_file, ValidationError, get_safe_filename
+from utils import validate_zip_file, ValidationError, get_safe_filename, ZipStreamChecker, UploadSink
 
 class TestConfiguration:
     """Test configuration management."""
@@ -72,6 +72,58 @@ class TestSecurity:
         
         tmp_path.unlink()
 
+    def _zip_bytes(self, compression=zipfile.ZIP_STORED, **members):
+        import io
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w', compression=compression) as zf:
+            for name, content in members.items():
+                zf.writestr(name, content)
+        return buffer.getvalue()
+
+    def test_stream_checker_rejects_non_zip(self):
+        """Test streamed validation rejects data that is not a ZIP from its first bytes."""
+        checker = ZipStreamChecker(1024 * 1024)
+        with pytest.raises(ValidationError, match="Invalid ZIP"):
+            checker.feed(b'not a zip')
+
+    def test_stream_checker_rejects_bomb_at_header(self):
+        """Test streamed validation rejects a suspicious member before its data arrives."""
+        data = self._zip_bytes(zipfile.ZIP_DEFLATED, **{'bomb.txt': 'A' * 10000})
+        checker = ZipStreamChecker(1024 * 1024)
+        with pytest.raises(ValidationError, match="Suspicious compression ratio"):
+            for start in range(0, 60, 7):
+                checker.feed(data[start:start + 7])
+
+    def test_stream_checker_accepts_valid_zip(self):
+        """Test streamed validation passes a valid ZIP fed in small chunks."""
+        data = self._zip_bytes(**{'dump/log.json': '{}\n' * 100, 'dump/settings.json': '[]'})
+        checker = ZipStreamChecker(1024 * 1024)
+        for start in range(0, len(data), 5):
+            checker.feed(data[start:start + 5])
+        assert checker.done
+
+    def test_stream_checker_extracted_size(self):
+        """Test streamed validation enforces the total extracted size."""
+        data = self._zip_bytes(**{'a.txt': 'x' * 600, 'b.txt': 'y' * 600})
+        with pytest.raises(ValidationError, match="Total extracted size too large"):
+            ZipStreamChecker(1000).feed(data)
+
+    def test_upload_sink(self, tmp_path):
+        """Test the upload sink hashes, saves and cleans up after a rejected upload."""
+        import hashlib
+        data = self._zip_bytes(**{'test.txt': 'Hello World'})
+        sink = UploadSink(1024, 1024 * 1024, directory=tmp_path)
+        sink.write(data)
+        destination = tmp_path / 'saved.zip'
+        assert sink.save(destination) == hashlib.sha256(data).hexdigest()
+        assert destination.read_bytes() == data
+        validate_zip_file(destination, 1024, 1024 * 1024)
+
+        sink = UploadSink(10, 1024 * 1024, directory=tmp_path)
+        with pytest.raises(ValidationError, match="File too large"):
+            sink.write(data)
+        assert not sink.path.exists()
+
 class TestApp:
     """Test Flask application."""
     
@@ -85,6 +137,14 @@ class TestApp:
                 response = client.get('/')
                 assert response.status_code == 200
     
+    def test_index_lists_retention_strategies(self):
+        """Test the upload form offers every retention strategy with its report label."""
+        from retention import RETENTION_LABELS
+        response = create_app('testing').test_client().get('/')
+        for value, label in RETENTION_LABELS.items():
+            assert f'<option value="{value}"'.encode() in response.data
+            assert label.capitalize().encode() in response.data
+
     def test_index_post_no_file(self):
         """Test POST request without file."""
         app = create_app('testing')
@@ -95,5 +155,22 @@ class TestApp:
                 assert response.status_code == 200
                 # Should redirect back to upload page with error
 
+    def test_index_post_dump(self):
+        """Test uploading a support dump renders the report."""
+        import io
+        import json
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, 'w') as zf:
+            zf.writestr('dump/server-statistics.json', json.dumps({'version': '6.9.0'}))
+            zf.writestr('dump/log.json', json.dumps({'level': 50, 'time': '2024-05-01T10:00:12.000Z', 'msg': 'MongoTimeoutError: server selection'}))
+        buffer.seek(0)
+
+        app = create_app('testing')
+        with app.test_client() as client:
+            response = client.post('/', data={'support_dump': (buffer, 'dump.zip'), 'log_level': '40'}, content_type='multipart/form-data')
+            assert response.status_code == 200
+            assert b'MongoDB Connection Timeout' in response.data
+            assert b'6.9.0' in response.data
+
 if __name__ == '__main__':
     pytest.main([__file__])
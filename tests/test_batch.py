@@ -0,0 +1,61 @@
+# test_batch.py
+"""Tests for the parallel batch mode."""
+
+import json
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import batch
+import dump_diff
+import main
+
+
+class TestBatch:
+    """Test fanning dumps out over worker processes."""
+
+    def test_expand_inputs(self, tmp_path, make_dump_zip):
+        """Directories of dumps expand to their ZIPs and dump directories."""
+        (tmp_path / 'inbox').mkdir()
+        (tmp_path / 'inbox' / 'b.zip').write_bytes(make_dump_zip('6.9.0').getvalue())
+        (tmp_path / 'inbox' / 'a').mkdir()
+        (tmp_path / 'inbox' / 'a' / 'server-statistics.json').write_text('{}')
+        (tmp_path / 'inbox' / 'notes.txt').write_text('')
+        assert batch.expand_inputs([tmp_path / 'inbox']) == [tmp_path / 'inbox' / 'a', tmp_path / 'inbox' / 'b.zip']
+        assert batch.expand_inputs([tmp_path / 'inbox' / 'a']) == [tmp_path / 'inbox' / 'a']
+
+    def test_failures_do_not_stop_the_batch(self, tmp_path, make_dump_zip):
+        """Every dump gets an index record; corrupt ones are reported as failed."""
+        (tmp_path / 'one.zip').write_bytes(make_dump_zip('6.8.0').getvalue())
+        (tmp_path / 'corrupt.zip').write_bytes(b'not a zip')
+        (tmp_path / 'two.zip').write_bytes(make_dump_zip('6.9.0').getvalue())
+        out = tmp_path / 'out'
+        index = batch.run_batch([tmp_path / 'one.zip', tmp_path / 'corrupt.zip', tmp_path / 'two.zip'], out, workers=2, min_level=40, json_output=True)
+
+        assert [record['status'] for record in index['dumps']] == ['ok', 'failed', 'ok']
+        assert (index['succeeded'], index['failed']) == (2, 1)
+        assert 'Invalid ZIP' in index['dumps'][1]['error']
+        assert index['dumps'][2]['version'] == '6.9.0'
+        assert index['dumps'][2]['top_error']['Message'] == 'MongoTimeoutError: server selection'
+        for record in (index['dumps'][0], index['dumps'][2]):
+            assert (out / record['report']).is_file() and (out / record['json']).is_file()
+        assert json.loads((out / 'index.json').read_text())['failed'] == 1
+        assert 'one.zip' in (out / 'index.html').read_text()
+
+    def test_exit_status(self, tmp_path, make_dump_zip):
+        """The batch command exits non-zero when a dump failed."""
+        (tmp_path / 'one.zip').write_bytes(make_dump_zip('6.9.0').getvalue())
+        assert batch.main([str(tmp_path / 'one.zip'), '--output-dir', str(tmp_path / 'out'), '--workers', '1']) == 0
+        (tmp_path / 'bad.zip').write_bytes(b'')
+        assert batch.main([str(tmp_path / 'bad.zip'), '--output-dir', str(tmp_path / 'out'), '--workers', '1']) == 1
+
+    def test_main_dispatch(self, tmp_path, monkeypatch):
+        """--batch and --compare pick the command; a dump named batch is still analyzed as one."""
+        monkeypatch.setattr(batch, 'main', lambda argv: ('batch', argv))
+        monkeypatch.setattr(dump_diff, 'main', lambda argv: ('compare', argv))
+        assert main.main(['--batch', 'a.zip', '--workers', '2']) == ('batch', ['a.zip', '--workers', '2'])
+        assert main.main(['old', '--compare', 'new']) == ('compare', ['old', 'new'])
+        monkeypatch.chdir(tmp_path)
+        assert main.main(['batch', '--no-browser']) is None
@@ -0,0 +1,112 @@
+# test_clustering.py
+"""Tests for message template clustering."""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from clustering import TemplateMiner, mask_message
+
+class TestMasking:
+    """Test masking of variable message tokens."""
+
+    def test_masks_ids_numbers_and_addresses(self):
+        """Ids, numbers, addresses and timestamps become wildcards."""
+        assert mask_message('Room Xk3mPqR7sT9vW2yZa has 42 users') == 'Room <*> has <*> users'
+        assert mask_message('connect ECONNREFUSED 10.0.0.5:27017') == 'connect ECONNREFUSED <*>'
+        assert mask_message('doc 507f1f77bcf86cd799439011 missing') == 'doc <*> missing'
+        assert mask_message('at 2024-05-01T10:00:12.000Z by a@b.io') == 'at <*> by <*>'
+
+    def test_keeps_plain_words(self):
+        """Ordinary words are not mistaken for ids."""
+        assert mask_message('Exception in callback of async function') == 'Exception in callback of async function'
+
+class TestTemplateMiner:
+    """Test online template mining."""
+
+    def test_groups_messages_by_template(self):
+        """Messages differing only in variable tokens share a template."""
+        miner = TemplateMiner()
+        for user in ('alice', 'bob', 'carol', 'dave'):
+            miner.add(f'Method sendMessage failed for user {user}', f'2024-05-01T10:00:0{len(user)}Z')
+        miner.add('MongoTimeoutError: server selection', '2024-05-01T10:01:00Z')
+
+        rows = miner.summary()
+        assert len(rows) == 2
+        assert rows[0]['Message'] == 'Method sendMessage failed for user <*>'
+        assert rows[0]['Count'] == 4
+        assert rows[0]['FirstSeen'] == '2024-05-01T10:00:05Z'
+        assert rows[0]['LastSeen'] == '2024-05-01T10:00:04Z'
+        assert rows[0]['Examples'] == [
+            'Method sendMessage failed for user alice',
+            'Method sendMessage failed for user bob',
+            'Method sendMessage failed for user carol',
+        ]
+        assert rows[1]['Message'] == 'MongoTimeoutError: server selection'
+
+    def test_dissimilar_messages_stay_apart(self):
+        """Messages of the same length with different content are not merged."""
+        miner = TemplateMiner()
+        miner.add('Invalid setting: Site_Url')
+        miner.add('Network request failed')
+        miner.add('User not found')
+        assert len(miner.clusters) == 3
+
+    def test_high_cardinality_collapses(self):
+        """Thousands of id-bearing messages collapse into a single row."""
+        miner = TemplateMiner()
+        for i in range(5000):
+            miner.add(f'Error processing message {i} in room R{i:016d}')
+        assert [(row['Message'], row['Count']) for row in miner.summary()] == [('Error processing message <*> in room <*>', 5000)]
+
+    def test_forms_do_not_depend_on_other_messages(self):
+        """Masked forms stay the same when other messages widen their template."""
+        miner = TemplateMiner()
+        miner.add('Connection lost to mongo')
+        assert [(row['Form'], row['Message']) for row in miner.forms()] == [('Connection lost to mongo', 'Connection lost to mongo')]
+        miner.add('Connection lost to redis')
+        miner.add('Connection lost to redis')
+        assert [(row['Form'], row['Message'], row['Count']) for row in miner.forms()] == [
+            ('Connection lost to redis', 'Connection lost to <*>', 2), ('Connection lost to mongo', 'Connection lost to <*>', 1)
+        ]
+
+    def test_non_string_messages(self):
+        """Structured messages are clustered by their string form."""
+        miner = TemplateMiner()
+        miner.add({'code': 1})
+        assert miner.summary()[0]['Count'] == 1
+
+    def test_bounded_keeps_heavy_hitters(self):
+        """With max_keys, rare forms are evicted but frequent ones keep bounded counts."""
+        words = [''.join(chr(ord('a') + (i // 26 ** k) % 26) for k in range(3)) for i in range(500)]
+        miner = TemplateMiner(max_keys=50)
+        exact = {}
+        for i in range(5000):
+            word = words[0] if i % 2 else words[1] if i % 5 == 0 else words[i % len(words)]
+            miner.add(f'{word} stopped')
+            exact[f'{word} stopped'] = exact.get(f'{word} stopped', 0) + 1
+        assert len(miner.keys) <= 50
+        assert miner.floor > 0
+        for masked, stats in miner.keys.items():
+            assert stats.count - stats.error <= exact[masked] <= stats.count
+        for masked in (f'{words[0]} stopped', f'{words[1]} stopped'):
+            assert masked in miner.keys
+        assert all(exact[masked] <= miner.floor for masked in exact if masked not in miner.keys)
+
+    def test_bounded_merge_charges_floor(self):
+        """Forms one shard evicted are charged its floor and reported with a CountError."""
+        first = TemplateMiner(max_keys=2)
+        for msg in ['Network down'] * 5 + ['Disk full', 'Queue stalled']:
+            first.add(msg)
+        second = TemplateMiner(max_keys=2)
+        for msg in ['Network down'] * 3 + ['Disk full'] * 4:
+            second.add(msg)
+        assert first.floor == 1 and second.floor == 0
+        first.merge(second)
+        assert len(first.keys) <= 2
+        counts = {row['Message']: row for row in first.summary()}
+        assert counts['Network down']['Count'] == 8
+        assert 'CountError' not in counts['Network down']
+        assert counts['Disk full']['Count'] - counts['Disk full'].get('CountError', 0) <= 5 <= counts['Disk full']['Count']
@@ -0,0 +1,116 @@
+# test_dump_diff.py
+"""Tests for comparing dumps."""
+
+import json
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import dump_diff
+from analyzer import LogAggregator
+from app import create_app
+
+
+def make_results(errors=(), settings=(), apps=(), version='6.9.0'):
+    return {
+        'error_forms': {message: {'Form': message, 'Message': message, 'Count': count} for message, count in errors},
+        'settings': {'content': [{'Setting': name, 'Value': value} for name, value in settings]},
+        'omnichannel': {'content': []},
+        'apps': {'content': [{'Name': name, 'Version': app_version, 'Status': status} for name, app_version, status in apps]},
+        'statistics': {'content': [{'Statistic': 'Version', 'Value': version}]},
+        'logs': {'total_count': sum(count for _, count in errors)},
+    }
+
+
+class TestDumpDiff:
+    """Test the merge of two dumps' indexes."""
+
+    def test_error_changes(self):
+        """Errors are new, resolved, or changed once their count moves by the ratio."""
+        before = dump_diff.error_index(make_results([('timeout', 10), ('gone', 3), ('steady', 5)]))
+        after = dump_diff.error_index(make_results([('timeout', 40), ('steady', 7), ('fresh', 2)]))
+        errors = dump_diff.diff_errors(before, after)
+
+        assert [row['template'] for row in errors['new']] == ['fresh']
+        assert [row['template'] for row in errors['resolved']] == ['gone']
+        assert [(row['template'], row['before'], row['after'], row['factor']) for row in errors['changed']] == [('timeout', 10, 40, 4.0)]
+
+    def test_errors_keep_their_signature_when_templates_change(self):
+        """An error is matched across dumps even when other messages change its template."""
+        def forms(*messages):
+            aggregator = LogAggregator()
+            for msg in messages:
+                aggregator.add({'level': 50, 'time': '2024-05-01T10:00:00.000Z', 'msg': msg})
+            return {'error_forms': aggregator.forms(50)}
+
+        before = forms('Connection lost to mongo', 'User not found: alice')
+        after = forms('Connection lost to mongo', 'Connection lost to redis', 'User not found: alice', 'User not found: bob')
+        errors = dump_diff.diff_errors(dump_diff.error_index(before), dump_diff.error_index(after))
+
+        assert errors['resolved'] == [] and errors['changed'] == []
+        assert sorted((row['form'], row['template']) for row in errors['new']) == [
+            ('Connection lost to redis', 'Connection lost to <*>'), ('User not found: bob', 'User not found: <*>')
+        ]
+
+    def test_settings_and_apps(self):
+        """Settings and apps report additions, removals and changed values."""
+        before = make_results(settings=[('Site_Url', 'a'), ('Old', '1'), ('Same', 'x')], apps=[('poll', '1.0', 'enabled'), ('gone', '1.0', 'enabled'), ('jira', '2.0', 'enabled')])
+        after = make_results(settings=[('Site_Url', 'b'), ('New', '2'), ('Same', 'x')], apps=[('poll', '1.1', 'enabled'), ('jira', '2.0', 'disabled'), ('new', '0.1', 'enabled')])
+        diff = dump_diff.compare_results([('old', before), ('new', after)])
+
+        [step] = diff['steps']
+        assert [(row['setting'], row['change']) for row in step['settings']] == [('New', 'added'), ('Old', 'removed'), ('Site_Url', 'changed')]
+        assert [(row['name'], row['change']) for row in step['apps']] == [('gone', 'removed'), ('jira', 'status'), ('new', 'installed'), ('poll', 'version')]
+
+    def test_duplicate_app_names(self):
+        """Apps sharing a name are told apart by id, or by version without one."""
+        def results(*apps):
+            return {'apps': {'content': [{'Name': name, 'Version': version, 'Status': 'enabled', 'Id': app_id} for name, version, app_id in apps]}}
+
+        before = dump_diff.app_index(results(('poll', '1.0', 'private-poll'), ('poll', '2.0', 'market-poll')))
+        after = dump_diff.app_index(results(('poll', '1.1', 'private-poll'), ('poll', '2.0', 'market-poll')))
+        assert len(before) == 2
+        assert [(row['name'], row['change'], row['before_version'], row['after_version']) for row in dump_diff.diff_apps(before, after)] == [('poll', 'version', '1.0', '1.1')]
+
+        before = dump_diff.app_index(results(('poll', '1.0', None), ('poll', '2.0', None), ('poll', '2.0', None)))
+        after = dump_diff.app_index(results(('poll', '2.0', None)))
+        assert len(before) == 3
+        assert [(row['name'], row['change'], row['before_version']) for row in dump_diff.diff_apps(before, after)] == [('poll', 'removed', '1.0'), ('poll', 'removed', '2.0')]
+
+    def test_consecutive_steps(self):
+        """More than two dumps are compared pairwise in order."""
+        diff = dump_diff.compare_results([(name, make_results([(name, 1)])) for name in ('a', 'b', 'c')])
+        assert [(step['before'], step['after']) for step in diff['steps']] == [('a', 'b'), ('b', 'c')]
+        assert [dump['version'] for dump in diff['dumps']] == ['6.9.0'] * 3
+
+    def test_cli(self, tmp_path, make_dump_zip):
+        """The compare command analyzes the dumps and writes the diff report."""
+        (tmp_path / 'old.zip').write_bytes(make_dump_zip('6.8.0', ['MongoTimeoutError: server selection']).getvalue())
+        (tmp_path / 'new.zip').write_bytes(make_dump_zip('6.9.0', ['ECONNREFUSED 10.0.0.1:27017']).getvalue())
+        out = tmp_path / 'out'
+        assert dump_diff.main([str(tmp_path / 'old.zip'), str(tmp_path / 'new.zip'), '--output-dir', str(out), '--workers', '1', '--json-output']) == 0
+
+        [json_path] = out.glob('*.json')
+        diff = json.loads(json_path.read_text())
+        assert [dump['version'] for dump in diff['dumps']] == ['6.8.0', '6.9.0']
+        assert len(diff['steps'][0]['errors']['new']) == len(diff['steps'][0]['errors']['resolved']) == 1
+        [html_path] = out.glob('*.html')
+        assert 'old.zip' in html_path.read_text()
+
+    def test_compare_route(self, make_dump_zip):
+        """The web UI compares uploaded dumps and needs at least two."""
+        app = create_app('testing')
+        with app.test_client() as client:
+            response = client.post('/compare', data={
+                'support_dumps': [(make_dump_zip('6.8.0', ['MongoTimeoutError: server selection'], {'Site_Url': 'a'}), 'old.zip'),
+                                  (make_dump_zip('6.9.0', ['MongoTimeoutError: server selection'], {'Site_Url': 'b'}), 'new.zip')],
+                'log_level': '40',
+            }, content_type='multipart/form-data')
+            page = response.get_data(as_text=True)
+            assert response.status_code == 200
+            assert 'old.zip' in page and 'Site_Url' in page and 'No new, resolved or changed errors.' in page
+
+            response = client.post('/compare', data={'support_dumps': [(make_dump_zip('6.9.0', []), 'one.zip')]}, content_type='multipart/form-data')
+            assert 'between 2 and' in response.get_data(as_text=True)
@@ -0,0 +1,51 @@
+# test_dump_generator.py
+"""Tests for the synthetic dump generator and the benchmark harness."""
+
+import sys
+import zipfile
+from pathlib import Path
+
+# Add parent and benchmarks directories to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent.parent / 'benchmarks'))
+
+import analyzer
+import dump_generator
+from bench_pipeline import benchmark, find_regressions
+from utils import find_dump_path
+
+
+class TestDumpGenerator:
+    """Test generating and benchmarking synthetic dumps."""
+
+    def test_formats_hold_the_same_entries(self, tmp_path):
+        """NDJSON and queue envelope logs decode to the same entries."""
+        ndjson = dump_generator.generate_dump(tmp_path / 'ndjson', 300, {40: 1, 50: 1}, unique_messages=20)
+        queue = dump_generator.generate_dump(tmp_path / 'queue', 300, {40: 1, 50: 1}, unique_messages=20, log_format='queue')
+        entries = list(analyzer.iter_log_entries(ndjson / 'log.json'))
+
+        assert entries == list(analyzer.iter_log_entries(queue / 'log.json'))
+        assert len(entries) == 300 and {entry['level'] for entry in entries} == {40, 50}
+        assert len({entry['msg'] for entry in entries}) <= 20
+        assert entries[0]['time'] == '2024-05-01T00:00:00.000Z' and entries[-1]['time'] == '2024-05-02T00:00:00.000Z'
+
+    def test_zip_is_reproducible(self, tmp_path):
+        """The same arguments produce the same archive, a dump the analyzer finds."""
+        first = dump_generator.generate_dump(tmp_path / 'a.zip', 200, zipped=True)
+        second = dump_generator.generate_dump(tmp_path / 'b.zip', 200, zipped=True)
+        assert first.read_bytes() == second.read_bytes()
+
+        with zipfile.ZipFile(first) as zf:
+            zf.extractall(tmp_path / 'out')
+        assert find_dump_path(tmp_path / 'out') == tmp_path / 'out' / 'dump'
+
+    def test_regressions(self, tmp_path):
+        """Stages slower than the baseline beyond the threshold and the noise floor are flagged."""
+        zip_path = dump_generator.generate_dump(tmp_path / 'dump.zip', 200, zipped=True)
+        stages = benchmark(zip_path, tmp_path, repeat=1)
+        assert set(stages) == {'validate_zip_file', 'open_zip', 'find_dump_path', 'analyze_logs', 'analyze_dump', 'render_report'}
+        assert all(stage['peak_mb'] >= 0 for stage in stages.values())
+
+        baseline = {'stages': {'analyze_logs': {'seconds': 1.0, 'peak_mb': 10.0}, 'find_dump_path': {'seconds': 0.001}}}
+        current = {'stages': {'analyze_logs': {'seconds': 1.5, 'peak_mb': 10.1}, 'find_dump_path': {'seconds': 0.002}}}
+        assert find_regressions(current, baseline, threshold=0.25) == ['analyze_logs: seconds 1.0 -> 1.5 (+50%)']
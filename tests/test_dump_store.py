@@ -0,0 +1,71 @@
+# test_dump_store.py
+"""Tests for the SQLite store of analyzed dumps."""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from analyzer import LogAggregator
+from dump_store import DumpStore, signature_of
+
+
+def make_outputs(version, entries):
+    aggregator = LogAggregator()
+    for entry in entries:
+        aggregator.add(entry)
+    return {'statistics': [{'Statistic': 'Version', 'Value': version}], 'logs': aggregator}
+
+
+OLD_DUMP = make_outputs('6.8.0', [
+    {'level': 50, 'time': '2024-05-01T10:00:12.000Z', 'msg': 'MongoTimeoutError: server selection'},
+    {'level': 40, 'time': '2024-05-01T11:30:00.000Z', 'msg': 'User not found'},
+])
+NEW_DUMP = make_outputs('6.9.0', [
+    {'level': 50, 'time': '2024-05-03T08:00:00.000Z', 'msg': 'MongoTimeoutError: server selection'},
+    {'level': 50, 'time': '2024-05-03T08:10:00.000Z', 'msg': 'MongoTimeoutError: server selection'},
+])
+
+
+class TestDumpStore:
+    """Test recording dumps and querying trends across them."""
+
+    def test_record_is_idempotent(self, tmp_path):
+        """A dump is stored once per digest."""
+        store = DumpStore(tmp_path / 'dumps.sqlite3')
+        first = store.record('a' * 64, OLD_DUMP, 'old.zip')
+        assert store.record('a' * 64, OLD_DUMP, 'old.zip') == first
+        assert [(d['name'], d['version'], d['entry_count']) for d in store.dumps()] == [('old.zip', '6.8.0', 2)]
+
+    def test_signature_trend(self, tmp_path):
+        """Signatures are summed across dumps with their first and last appearance."""
+        store = DumpStore(tmp_path / 'dumps.sqlite3')
+        store.record('a' * 64, OLD_DUMP, 'old.zip')
+        store.record('b' * 64, NEW_DUMP, 'new.zip')
+        mongo = store.signatures(search='mongotimeout')
+        assert len(mongo) == 1
+        assert mongo[0]['signature'] == signature_of('MongoTimeoutError: server selection')
+        assert (mongo[0]['dumps'], mongo[0]['total']) == (2, 3)
+        assert mongo[0]['first_seen'] == 1714557612000  # 2024-05-01T10:00:12Z
+        assert [row['template'] for row in store.signatures(min_level=50)] == ['MongoTimeoutError: server selection']
+        assert [row['name'] for row in store.signature_history(mongo[0]['signature'])] == ['old.zip', 'new.zip']
+        assert store.signatures(search='100%') == []
+
+    def test_signature_survives_template_changes(self, tmp_path):
+        """An error keeps its signature when other messages of a dump widen its template."""
+        store = DumpStore(tmp_path / 'dumps.sqlite3')
+        store.record('a' * 64, make_outputs('6.8.0', [{'level': 50, 'msg': 'User not found: alice'}]))
+        store.record('b' * 64, make_outputs('6.9.0', [{'level': 50, 'msg': 'User not found: alice'}, {'level': 50, 'msg': 'User not found: bob'}]))
+        history = store.signature_history(signature_of('User not found: alice'))
+        assert [row['version'] for row in history] == ['6.8.0', '6.9.0']
+        assert sorted((row['dumps'], row['total']) for row in store.signatures()) == [(1, 1), (2, 2)]
+
+    def test_timeline(self, tmp_path):
+        """Counts are bucketed per hour or day over all dumps."""
+        store = DumpStore(tmp_path / 'dumps.sqlite3')
+        store.record('a' * 64, OLD_DUMP)
+        store.record('b' * 64, NEW_DUMP)
+        day = 24 * 3600 * 1000
+        assert [(row['start'] // day, row['count'], row['dumps']) for row in store.timeline()] == [(19844, 2, 1), (19846, 2, 1)]
+        assert [row['count'] for row in store.timeline(min_level=50, resolution='hour')] == [1, 2]
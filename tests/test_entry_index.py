@@ -0,0 +1,82 @@
+# test_entry_index.py
+"""Tests for the on-disk entry index behind the log explorer."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from entry_index import EntryIndex, build_index, open_index
+
+
+ENTRIES = [
+    {'level': 50, 'time': '2024-05-01T10:00:12.000Z', 'msg': 'MongoTimeoutError', 'pid': 1, 'hostname': 'rc-1'},
+    {'level': 30, 'time': '2024-05-01T09:59:00.000Z', 'msg': 'Slow query', 'pid': 2, 'hostname': 'rc-2'},
+    'not an entry',
+    {'level': 40, 'time': '2024-05-01T10:05:00.000+02:00', 'msg': 'User not found', 'pid': 1, 'hostname': 'rc-1'},
+    {'level': 'info', 'msg': 'textual level'},
+    {'level': 40, 'msg': 'no time', 'hostname': 'rc-2'},
+    {'level': 50, 'time': '2024-05-01T10:00:12.000Z', 'msg': 'Same instant', 'pid': 1, 'hostname': 'rc-1'},
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    assert build_index(ENTRIES, tmp_path) == 5
+    return EntryIndex(tmp_path)
+
+
+def messages(page):
+    return [entry['msg'] for entry in page['entries']]
+
+
+class TestEntryIndex:
+    """Test filtering, ordering and cursor pagination."""
+
+    def test_sorted_by_time(self, index):
+        """Entries come back in time order, untimed first and ties in file order."""
+        page = index.query()
+        # '10:05+02:00' is 08:05 UTC.
+        assert messages(page) == ['no time', 'User not found', 'Slow query', 'MongoTimeoutError', 'Same instant']
+        assert page['total'] == 5 and page['next_cursor'] is None
+        assert messages(index.query(order='desc')) == messages(page)[::-1]
+
+    def test_filters(self, index):
+        """Level, host, pid and time filters combine."""
+        assert messages(index.query(min_level=50)) == ['MongoTimeoutError', 'Same instant']
+        assert messages(index.query(level=40)) == ['no time', 'User not found']
+        assert messages(index.query(host='rc-2')) == ['no time', 'Slow query']
+        assert messages(index.query(host='rc-9')) == []
+        assert messages(index.query(pid=1, min_level=40)) == ['User not found', 'MongoTimeoutError', 'Same instant']
+        since = 1714557600000  # 2024-05-01T10:00:00Z
+        assert messages(index.query(since=since)) == ['MongoTimeoutError', 'Same instant']
+        assert messages(index.query(until=since)) == ['User not found', 'Slow query']
+
+    @pytest.mark.parametrize('order', ['asc', 'desc'])
+    def test_cursor_pages(self, index, order):
+        """Following next_cursor visits every entry exactly once."""
+        expected = messages(index.query(order=order))
+        seen, cursor = [], None
+        while True:
+            page = index.query(order=order, cursor=cursor, limit=2)
+            seen += messages(page)
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        assert seen == expected
+
+    def test_invalid_arguments(self, index):
+        """Malformed cursors and orders are rejected."""
+        with pytest.raises(ValueError):
+            index.query(cursor='garbage')
+        with pytest.raises(ValueError, match='Unknown order'):
+            index.query(order='random')
+
+    def test_open_index(self, tmp_path):
+        """Indexes are reused while unchanged; incomplete ones are not opened."""
+        assert open_index(tmp_path) is None
+        build_index(ENTRIES, tmp_path)
+        assert open_index(tmp_path) is open_index(tmp_path)
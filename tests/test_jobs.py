@@ -0,0 +1,193 @@
+# test_jobs.py
+"""Tests for background analysis jobs."""
+
+import io
+import json
+import re
+import subprocess
+import sys
+import time
+import zipfile
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app import create_app
+from jobs import JobStore, DONE, FAILED, RUNNING
+
+
+def wait_for(client, status_url, timeout=10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = client.get(status_url).get_json()
+        if status['status'] in (DONE, FAILED):
+            return status
+        time.sleep(0.05)
+    raise AssertionError('job did not finish')
+
+
+class TestJobStore:
+    """Test on-disk job state."""
+
+    def test_status_round_trip(self, tmp_path):
+        """Status updates are merged and persisted."""
+        store = JobStore(tmp_path)
+        job_id = store.create()
+        store.write_status(job_id, 'queued', filename='dump.zip')
+        store.write_status(job_id, 'running')
+        status = store.read_status(job_id)
+        assert status['status'] == 'running'
+        assert status['filename'] == 'dump.zip'
+
+    def test_rejects_malformed_ids(self, tmp_path):
+        """Ids that could escape the jobs folder are refused."""
+        store = JobStore(tmp_path)
+        assert store.job_dir('../etc') is None
+        assert store.read_status('../../passwd') is None
+
+    def test_sweep_removes_old_jobs(self, tmp_path):
+        """Jobs older than the maximum age are deleted."""
+        store = JobStore(tmp_path)
+        old_job, new_job = store.create(), store.create()
+        store.write_status(old_job, DONE)
+        store.write_status(new_job, DONE)
+        status_file = store.job_dir(old_job) / JobStore.STATUS_NAME
+        data = json.loads(status_file.read_text())
+        data['updated'] -= 7200
+        status_file.write_text(json.dumps(data))
+        assert store.sweep(3600) == 1
+        assert store.read_status(old_job) is None
+        assert store.read_status(new_job) is not None
+
+    def rewrite_status(self, store, job_id, **fields):
+        status_file = store.job_dir(job_id) / JobStore.STATUS_NAME
+        status_file.write_text(json.dumps({**json.loads(status_file.read_text()), **fields}))
+
+    def test_dead_worker_fails_job(self, tmp_path):
+        """A running job whose worker process is gone comes back failed."""
+        store = JobStore(tmp_path)
+        job_id = store.create()
+        store.write_status(job_id, RUNNING)
+        dead = subprocess.Popen([sys.executable, '-c', ''])
+        dead.wait()
+        self.rewrite_status(store, job_id, pid=dead.pid)
+        status = store.read_status(job_id)
+        assert status['status'] == FAILED
+        assert 'worker restarted' in status['error']
+
+    def test_stale_heartbeat_fails_job(self, tmp_path):
+        """A running job without a recent heartbeat comes back failed, whichever host ran it."""
+        store = JobStore(tmp_path, heartbeat_timeout=60)
+        job_id = store.create()
+        store.write_status(job_id, RUNNING)
+        assert store.read_status(job_id)['status'] == RUNNING
+        self.rewrite_status(store, job_id, host='elsewhere', heartbeat=time.time() - 120)
+        assert store.read_status(job_id)['status'] == FAILED
+
+    def test_sweep_keeps_running_jobs(self, tmp_path):
+        """Jobs still running are never deleted, however old."""
+        store = JobStore(tmp_path)
+        job_id = store.create()
+        store.write_status(job_id, RUNNING)
+        self.rewrite_status(store, job_id, created=time.time() - 7200, updated=time.time() - 7200)
+        assert store.sweep(3600) == 0
+        assert store.read_status(job_id)['status'] == RUNNING
+
+
+class TestJobRoutes:
+    """Test the job submission and polling endpoints."""
+
+    def make_app(self, tmp_path):
+        app = create_app('testing')
+        app.config['JOBS_FOLDER'] = tmp_path / 'jobs'
+        return app
+
+    def test_job_lifecycle(self, tmp_path, make_dump_zip):
+        """A submitted dump is analyzed in the background and its report served."""
+        app = self.make_app(tmp_path)
+        with app.test_client() as client:
+            response = client.post('/jobs', data={'support_dump': (make_dump_zip(), 'dump.zip'), 'log_level': '40'}, content_type='multipart/form-data')
+            assert response.status_code == 202
+            job = response.get_json()
+            assert job['status'] in ('queued', 'running', 'done')
+
+            status = wait_for(client, job['status_url'])
+            assert status['status'] == DONE
+            report = client.get(status['report_url'])
+            assert report.status_code == 200
+            assert b'MongoDB Connection Timeout' in report.data
+            # The log table pages from the entries endpoint; level views inline no entries.
+            views = json.loads(re.search(rb'const levelViews = (.*);\n', report.data).group(1))
+            assert views and all('entries' not in view for view in views)
+            # The upload is discarded once the report exists.
+            assert not (tmp_path / 'jobs' / job['id'] / JobStore.UPLOAD_NAME).exists()
+
+    def test_entries_endpoint(self, tmp_path, make_dump_zip):
+        """The log explorer pages through and searches the entries of a finished job."""
+        app = self.make_app(tmp_path)
+        with app.test_client() as client:
+            response = client.post('/jobs', data={'support_dump': (make_dump_zip(), 'dump.zip'), 'log_level': '40'}, content_type='multipart/form-data')
+            status = wait_for(client, response.get_json()['status_url'])
+            assert b'id="explorerFilters"' in client.get(status['report_url']).data
+
+            page = client.get(status['entries_url'], query_string={'min_level': 40}).get_json()
+            assert page['total'] == 1 and page['next_cursor'] is None
+            assert page['entries'][0]['msg'] == 'MongoTimeoutError: server selection'
+            assert client.get(status['entries_url'], query_string={'since': '2024-05-01T11:00'}).get_json()['total'] == 0
+            assert client.get(status['entries_url'], query_string={'since': 'yesterday'}).status_code == 400
+            assert client.get(status['entries_url'], query_string={'cursor': 'x'}).status_code == 400
+            assert client.get('/jobs/' + '0' * 32 + '/entries').status_code == 404
+
+            hits = client.get(status['entries_url'].replace('/entries', '/search'), query_string={'q': 'mongotimeout*'}).get_json()
+            assert hits['total'] == 1 and hits['truncated'] == []
+            assert hits['timeline'] == {'labels': ['2024-05-01 10:00'], 'data': [1], 'resolution': 'minute'}
+            assert client.get(status['entries_url'], query_string={'q': 'selection'}).get_json()['total'] == 1
+            assert client.get(status['entries_url'].replace('/entries', '/search')).status_code == 400
+
+    def test_trends_from_stored_dumps(self, tmp_path, make_dump_zip):
+        """Finished jobs are recorded in the dump store when one is configured."""
+        app = self.make_app(tmp_path)
+        with app.test_client() as client:
+            assert client.get('/trends/signatures').status_code == 404
+            app.config['DUMP_STORE_PATH'] = tmp_path / 'dumps.sqlite3'
+            response = client.post('/jobs', data={'support_dump': (make_dump_zip(), 'dump.zip')}, content_type='multipart/form-data')
+            wait_for(client, response.get_json()['status_url'])
+            assert [(d['name'], d['version']) for d in client.get('/trends/dumps').get_json()] == [('dump.zip', '6.9.0')]
+            signatures = client.get('/trends/signatures', query_string={'q': 'Mongo'}).get_json()
+            assert signatures[0]['total'] == 1
+            assert client.get(f"/trends/signatures/{signatures[0]['signature']}").get_json()[0]['name'] == 'dump.zip'
+            assert client.get('/trends/timeline', query_string={'resolution': 'hour'}).get_json()[0]['count'] == 1
+            assert client.get('/trends/timeline', query_string={'resolution': 'week'}).status_code == 400
+
+    def test_invalid_upload_fails_job(self, tmp_path):
+        """Uploads that are not ZIPs are rejected while streaming; other validation errors are reported through the job status."""
+        app = self.make_app(tmp_path)
+        with app.test_client() as client:
+            response = client.post('/jobs', data={'support_dump': (io.BytesIO(b'not a zip'), 'dump.zip')}, content_type='multipart/form-data')
+            assert response.status_code == 400
+            assert 'Invalid ZIP' in response.get_json()['error']
+
+            buffer = io.BytesIO()
+            with zipfile.ZipFile(buffer, 'w') as zf:
+                zf.writestr('notes.txt', 'no dump here')
+            buffer.seek(0)
+            response = client.post('/jobs', data={'support_dump': (buffer, 'dump.zip')}, content_type='multipart/form-data')
+            status = wait_for(client, response.get_json()['status_url'])
+            assert status['status'] == FAILED
+            assert 'dump structure' in status['error']
+            assert client.get(status['report_url']).status_code == 409
+
+    def test_unknown_job(self, tmp_path):
+        """Unknown or malformed job ids return 404."""
+        app = self.make_app(tmp_path)
+        with app.test_client() as client:
+            assert client.get('/jobs/' + '0' * 32).status_code == 404
+            assert client.get('/jobs/not-a-job/report').status_code == 404
+
+    def test_rejects_non_zip(self, tmp_path):
+        """Only ZIP uploads create jobs."""
+        app = self.make_app(tmp_path)
+        with app.test_client() as client:
+            response = client.post('/jobs', data={'support_dump': (io.BytesIO(b'x'), 'dump.txt')}, content_type='multipart/form-data')
+            assert response.status_code == 400
@@ -0,0 +1,74 @@
+# test_json_backend.py
+"""Tests for the pluggable JSON backend."""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import analyzer
+import json_backend
+
+
+@pytest.fixture(params=sorted(json_backend.BACKENDS))
+def backend(request):
+    selected = json_backend.backend
+    json_backend.use_backend(request.param)
+    yield request.param
+    json_backend.use_backend(selected)
+
+
+class TestJSONBackend:
+    """Test that every backend decodes like the standard library and output never depends on it."""
+
+    def test_loads_bytes_and_text(self, backend):
+        """Raw UTF-8 bytes, text and a leading byte order mark decode alike."""
+        text = '{"msg": "Überlauf ✓", "level": 50, "n": 1.5}'
+        assert json_backend.loads(text.encode('utf-8')) == json_backend.loads(text) == json.loads(text)
+        assert json_backend.loads(b'\xef\xbb\xbf' + text.encode('utf-8')) == json.loads(text)
+
+    def test_loads_values_outside_strict_json(self, backend):
+        """Values the standard library accepts (NaN, huge integers) are still decoded."""
+        value = json_backend.loads(b'{"big": 123456789012345678901234567890, "nan": NaN}')
+        assert value['big'] == 123456789012345678901234567890
+        assert value['nan'] != value['nan']
+
+    def test_malformed_input_raises_value_error(self, backend):
+        """Malformed JSON and invalid UTF-8 raise ValueError."""
+        for data in (b'{"msg": ', b'plain text', b'"\xff"'):
+            with pytest.raises(ValueError):
+                json_backend.loads(data)
+
+    def test_dump_file_matches_stdlib(self, backend, tmp_path):
+        """Indented output equals json.dump(indent=2, ensure_ascii=False)."""
+        data = {'title': 'Résumé', 'rows': [{'Count': 3, 'Ratio': 0.25, 'Examples': []}], 'levels': {40: 'ERROR'}, 'empty': {}}
+        json_backend.dump_file(data, tmp_path / 'out.json')
+        assert (tmp_path / 'out.json').read_text(encoding='utf-8') == json.dumps(data, indent=2, ensure_ascii=False)
+
+    def test_float_round_trip(self, backend, tmp_path):
+        """Floats are written as the standard library formats them and read back unchanged."""
+        data = {'a': 1e16, 'h': 1e-7, 'ratio': 0.1 + 0.2, 'rows': [2.5, -0.0, 123456.789]}
+        json_backend.dump_file(data, tmp_path / 'out.json', indent=False)
+        text = (tmp_path / 'out.json').read_text(encoding='utf-8')
+        assert '1e+16' in text and '1e-07' in text
+        assert text == json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+        assert json_backend.load_file(tmp_path / 'out.json') == data
+
+    def test_unknown_backend(self):
+        """Selecting a backend that is not installed fails."""
+        with pytest.raises(ValueError):
+            json_backend.use_backend('simdjson')
+
+    def test_analyze_logs_is_backend_independent(self, backend, tmp_path):
+        """Every backend gives the same analyze_logs result."""
+        path = tmp_path / 'log.json'
+        lines = [json.dumps({'level': 50, 'time': '2024-05-01T10:00:00.000Z', 'msg': f'Room {i} not found ✓'}) for i in range(20)]
+        path.write_text('\n'.join(lines + ['plain text line', '{"broken"']), encoding='utf-8')
+        json_backend.use_backend('json')
+        expected = analyzer.analyze_logs(path, 10)
+        json_backend.use_backend(backend)
+        assert analyzer.analyze_logs(path, 10) == expected
@@ -0,0 +1,101 @@
+# test_knowledge_base.py
+"""Tests for knowledge base matching."""
+
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import knowledge_base
+from knowledge_base import KNOWLEDGE_BASE_PATH, KnowledgeBaseMatcher, KnowledgeBaseRegistry
+
+class TestKnowledgeBaseMatcher:
+    """Test the compiled knowledge base matcher."""
+
+    def test_matches_agree_with_re_search(self):
+        """The combined prefilter finds exactly what per-pattern searches find."""
+        with open(KNOWLEDGE_BASE_PATH, 'r', encoding='utf-8') as f:
+            knowledge_base = json.load(f)
+        matcher = KnowledgeBaseMatcher(knowledge_base)
+        messages = [
+            'MongoTimeoutError: Server selection timed out',
+            'process Killed: out of memory',
+            "Error: Cannot find module 'sharp'",
+            'nothing interesting here',
+            '',
+        ]
+        for msg in messages:
+            expected = [e for e in knowledge_base if re.search(e['pattern'], msg)]
+            assert list(matcher.match(msg)) == expected
+
+    def test_memoizes_per_message(self):
+        """Repeated messages are served from the cache."""
+        matcher = KnowledgeBaseMatcher([{'pattern': '(?i)boom', 'title': 'Boom'}], cache_size=1)
+        first = matcher.match('BOOM happened')
+        assert matcher.match('BOOM happened') is first
+        assert matcher.match('quiet') == ()
+        assert [e['title'] for e in matcher.match('BOOM happened')] == ['Boom']
+
+    def test_invalid_and_backreference_patterns(self):
+        """Invalid patterns are skipped; backreferences still match correctly."""
+        matcher = KnowledgeBaseMatcher([
+            {'pattern': '([', 'title': 'Broken'},
+            {'pattern': r'(\w+) \1', 'title': 'Repeat'},
+            {'pattern': '(?i)fatal', 'title': 'Fatal'},
+        ])
+        assert matcher.title_count == 2
+        assert [e['title'] for e in matcher.match('again again')] == ['Repeat']
+        assert [e['title'] for e in matcher.match('FATAL error error')] == ['Repeat', 'Fatal']
+        assert matcher.match({'not': 'a string'}) == ()
+
+class TestKnowledgeBaseRegistry:
+    """Test the process-wide knowledge base cache."""
+
+    def write_kb(self, path, titles, mtime):
+        path.write_text(json.dumps([{'pattern': t.lower(), 'title': t} for t in titles]), encoding='utf-8')
+        os.utime(path, ns=(mtime, mtime))
+
+    def test_loads_once_and_reloads_on_change(self, tmp_path):
+        """The matcher is reused until the file changes."""
+        path = tmp_path / 'kb.json'
+        self.write_kb(path, ['Alpha'], 1_000_000_000)
+        registry = KnowledgeBaseRegistry(path)
+        first = registry.get()
+        version = registry.version
+        assert registry.get() is first
+        assert [e['title'] for e in first.match('alpha')] == ['Alpha']
+
+        # Touching the file without changing its content keeps the compiled copy.
+        os.utime(path, ns=(2_000_000_000, 2_000_000_000))
+        assert registry.get() is first
+
+        self.write_kb(path, ['Alpha', 'Beta'], 3_000_000_000)
+        second = registry.get()
+        assert second is not first
+        assert registry.version != version
+        assert second.title_count == 2
+
+    def test_invalid_file_keeps_last_good_copy(self, tmp_path):
+        """A broken edit does not drop the loaded recommendations."""
+        path = tmp_path / 'kb.json'
+        self.write_kb(path, ['Alpha'], 1_000_000_000)
+        registry = KnowledgeBaseRegistry(path)
+        first = registry.get()
+        path.write_text('{not json', encoding='utf-8')
+        os.utime(path, ns=(2_000_000_000, 2_000_000_000))
+        assert registry.get() is first
+
+    def test_missing_file(self, tmp_path):
+        """A missing knowledge base yields an empty matcher."""
+        registry = KnowledgeBaseRegistry(tmp_path / 'missing.json')
+        assert registry.get().title_count == 0
+        assert registry.version == 'none'
+
+    def test_bundled_knowledge_base(self):
+        """The bundled knowledge base loads and validates."""
+        assert knowledge_base.get_matcher().title_count > 0
+        assert knowledge_base.get_version() != 'none'
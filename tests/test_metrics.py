@@ -0,0 +1,127 @@
+# test_metrics.py
+"""Tests for per-stage instrumentation."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import metrics
+from app import create_app
+from config import TestingConfig
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = metrics.Registry()
+    monkeypatch.setattr(metrics, 'REGISTRY', registry)
+    return registry
+
+
+class TestMetrics:
+    """Test spans, traces and the Prometheus exposition."""
+
+    def test_spans_join_the_current_trace(self, registry):
+        """Spans are recorded in the registry, and in the trace while one is active."""
+        with metrics.tracing() as trace:
+            with metrics.span('validate_zip_file', bytes=2048) as span:
+                span.entries = 10
+            with pytest.raises(ValueError):
+                with metrics.span('analyze'):
+                    raise ValueError('bad dump')
+        with metrics.span('outside'):
+            pass
+
+        assert [span.name for span in trace.spans] == ['validate_zip_file', 'analyze']
+        assert trace.server_timing().startswith('validate_zip_file;dur=')
+        text = registry.render()
+        assert 'rcanalyzer_stage_duration_seconds_count{stage="outside"} 1' in text
+        assert 'rcanalyzer_stage_bytes_bucket{stage="validate_zip_file",le="10000.0"} 1' in text
+        assert 'rcanalyzer_stage_bytes_bucket{stage="validate_zip_file",le="1000.0"} 0' in text
+        assert 'rcanalyzer_stage_entries_total{stage="validate_zip_file"} 10.0' in text
+
+    def test_traced_memory(self, registry):
+        """With memory tracing, a span's peak is what the stage allocated."""
+        import tracemalloc
+        tracemalloc.start()
+        try:
+            with metrics.tracing(trace_memory=True) as trace:
+                with metrics.span('allocate'):
+                    block = bytearray(5_000_000)
+                    del block
+        finally:
+            tracemalloc.stop()
+        assert 5_000_000 <= trace.spans[0].peak_bytes < 6_000_000
+
+    def test_nested_traced_memory(self, registry):
+        """An inner span's peak reset does not hide what the enclosing span allocated."""
+        import tracemalloc
+        tracemalloc.start()
+        try:
+            with metrics.tracing(trace_memory=True) as trace:
+                with metrics.span('outer'):
+                    block = bytearray(5_000_000)
+                    del block
+                    with metrics.span('inner'):
+                        block = bytearray(1_000_000)
+                        del block
+                    with metrics.span('second'):
+                        pass
+        finally:
+            tracemalloc.stop()
+        inner, second, outer = trace.spans
+        assert outer.name == 'outer'
+        assert 1_000_000 <= inner.peak_bytes < 2_000_000
+        assert outer.peak_bytes >= 5_000_000
+        assert outer.peak_bytes >= inner.peak_bytes >= second.peak_bytes
+
+    def test_timed_chunks(self, registry):
+        """Streams are passed through and recorded with their encoded size once exhausted."""
+        assert list(metrics.timed_chunks('render', iter(['ab', 'cdé']))) == ['ab', 'cdé']
+        assert 'rcanalyzer_stage_bytes_sum{stage="render"} 6.0' in registry.render()
+
+    def test_server_timing_and_metrics_endpoint(self, registry, monkeypatch, make_dump_zip):
+        """Uploads report their stages in Server-Timing and /metrics."""
+        app = create_app('testing')
+        with app.test_client() as client:
+            response = client.post('/', data={'support_dump': (make_dump_zip(), 'dump.zip'), 'log_level': '40'}, content_type='multipart/form-data')
+            assert response.status_code == 200
+            response.get_data()
+            stages = [part.split(';')[0] for part in response.headers['Server-Timing'].split(', ')]
+            assert stages[:5] == ['receive', 'upload', 'validate_zip_file', 'open_zip', 'find_dump_path']
+            assert 'analyze.logs' in stages and 'analyze' in stages
+
+            response = client.get('/metrics')
+            assert response.content_type.startswith('text/plain; version=0.0.4')
+            text = response.get_data(as_text=True)
+            assert 'rcanalyzer_stage_entries_total{stage="analyze.logs"} 1.0' in text
+            assert 'rcanalyzer_stage_duration_seconds_count{stage="render"} 1' in text
+
+            assert client.get('/metrics', environ_base={'REMOTE_ADDR': '203.0.113.7'}).status_code == 403
+
+        monkeypatch.setattr(TestingConfig, 'METRICS_TOKEN', 'secret')
+        client = create_app('testing').test_client()
+        assert client.get('/metrics').status_code == 403
+        assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 403
+        assert client.get('/metrics', environ_base={'REMOTE_ADDR': '203.0.113.7'},
+                          headers={'Authorization': 'Bearer secret'}).status_code == 200
+
+        monkeypatch.setattr(TestingConfig, 'METRICS_ENABLED', False)
+        app = create_app('testing')
+        assert app.test_client().get('/metrics').status_code == 404
+        assert 'Server-Timing' not in app.test_client().get('/').headers
+
+    def test_trace_ends_when_a_view_raises(self, registry):
+        """The request's trace is closed even when its view fails."""
+        app = create_app('testing')
+
+        @app.route('/boom')
+        def boom():
+            raise RuntimeError('boom')
+
+        with pytest.raises(RuntimeError):
+            app.test_client().get('/boom')
+        assert metrics._current_trace.get() is None
@@ -0,0 +1,73 @@
+# test_pipeline.py
+"""Tests for the shared analysis pipeline."""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pipeline
+
+
+@pytest.fixture
+def dump_dir(tmp_path):
+    """A minimal support dump directory with every section present."""
+    entries = [
+        {'level': 50, 'time': '2024-05-01T10:00:12.000Z', 'msg': 'MongoTimeoutError: server selection', 'pid': 1, 'hostname': 'rc-1'},
+        {'level': 40, 'time': '2024-05-01T10:00:45.500Z', 'msg': 'User not found', 'pid': 1, 'hostname': 'rc-1'},
+    ]
+    (tmp_path / '2024-05-01-log.json').write_text('\n'.join(json.dumps(e) for e in entries), encoding='utf-8')
+    (tmp_path / '2024-05-01-server-statistics.json').write_text(json.dumps({'version': '6.9.0', 'totalUsers': 12}), encoding='utf-8')
+    (tmp_path / '2024-05-01-settings.json').write_text(json.dumps([{'_id': 'Site_Url', 'value': 'https://chat.example.com'}]), encoding='utf-8')
+    (tmp_path / '2024-05-01-omnichannel-settings.json').write_text(json.dumps({'Livechat_enabled': True}), encoding='utf-8')
+    (tmp_path / '2024-05-01-apps-installed.json').write_text(json.dumps({'apps': [{'name': 'Jira', 'version': '1.0', 'status': 'enabled'}]}), encoding='utf-8')
+    return tmp_path
+
+
+class TestPipeline:
+    """Test section discovery and concurrent analysis."""
+
+    def test_find_section_files(self, dump_dir):
+        """Settings and omnichannel settings are told apart."""
+        files = pipeline.find_section_files(dump_dir)
+        assert files['settings'].name == '2024-05-01-settings.json'
+        assert files['omnichannel'].name == '2024-05-01-omnichannel-settings.json'
+        assert files['logs'].name == '2024-05-01-log.json'
+
+    def test_executors_agree(self, dump_dir):
+        """Thread, process and serial execution build the same report."""
+        serial = pipeline.analyze_dump(dump_dir, 40, executor='serial')
+        for executor in ('thread', 'process'):
+            analysis = pipeline.analyze_dump(dump_dir, 40, executor=executor, max_workers=2)
+            assert analysis['results'] == serial['results']
+        assert set(serial['timings']) == {'logs', 'statistics', 'settings', 'omnichannel', 'apps'}
+        assert serial['errors'] == {}
+        assert serial['results']['logs']['total_count'] == 2
+        assert serial['results']['statistics']['content'][0] == {'Statistic': 'Version', 'Value': '6.9.0'}
+
+    def test_rebuild_at_another_level(self, dump_dir):
+        """Outputs of one analysis render any level, also after a JSON snapshot."""
+        analysis = pipeline.analyze_dump(dump_dir, 40, executor='serial')
+        expected = pipeline.analyze_dump(dump_dir, 50, executor='serial')['results']
+        assert pipeline.build_results(analysis['outputs'], 50) == expected
+        snapshot = json.loads(json.dumps(pipeline.snapshot_outputs(analysis['outputs'], [40, 50])))
+        assert pipeline.build_results(pipeline.restore_outputs(snapshot), 50) == expected
+
+    def test_section_errors_are_collected(self, dump_dir, monkeypatch):
+        """A failing section is reported without losing the others."""
+        def broken(file_path):
+            raise RuntimeError('boom')
+        monkeypatch.setitem(pipeline.REPORT_SECTIONS['apps'], 'analyzer', broken)
+        analysis = pipeline.analyze_dump(dump_dir, 40, executor='thread')
+        assert analysis['errors'] == {'apps': 'boom'}
+        assert analysis['results']['apps']['content'] == []
+        assert analysis['results']['settings']['content']
+
+    def test_unknown_executor(self, dump_dir):
+        """Invalid executor names are rejected."""
+        with pytest.raises(ValueError, match='Unknown executor'):
+            pipeline.analyze_dump(dump_dir, 40, executor='fibers')
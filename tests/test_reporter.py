@@ -0,0 +1,47 @@
+# test_reporter.py
+"""Tests for report rendering."""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pipeline
+import reporter
+from analyzer import LogAggregator
+
+
+def make_results():
+    aggregator = LogAggregator()
+    for i in range(300):
+        aggregator.add({'level': 50, 'time': f'2024-05-01T10:{i % 60:02d}:00.000Z', 'msg': f'MongoTimeoutError {i}'})
+    return pipeline.build_results({'logs': aggregator}, 50)
+
+
+class TestReporter:
+    """Test the shared environment and streamed rendering."""
+
+    def test_environment_is_shared(self):
+        """Templates are compiled once per process."""
+        env = reporter.get_environment()
+        assert reporter.get_environment() is env
+        assert env.bytecode_cache is not None
+        reporter.warm_templates()
+        assert env.get_template(reporter.REPORT_TEMPLATE) is env.get_template(reporter.REPORT_TEMPLATE)
+
+    def test_stream_matches_full_render(self):
+        """The streamed chunks add up to the fully rendered report."""
+        results = make_results()
+        chunks = list(reporter.stream_report(results, buffer_size=4096, log_level_name='CRITICAL', version='test'))
+        assert len(chunks) > 1
+        template = reporter.get_environment().get_template(reporter.REPORT_TEMPLATE)
+        assert ''.join(chunks) == template.render(results=results, log_level_name='CRITICAL', version='test')
+
+    def test_generate_report_writes_file(self, tmp_path):
+        """Reports rendered to disk contain the results."""
+        output_path = tmp_path / 'report.html'
+        assert reporter.generate_report(make_results(), output_path, version='test') == output_path
+        html = output_path.read_text(encoding='utf-8')
+        assert 'MongoTimeoutError' in html and 'Analyzer vtest' in html
+        assert list(tmp_path.iterdir()) == [output_path]
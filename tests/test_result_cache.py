@@ -0,0 +1,81 @@
+# test_result_cache.py
+"""Tests for the content-addressed result cache."""
+
+import hashlib
+import io
+import os
+import sys
+from pathlib import Path
+from unittest import mock
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pipeline
+from app import create_app
+from result_cache import ResultCache
+from utils import save_upload
+
+
+class TestResultCache:
+    """Test cache keys, lookups and eviction."""
+
+    def test_round_trip(self, tmp_path):
+        """Stored results are returned on a later lookup; unknown keys miss."""
+        cache = ResultCache(tmp_path, 1024 * 1024)
+        key = ResultCache.make_key('a' * 64, '2.1.4', 'kb1', min_level=50)
+        assert cache.get(key) is None
+        cache.put(key, {'summary': {'content': [1, 2]}})
+        assert cache.get(key) == {'summary': {'content': [1, 2]}}
+
+    def test_key_covers_versions_and_options(self):
+        """A new analyzer or knowledge base version, or other options, change the key."""
+        base = ResultCache.make_key('a' * 64, '2.1.4', 'kb1', min_level=50)
+        assert base == ResultCache.make_key('a' * 64, '2.1.4', 'kb1', min_level=50)
+        assert base != ResultCache.make_key('a' * 64, '2.1.5', 'kb1', min_level=50)
+        assert base != ResultCache.make_key('a' * 64, '2.1.4', 'kb2', min_level=50)
+        assert base != ResultCache.make_key('a' * 64, '2.1.4', 'kb1', min_level=40)
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        """Entries not read recently are dropped first once the size cap is exceeded."""
+        cache = ResultCache(tmp_path, 250)
+        payload = {'content': 'x' * 100}
+        cache.put('old', payload)
+        cache.put('used', payload)
+        os.utime(tmp_path / 'old.json', (1, 1))
+        os.utime(tmp_path / 'used.json', (2, 2))
+        assert cache.get('used') == payload  # refreshes its mtime
+        cache.put('new', payload)
+        assert cache.get('old') is None
+        assert cache.get('used') == payload
+        assert cache.get('new') == payload
+
+    def test_save_upload_hashes_content(self, tmp_path, make_dump_zip):
+        """Uploads are copied to disk and hashed in one pass."""
+        data = make_dump_zip().getvalue()
+        digest = save_upload(io.BytesIO(data), tmp_path / 'upload.zip', chunk_size=7)
+        assert (tmp_path / 'upload.zip').read_bytes() == data
+        assert digest == hashlib.sha256(data).hexdigest()
+
+
+class TestCachedUploads:
+    """Test that repeat uploads skip analysis."""
+
+    def test_repeat_upload_hits_cache(self, tmp_path, make_dump_zip):
+        """Uploading the same dump again, at any standard level, reuses the first analysis."""
+        app = create_app('testing')
+        app.config['RESULT_CACHE_ENABLED'] = True
+        app.config['RESULT_CACHE_FOLDER'] = tmp_path / 'cache'
+        client = app.test_client()
+        data = make_dump_zip().getvalue()
+
+        with mock.patch('pipeline.analyze_dump', wraps=pipeline.analyze_dump) as analyze_dump:
+            first = client.post('/', data={'support_dump': (io.BytesIO(data), 'dump.zip'), 'log_level': '50'}, content_type='multipart/form-data')
+            second = client.post('/', data={'support_dump': (io.BytesIO(data), 'again.zip'), 'log_level': '50'}, content_type='multipart/form-data')
+            third = client.post('/', data={'support_dump': (io.BytesIO(data), 'dump.zip'), 'log_level': '40'}, content_type='multipart/form-data')
+
+        assert first.status_code == second.status_code == third.status_code == 200
+        assert b'MongoTimeoutError' in second.data
+        assert first.data == second.data
+        assert b'level >= ERROR' in third.data
+        assert analyze_dump.call_count == 1  # every standard level is served from one analysis
@@ -0,0 +1,66 @@
+# test_retention.py
+"""Tests for the log table retention strategies."""
+
+import random
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from retention import ReservoirRetention, TailRetention
+
+
+class TestTailRetention:
+    """Test the ring-buffer tail."""
+
+    def test_merged_tails_keep_the_last_entries(self):
+        """Tails of consecutive parts merge into the tail of the whole."""
+        first, second = TailRetention(3), TailRetention(3)
+        for i in range(5):
+            first.add(i, {'n': i})
+        for i in range(2):
+            second.add(i, {'n': 5 + i})
+        first.merge(second, 5)
+        assert TailRetention.select([first], 3) == [{'n': 4}, {'n': 5}, {'n': 6}]
+
+    def test_select_interleaves_by_position(self):
+        """Tails of interleaved entries (one per level) are merged in position order."""
+        odd, even = TailRetention(2), TailRetention(2)
+        for i in range(6):
+            (odd if i % 2 else even).add(i, i)
+        assert TailRetention.select([odd, even], 3) == [3, 4, 5]
+
+
+class TestReservoirRetention:
+    """Test the bottom-k reservoir sample."""
+
+    def test_sample_is_bounded_and_in_file_order(self):
+        """The sample holds at most its size, in position order."""
+        sample = ReservoirRetention(10, random.Random(1))
+        for i in range(1000):
+            sample.add(i, i)
+        selected = ReservoirRetention.select([sample], 10)
+        assert len(sample.heap) == 10
+        assert selected == sorted(selected) and len(set(selected)) == 10
+
+    def test_sample_spans_the_whole_log(self):
+        """Entries from every part of the log are sampled about equally often."""
+        hits = [0] * 4
+        for seed in range(200):
+            sample = ReservoirRetention(8, random.Random(seed))
+            for i in range(400):
+                sample.add(i, i)
+            for i in ReservoirRetention.select([sample], 8):
+                hits[i // 100] += 1
+        assert all(300 <= count <= 500 for count in hits)
+
+    def test_merge_equals_one_sample(self):
+        """Merging samples of consecutive parts keeps the smallest keys of both."""
+        first, second = ReservoirRetention(5, random.Random(1)), ReservoirRetention(5, random.Random(2))
+        for i in range(50):
+            first.add(i, ('a', i))
+            second.add(i, ('b', i))
+        expected = sorted(first.heap + [(key, pos + 50, entry) for key, pos, entry in second.heap], reverse=True)[:5]
+        first.merge(second, 50)
+        assert sorted(first.heap, reverse=True) == expected
@@ -0,0 +1,115 @@
+# test_search_index.py
+"""Tests for the full-text inverted index over log messages."""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import search_index
+from search_index import SearchIndex, SearchIndexWriter, decode_postings, decode_varints, encode_postings, encode_varints, parse_query
+
+
+ENTRIES = [
+    {'msg': 'MongoTimeoutError: server selection timed out'},
+    {'msg': 'User aBc123 joined room GENERAL'},
+    {'msg': 'Exception in callback', 'err': {'type': 'TypeError', 'message': 'room is undefined', 'stack': 'at joinRoom (rooms.js:10)'}},
+    {'msg': 'room general archived by user aBc123'},
+    {'level': 40},
+]
+
+
+@pytest.fixture(params=['python', 'numpy'])
+def backend(request, monkeypatch):
+    if request.param == 'numpy':
+        pytest.importorskip('numpy')
+    else:
+        monkeypatch.setattr(search_index, 'np', None)
+    return request.param
+
+
+def build_index(root, entries):
+    writer = SearchIndexWriter(root)
+    for position, entry in enumerate(entries):
+        writer.add(position, entry)
+    writer.close()
+    return SearchIndex(root)
+
+
+@pytest.fixture
+def index(tmp_path):
+    return build_index(tmp_path, ENTRIES)
+
+
+def search(index, query):
+    return index.search(query)
+
+
+class TestPostings:
+    """Test the compact postings encoding."""
+
+    def test_round_trip(self, backend):
+        """Gaps of every varint width decode to the original positions."""
+        positions = [0, 1, 127, 128, 300, 16384, 16385, 2 ** 31, 2 ** 32 - 1]
+        data = encode_postings(positions)
+        assert len(data) < 8 * len(positions)
+        assert decode_postings(data) == positions
+        assert decode_postings(b'') == []
+
+    def test_varints(self, backend):
+        """Varints keep the values as given, repeats and zeros included."""
+        values = [3, 0, 0, 200, 3, 2 ** 40]
+        assert decode_varints(encode_varints(values)) == values
+
+
+class TestSearch:
+    """Test term, prefix and phrase queries."""
+
+    def test_parse_query(self):
+        """Quoted text is a phrase, a trailing star a prefix."""
+        assert parse_query('Mongo* "room GENERAL" room:x') == [(('mongo',), True), (('room', 'general'), False), (('room', 'x'), False)]
+        with pytest.raises(ValueError, match='Empty search query'):
+            parse_query(' "" * ')
+
+    def test_terms(self, backend, index):
+        """Terms are case-insensitive and all must match; error fields are searched."""
+        assert search(index, 'ROOM') == [1, 2, 3]
+        assert search(index, 'room abc123') == [1, 3]
+        assert search(index, 'typeerror') == [2]
+        assert search(index, 'missing') == []
+
+    def test_prefix(self, backend, index):
+        """A trailing star matches every term with that prefix."""
+        assert search(index, 'room*') == [1, 2, 3]
+        assert search(index, 'join*') == [1, 2]
+        assert search(index, 'mongotimeout*') == [0]
+
+    def test_phrase(self, backend, index):
+        """Phrases match consecutive tokens only."""
+        assert search(index, '"room general"') == [1, 3]
+        assert search(index, '"general room"') == []
+        assert search(index, '"server sel*"') == [0]
+        assert search(index, 'rooms.js') == [2]
+
+    def test_phrase_uses_token_offsets(self, backend, tmp_path):
+        """Phrases match repeated and prefixed tokens at the right offsets, across many entries."""
+        entries = [{'msg': f'job {i} failed: job {i + 1} timed out'} for i in range(300)]
+        entries.append({'msg': 'timed timed out out'})
+        index = build_index(tmp_path, entries)
+        assert search(index, '"job 7 failed"') == [7]
+        assert search(index, '"6 timed"') == [5]
+        assert search(index, '"timed out"') == list(range(301))
+        assert search(index, '"out out"') == [300]
+        assert search(index, '"failed jo*"') == list(range(300))
+        assert search(index, '"out timed"') == []
+
+    def test_truncated_prefixes(self, tmp_path, monkeypatch):
+        """Prefixes expanding to more than MAX_PREFIX_TERMS terms are reported."""
+        monkeypatch.setattr(search_index, 'MAX_PREFIX_TERMS', 2)
+        index = build_index(tmp_path, [{'msg': 'user1 user2 user3 room'}, {'msg': 'user4'}, {'msg': 'roomy'}])
+        assert index.truncated('user* room*') == ['user*']
+        assert index.truncated('user4* room') == []
+        assert search(index, 'user*') == [0]
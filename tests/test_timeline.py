@@ -0,0 +1,64 @@
+# test_timeline.py
+"""Tests for timeline rollups and downsampling."""
+
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from timeline import build_timeline, lttb, rollup
+
+
+class TestRollup:
+    """Test minute, hour and day rollups."""
+
+    def test_hour_and_day_buckets(self):
+        """Counts are summed per local hour and day."""
+        minutes = [(0, 1, None), (59, 2, None), (60, 3, None), (1500, 4, None)]
+        assert rollup(minutes, 'minute') == [(0, 1), (59, 2), (60, 3), (1500, 4)]
+        assert rollup(minutes, 'hour') == [(0, 3), (60, 3), (1500, 4)]
+        assert rollup(minutes, 'day') == [(0, 6), (1440, 4)]
+
+    def test_offsets_shift_boundaries(self):
+        """Buckets follow the wall-clock time of the entries' own UTC offset."""
+        assert rollup([(1430, 1, timedelta(hours=2))], 'day') == [(1440, 1)]
+
+
+class TestBuildTimeline:
+    """Test resolution choice and the point budget."""
+
+    def test_finest_resolution_that_fits(self):
+        """Minutes are kept while they fit, then hours, then days."""
+        minutes = [(m, 1, None) for m in range(0, 3 * 1440, 30)]
+        assert build_timeline(minutes, 1000)['resolution'] == 'minute'
+        hourly = build_timeline(minutes, 100)
+        assert hourly['resolution'] == 'hour'
+        assert hourly['labels'][0] == '1970-01-01 00:00' and hourly['data'][0] == 2
+        daily = build_timeline(minutes, 10)
+        assert daily == {'labels': ['1970-01-01', '1970-01-02', '1970-01-03'], 'data': [48, 48, 48], 'resolution': 'day'}
+
+    def test_downsamples_past_daily_budget(self):
+        """Spans too long even for daily buckets are reduced to the budget."""
+        minutes = [(day * 1440, day % 7, None) for day in range(2000)]
+        timeline = build_timeline(minutes, 100)
+        assert timeline['resolution'] == 'day'
+        assert len(timeline['labels']) == len(timeline['data']) == 100
+        assert timeline['labels'][0] == '1970-01-01'
+
+
+class TestLTTB:
+    """Test Largest-Triangle-Three-Buckets downsampling."""
+
+    def test_keeps_ends_and_peaks(self):
+        """The first and last points and isolated spikes survive."""
+        points = [(x, 100 if x == 500 else 1) for x in range(1000)]
+        sampled = lttb(points, 20)
+        assert len(sampled) == 20
+        assert sampled[0] == points[0] and sampled[-1] == points[-1]
+        assert (500, 100) in sampled
+
+    def test_short_input_unchanged(self):
+        """Inputs within the threshold are returned as they are."""
+        assert lttb([(0, 1), (1, 2)], 5) == [(0, 1), (1, 2)]
@@ -0,0 +1,35 @@
+# test_timestamps.py
+"""Tests for log timestamp parsing."""
+
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from timestamps import TimestampParser, parse_time_ms
+
+
+class TestParseTime:
+    """Test timestamp parsing."""
+
+    def test_offsets(self):
+        """Timestamps are converted to epoch milliseconds, keeping their UTC offset."""
+        assert parse_time_ms('1970-01-01T00:01:00.250Z') == (60250, timedelta(0))
+        assert parse_time_ms('1970-01-01T02:01:00+02:00') == (60000, timedelta(hours=2))
+        assert parse_time_ms('1970-01-01T00:01:00') == (60000, None)
+        assert parse_time_ms('yesterday') is None
+
+
+    def test_fast_path_matches_full_parse(self):
+        """The cached Rocket.Chat layout path agrees with full parsing, valid or not."""
+        parser = TimestampParser(cache_size=2)
+        for time_str in [
+            '2024-05-01T10:00:12.345Z', '2024-05-01T10:00:59.999Z', '2024-05-01T10:01:00.000Z',
+            '1969-12-31T23:59:59.999Z', '2024-02-29T00:00:00.000Z', '2023-02-29T00:00:00.000Z',
+            '2024-05-01T24:00:00.000Z', '2024-05-01T10:00:60.000Z', '2024-05-01T10:00:12.34xZ',
+            '2024-05-01 10:00:12.345Z', '2024-05-01T10:00:12.345+02:00', '2024-05-01T10:00:12Z',
+        ]:
+            assert parser.parse(time_str) == parse_time_ms(time_str), time_str
+
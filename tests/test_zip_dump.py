@@ -0,0 +1,95 @@
+# test_zip_dump.py
+"""Tests for reading support dumps directly from ZIP archives."""
+
+import json
+import sys
+import zipfile
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import pipeline
+from utils import ValidationError, find_dump_path
+from zip_dump import ZipDump
+
+LOG_LINES = '\n'.join(json.dumps({'level': 50, 'time': f'2024-05-01T10:0{i}:00.000Z', 'msg': f'MongoTimeoutError {i}'}) for i in range(5))
+
+
+@pytest.fixture
+def dump_zip(tmp_path):
+    path = tmp_path / 'dump.zip'
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('support-dump/2024-05-01-server-statistics.json', json.dumps({'version': '6.9.0', 'totalUsers': 3}))
+        zf.writestr('support-dump/2024-05-01-settings.json', json.dumps({'Site_Url': 'https://chat.example.com', 'SMTP_Password': 'x'}))
+        zf.writestr('support-dump/2024-05-01-apps-installed.json', json.dumps([{'name': 'Jira', 'version': '1.0', 'status': 'enabled'}]))
+        zf.writestr('support-dump/2024-05-01-log.json', LOG_LINES)
+        zf.writestr('support-dump/nested/other-log.json', LOG_LINES)
+        zf.writestr('../evil-log.json', LOG_LINES)
+        zf.writestr('support-dump/huge-omnichannel-settings.json', ' ' * 4096)
+    return path
+
+
+class TestZipDump:
+    """Test the virtual dump over a ZIP archive."""
+
+    def test_finds_dump_directory(self, dump_zip):
+        """The directory holding server-statistics.json is the dump root."""
+        dump = ZipDump(dump_zip, 1024)
+        dump_path = dump.find_dump_path()
+        assert dump_path.prefix == 'support-dump'
+        assert [m.name for m in dump_path.glob('*log.json')] == ['2024-05-01-log.json']
+
+    def test_nested_dump_directory(self, tmp_path):
+        """The dump root is found below nested folders, as utils.find_dump_path does on disk."""
+        path = tmp_path / 'nested.zip'
+        with zipfile.ZipFile(path, 'w') as zf:
+            zf.writestr('export/2024/support-dump/2024-05-01-server-statistics.json', '{}')
+            zf.writestr('export/2024/support-dump/2024-05-01-log.json', LOG_LINES)
+        dump_path = ZipDump(path, 1024).find_dump_path()
+        assert dump_path.prefix == 'export/2024/support-dump'
+        assert [m.name for m in dump_path.glob('*log.json')] == ['2024-05-01-log.json']
+
+    def test_root_log_fallback(self, tmp_path):
+        """Without server statistics a root holding a log is the dump root."""
+        path = tmp_path / 'logs-only.zip'
+        with zipfile.ZipFile(path, 'w') as zf:
+            zf.writestr('log.json', LOG_LINES)
+        assert ZipDump(path, 1024).find_dump_path().prefix == ''
+        with zipfile.ZipFile(path, 'w') as zf:
+            zf.writestr('notes.txt', 'no dump here')
+        assert ZipDump(path, 1024).find_dump_path() is None
+
+    def test_unsafe_and_large_members_are_skipped(self, dump_zip):
+        """Traversal paths and oversized members are never exposed."""
+        dump = ZipDump(dump_zip, 1024)
+        assert '../evil-log.json' not in dump.members
+        assert 'support-dump/huge-omnichannel-settings.json' not in dump.members
+
+    def test_member_streams(self, dump_zip):
+        """Members open in text and binary mode."""
+        member = next(ZipDump(dump_zip, 1024).find_dump_path().glob('*log.json'))
+        with member.open('r', encoding='utf-8') as f:
+            assert f.read() == LOG_LINES
+        with member.open('rb') as f:
+            assert f.read() == LOG_LINES.encode('utf-8')
+
+    def test_matches_extracted_analysis(self, dump_zip, tmp_path):
+        """Analyzing from the archive equals extracting and analyzing from disk."""
+        extract_dir = tmp_path / 'extracted'
+        dump = ZipDump(dump_zip, 1024)
+        with zipfile.ZipFile(dump_zip) as zf:
+            zf.extractall(extract_dir, members=dump.members)
+        expected = pipeline.analyze_dump(find_dump_path(extract_dir), 40, executor='serial')['results']
+        dump_path = dump.find_dump_path()
+        for executor in ('serial', 'thread', 'process'):
+            assert pipeline.analyze_dump(dump_path, 40, executor=executor, max_workers=2)['results'] == expected
+
+    def test_invalid_archive(self, tmp_path):
+        """Non-ZIP uploads are rejected."""
+        path = tmp_path / 'not.zip'
+        path.write_bytes(b'not a zip file')
+        with pytest.raises(ValidationError, match='Invalid ZIP'):
+            ZipDump(path, 1024)
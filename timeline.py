@@ -0,0 +1,105 @@
+# timeline.py
+from datetime import datetime, timedelta
+
+# Chart resolutions, finest first: name -> (bucket width in minutes, label format).
+# Labels carry the full date so multi-day dumps never repeat a label.
+RESOLUTIONS = {
+    'minute': (1, '%Y-%m-%d %H:%M'),
+    'hour': (60, '%Y-%m-%d %H:00'),
+    'day': (1440, '%Y-%m-%d'),
+}
+
+_EPOCH = datetime(1970, 1, 1)
+
+def rollup(minutes, resolution):
+    """
+    Sums per-minute counts into buckets of one resolution.
+
+    Args:
+        minutes: (epoch minute, count, UTC offset) tuples sorted by minute; the
+            offset (a timedelta, or None for UTC) gives the local wall-clock
+            time used for labels and for hour/day boundaries
+        resolution: Key of RESOLUTIONS
+
+    Returns:
+        Sorted list of (local bucket start in minutes since the epoch, count)
+    """
+    width = RESOLUTIONS[resolution][0]
+    if width == 1:
+        # Minutes stay in time order; each is shown in the offset of its first entry.
+        return [(minute + _offset_minutes(offset), count) for minute, count, offset in minutes]
+    buckets = {}
+    for minute, count, offset in minutes:
+        start = (minute + _offset_minutes(offset)) // width * width
+        buckets[start] = buckets.get(start, 0) + count
+    return sorted(buckets.items())
+
+def _offset_minutes(offset):
+    return offset // timedelta(minutes=1) if offset else 0
+
+def lttb(points, threshold):
+    """
+    Downsamples points with Largest-Triangle-Three-Buckets (Steinarsson, 2013).
+
+    Keeps the first and last point and, from each of ``threshold - 2`` equal
+    slices in between, the point forming the largest triangle with the point
+    kept before it and the average of the next slice. Peaks survive, unlike
+    with plain decimation.
+
+    Args:
+        points: (x, y) tuples sorted by x
+        threshold: Number of points to keep (at least 3)
+
+    Returns:
+        The selected points, in order
+    """
+    threshold = max(threshold, 3)
+    if len(points) <= threshold:
+        return list(points)
+    sampled = [points[0]]
+    every = (len(points) - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        next_start, next_end = end, min(int((i + 2) * every) + 1, len(points))
+        next_slice = points[next_start:next_end] or [points[-1]]
+        avg_x = sum(x for x, _ in next_slice) / len(next_slice)
+        avg_y = sum(y for _, y in next_slice) / len(next_slice)
+        ax, ay = points[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            x, y = points[j]
+            area = abs((ax - avg_x) * (y - ay) - (ax - x) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        a = best
+    sampled.append(points[-1])
+    return sampled
+
+def build_timeline(minutes, max_points):
+    """
+    Builds Chart.js timeline data that fits a point budget.
+
+    Picks the finest resolution with at most ``max_points`` buckets; when even
+    daily buckets exceed it, they are downsampled with lttb.
+
+    Args:
+        minutes: (epoch minute, count, UTC offset) tuples sorted by minute
+        max_points: Point budget for the chart
+
+    Returns:
+        Dict with 'labels', 'data' and the 'resolution' used
+    """
+    for resolution in RESOLUTIONS:
+        points = rollup(minutes, resolution)
+        if len(points) <= max_points:
+            break
+    else:
+        points = lttb(points, max_points)
+    label_format = RESOLUTIONS[resolution][1]
+    return {
+        'labels': [(_EPOCH + timedelta(minutes=start)).strftime(label_format) for start, _ in points],
+        'data': [count for _, count in points],
+        'resolution': resolution,
+    }
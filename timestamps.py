@@ -0,0 +1,79 @@
+# timestamps.py
+from datetime import datetime, timedelta, timezone
+
+# Stored in time columns (see entry_index) for entries without a usable timestamp.
+NO_TIME = -(2 ** 63)
+# Distinct minutes remembered by a TimestampParser before its cache is reset.
+MINUTE_CACHE_SIZE = 100000
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MILLISECOND = timedelta(milliseconds=1)
+_UTC = timedelta(0)
+# ':SS.sss' suffix -> milliseconds into the minute; filled as suffixes are seen (at most 60000).
+_SUBMINUTE_MS = {}
+
+def parse_time_ms(time_str):
+    """
+    Parses an ISO 8601 log timestamp.
+
+    Args:
+        time_str: Timestamp such as '2024-05-01T10:00:12.000Z'
+
+    Returns:
+        (epoch milliseconds, UTC offset) tuple, the offset being None for
+        timestamps without one (which are read as UTC); None if unparseable
+    """
+    try:
+        dt = datetime.fromisoformat(time_str.replace('Z', '+00:00'))
+    except (ValueError, TypeError, AttributeError):
+        return None
+    offset = dt.utcoffset()
+    if offset is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return (dt - _EPOCH) // _MILLISECOND, offset
+
+class TimestampParser:
+    """
+    parse_time_ms with a fast path for Rocket.Chat's own timestamp layout.
+
+    Rocket.Chat writes every log time as 'YYYY-MM-DDTHH:MM:SS.sssZ'. For
+    those, the 'YYYY-MM-DDTHH:MM' prefix is parsed once and cached, and the
+    seconds and milliseconds are added with integer arithmetic. Any other
+    layout is handed to parse_time_ms, so the results are the same.
+    """
+
+    def __init__(self, cache_size=MINUTE_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._minutes = {}  # prefix -> epoch ms of the minute, or None if invalid
+
+    def parse(self, time_str):
+        """Returns (epoch milliseconds, UTC offset) like parse_time_ms, or None."""
+        if type(time_str) is str and len(time_str) == 24 and time_str[23] == 'Z':
+            minute_ms = self._minutes.get(time_str[:16], False)
+            if minute_ms is False:
+                minute_ms = self._parse_minute(time_str[:16])
+            subminute_ms = _SUBMINUTE_MS.get(time_str[16:23])
+            if subminute_ms is None:
+                subminute_ms = _parse_subminute(time_str[16:23])
+            if minute_ms is not None and subminute_ms is not None:
+                return minute_ms + subminute_ms, _UTC
+        return parse_time_ms(time_str)
+
+    def _parse_minute(self, prefix):
+        minute_ms = None
+        if prefix[4] == '-' and prefix[7] == '-' and prefix[10] == 'T' and prefix[13] == ':':
+            parsed = parse_time_ms(prefix + ':00Z')
+            if parsed:
+                minute_ms = parsed[0]
+        if len(self._minutes) >= self.cache_size:
+            self._minutes.clear()
+        self._minutes[prefix] = minute_ms
+        return minute_ms
+
+def _parse_subminute(suffix):
+    """Returns the milliseconds of a ':SS.sss' suffix, or None if it is not in that form."""
+    seconds, millis = suffix[1:3], suffix[4:]
+    if suffix[0] != ':' or suffix[3] != '.' or not (seconds + millis).isascii() or not (seconds + millis).isdigit() or int(seconds) > 59:
+        return None
+    _SUBMINUTE_MS[suffix] = subminute_ms = int(seconds) * 1000 + int(millis)
+    return subminute_ms
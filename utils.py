@@ -1,11 +1,18 @@
 # utils.py
+import hashlib
+import os
+import shutil
+import struct
 import zipfile
 import tempfile
 import logging
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import BinaryIO, Optional, Tuple
 from werkzeug.utils import secure_filename
 
+# Largest uncompressed:compressed size ratio accepted for a ZIP member.
+MAX_COMPRESSION_RATIO = 100
+
 class ValidationError(Exception):
     """Custom exception for validation errors."""
     pass
@@ -39,7 +46,7 @@ def validate_zip_file(file_path: Path, max_size: int, max_extracted_size: int) -
                 # Check for suspicious compression ratios (potential zip bomb)
                 if info.compress_size > 0:
                     ratio = info.file_size / info.compress_size
-                    if ratio > 100:  # Compression ratio threshold
+                    if ratio > MAX_COMPRESSION_RATIO:
                         raise ValidationError(
                             f"Suspicious compression ratio for {info.filename}: {ratio:.1f}:1"
                         )
@@ -59,52 +66,16 @@ def validate_zip_file(file_path: Path, max_size: int, max_extracted_size: int) -
             raise
         raise ValidationError(f"Error validating ZIP file: {str(e)}")
 
-def safe_extract_zip(file_path: Path, extract_path: Path, max_single_file_size: int) -> None:
-    """
-    Safely extract a ZIP file with security checks.
-    
-    Args:
-        file_path: Path to the ZIP file
-        extract_path: Directory to extract files to
-        max_single_file_size: Maximum size for any single extracted file
-        
-    Raises:
-        ValidationError: If extraction fails security checks
-    """
-    try:
-        with zipfile.ZipFile(file_path, 'r') as zip_ref:
-            for member in zip_ref.infolist():
-                # Skip directories
-                if member.is_dir():
-                    continue
-                    
-                # Validate filename to prevent directory traversal
-                if '..' in member.filename or member.filename.startswith('/'):
-                    logging.warning(f"Skipping potentially malicious path: {member.filename}")
-                    continue
-                
-                # Check individual file size
-                if member.file_size > max_single_file_size:
-                    logging.warning(f"Skipping large file: {member.filename} ({member.file_size} bytes)")
-                    continue
-                
-                # Extract the file
-                zip_ref.extract(member, extract_path)
-                
-    except zipfile.BadZipFile:
-        raise ValidationError("Invalid ZIP file format during extraction")
-    except Exception as e:
-        raise ValidationError(f"Error extracting ZIP file: {str(e)}")
-
 def find_dump_path(base_path: Path) -> Optional[Path]:
     """
     Robustly finds the correct directory containing the support dump files.
     
     Args:
-        base_path: Base directory to search in
+        base_path: Base directory to search in, a Path or anything offering
+            the same ``rglob``/``glob``/``parent`` lookups (zip_dump.ZipDirectory)
         
     Returns:
-        Path to the dump directory, or None if not found
+        The dump directory, or None if not found
     """
     # Look for server-statistics.json as primary indicator
     for path in base_path.rglob('*server-statistics.json'):
@@ -116,6 +87,216 @@ def find_dump_path(base_path: Path) -> Optional[Path]:
         
     return None
 
+def save_upload(stream: BinaryIO, destination: Path, chunk_size: int = 1024 * 1024) -> str:
+    """
+    Copy an upload stream to disk, hashing it on the way.
+    
+    Args:
+        stream: Readable binary stream of the uploaded file
+        destination: Path to write the upload to
+        chunk_size: Bytes copied per read
+        
+    Returns:
+        SHA-256 hex digest of the upload content
+    """
+    digest = hashlib.sha256()
+    with open(destination, 'wb') as out:
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            out.write(chunk)
+    return digest.hexdigest()
+
+# ZIP record signatures and fixed-size header layouts (see the PKWARE APPNOTE).
+_LOCAL_HEADER = struct.Struct('<4s5H3L2H')
+_CENTRAL_HEADER = struct.Struct('<4s6H3L5H2L')
+_LOCAL_SIGNATURE = b'PK\x03\x04'
+_CENTRAL_SIGNATURE = b'PK\x01\x02'
+# End of central directory (also Zip64), digital signature and archive extra data records.
+_TRAILER_SIGNATURES = (b'PK\x05\x06', b'PK\x06\x06', b'PK\x05\x05', b'PK\x06\x08')
+_ZIP64_MARKER = 0xFFFFFFFF
+
+def _zip64_sizes(extra: bytes, file_size: int, compress_size: int) -> Tuple[int, int]:
+    """Reads the sizes a header left at 0xFFFFFFFF from its Zip64 extra field."""
+    pos = 0
+    while pos + 4 <= len(extra):
+        field_id, field_size = struct.unpack_from('<HH', extra, pos)
+        if field_id == 1:
+            field = extra[pos + 4:pos + 4 + field_size]
+            offset = 0
+            if file_size == _ZIP64_MARKER and offset + 8 <= len(field):
+                file_size = struct.unpack_from('<Q', field, offset)[0]
+                offset += 8
+            if compress_size == _ZIP64_MARKER and offset + 8 <= len(field):
+                compress_size = struct.unpack_from('<Q', field, offset)[0]
+            break
+        pos += 4 + field_size
+    return file_size, compress_size
+
+class ZipStreamChecker:
+    """
+    Applies the validate_zip_file checks to a ZIP archive while it is still arriving.
+
+    The local file headers and then the central directory are read as their
+    bytes are fed in; member data is skipped without being buffered. Data that
+    does not start like a ZIP is rejected from its first bytes, and a member
+    with a suspicious compression ratio or an archive too large once extracted
+    as soon as the header announcing it arrives. A member whose sizes follow
+    its data (a data descriptor) ends the streamed checks, as the next header
+    cannot be located; validate_zip_file still checks the complete file.
+    """
+
+    def __init__(self, max_extracted_size: int):
+        self.max_extracted_size = max_extracted_size
+        self._buf = bytearray()
+        self._skip = 0  # member data bytes still to pass over
+        self._records = 0
+        self._in_central = False
+        self._extracted_size = 0
+        self.done = False
+
+    def _check_member(self, name: bytes, file_size: int, compress_size: int) -> None:
+        if name.endswith(b'/'):
+            return
+        filename = name.decode('utf-8', errors='replace')
+        if compress_size > 0 and file_size / compress_size > MAX_COMPRESSION_RATIO:
+            raise ValidationError(f"Suspicious compression ratio for {filename}: {file_size / compress_size:.1f}:1")
+        self._extracted_size += file_size
+        if self._extracted_size > self.max_extracted_size:
+            raise ValidationError(
+                f"Total extracted size too large: {self._extracted_size} bytes (max: {self.max_extracted_size})"
+            )
+
+    def _local_header(self) -> bool:
+        buf = self._buf
+        if len(buf) < _LOCAL_HEADER.size:
+            return False
+        _, _, flags, _, _, _, _, compress_size, file_size, name_length, extra_length = _LOCAL_HEADER.unpack_from(buf)
+        end = _LOCAL_HEADER.size + name_length + extra_length
+        if len(buf) < end:
+            return False
+        if flags & 0x08:
+            self.done = True
+            return False
+        name = bytes(buf[_LOCAL_HEADER.size:_LOCAL_HEADER.size + name_length])
+        file_size, compress_size = _zip64_sizes(bytes(buf[_LOCAL_HEADER.size + name_length:end]), file_size, compress_size)
+        self._check_member(name, file_size, compress_size)
+        del buf[:end]
+        skipped = min(compress_size, len(buf))
+        del buf[:skipped]
+        self._skip = compress_size - skipped
+        return True
+
+    def _central_header(self) -> bool:
+        buf = self._buf
+        if len(buf) < _CENTRAL_HEADER.size:
+            return False
+        header = _CENTRAL_HEADER.unpack_from(buf)
+        compress_size, file_size, name_length, extra_length, comment_length = header[8:13]
+        end = _CENTRAL_HEADER.size + name_length + extra_length + comment_length
+        if len(buf) < end:
+            return False
+        name = bytes(buf[_CENTRAL_HEADER.size:_CENTRAL_HEADER.size + name_length])
+        extra = bytes(buf[_CENTRAL_HEADER.size + name_length:_CENTRAL_HEADER.size + name_length + extra_length])
+        if not self._in_central:
+            # The central directory lists every member again; count them afresh.
+            self._in_central = True
+            self._extracted_size = 0
+        self._check_member(name, *_zip64_sizes(extra, file_size, compress_size))
+        del buf[:end]
+        return True
+
+    def feed(self, data: bytes) -> None:
+        """
+        Checks the next bytes of the archive.
+
+        Raises:
+            ValidationError: If the archive is not a ZIP or fails a check
+        """
+        if self.done:
+            return
+        if self._skip:
+            skipped = min(self._skip, len(data))
+            self._skip -= skipped
+            data = memoryview(data)[skipped:]
+        self._buf += data
+        while len(self._buf) >= 4:
+            signature = bytes(self._buf[:4])
+            if signature == _LOCAL_SIGNATURE and not self._in_central:
+                if not self._local_header() and not self.done:
+                    return
+            elif signature == _CENTRAL_SIGNATURE:
+                if not self._central_header():
+                    return
+            elif signature in _TRAILER_SIGNATURES:
+                self.done = True
+            elif self._records == 0:
+                raise ValidationError("Invalid ZIP file format")
+            else:
+                # Unexpected data; leave the verdict to validate_zip_file.
+                self.done = True
+            if self.done:
+                del self._buf[:]
+                return
+            self._records += 1
+
+class UploadSink:
+    """
+    Temporary file an upload is streamed into as the request body arrives.
+
+    Every chunk is size-checked, hashed and fed to a ZipStreamChecker before it
+    is written, so an upload that is too large or not a usable ZIP is rejected
+    mid-transfer, and a good one has its SHA-256 ready once it is complete.
+    The file is removed when the sink is closed unless it was saved first.
+    """
+
+    def __init__(self, max_size: int, max_extracted_size: int, directory: Optional[Path] = None):
+        self.max_size = max_size
+        self.size = 0
+        self._digest = hashlib.sha256()
+        self._checker = ZipStreamChecker(max_extracted_size)
+        self._file = tempfile.NamedTemporaryFile(dir=directory, suffix='.upload', delete=False)
+        self.path = Path(self._file.name)
+
+    def write(self, data: bytes) -> int:
+        try:
+            self.size += len(data)
+            if self.size > self.max_size:
+                raise ValidationError(f"File too large: over {self.max_size} bytes")
+            self._checker.feed(data)
+        except ValidationError:
+            self.close()
+            raise
+        self._digest.update(data)
+        return self._file.write(data)
+
+    def hexdigest(self) -> str:
+        return self._digest.hexdigest()
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def read(self, size: int = -1) -> bytes:
+        return self._file.read(size)
+
+    def save(self, destination: Path) -> str:
+        """Moves the complete upload to ``destination``; returns its SHA-256 hex digest."""
+        self._file.close()
+        shutil.move(str(self.path), str(destination))
+        return self.hexdigest()
+
+    def close(self) -> None:
+        self._file.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
 def get_safe_filename(filename: str) -> str:
     """
     Get a safe filename using werkzeug's secure_filename.
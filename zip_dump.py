@@ -0,0 +1,128 @@
+# zip_dump.py
+import fnmatch
+import io
+import logging
+import posixpath
+import zipfile
+from pathlib import Path
+from typing import Iterator, Optional
+
+from utils import ValidationError, find_dump_path
+
+def is_safe_member(info: zipfile.ZipInfo, max_single_file_size: int) -> bool:
+    """
+    Decides whether an archive member may be read.
+
+    Args:
+        info: Archive member
+        max_single_file_size: Maximum uncompressed size for a member
+
+    Returns:
+        True if the member may be read
+    """
+    if info.is_dir():
+        return False
+    # Validate filename to prevent directory traversal
+    if '..' in info.filename or info.filename.startswith('/'):
+        logging.warning(f"Skipping potentially malicious path: {info.filename}")
+        return False
+    if info.file_size > max_single_file_size:
+        logging.warning(f"Skipping large file: {info.filename} ({info.file_size} bytes)")
+        return False
+    return True
+
+class ZipMember:
+    """
+    A file inside a support dump ZIP, usable wherever the analyzers take a Path.
+
+    Only the dump's member listing and the member name are stored, so members
+    can be handed to worker threads or processes; each ``open`` streams the
+    member straight out of the archive without extracting it.
+    """
+
+    def __init__(self, dump: 'ZipDump', member_name: str):
+        self.dump = dump
+        self.member_name = member_name
+
+    @property
+    def archive_path(self) -> Path:
+        return self.dump.archive_path
+
+    @property
+    def name(self) -> str:
+        return posixpath.basename(self.member_name)
+
+    @property
+    def parent(self) -> 'ZipDirectory':
+        return ZipDirectory(self.dump, posixpath.dirname(self.member_name))
+
+    def exists(self) -> bool:
+        return True
+
+    def open(self, mode='r', encoding=None, newline=None):
+        """Opens the member for streaming reads ('r' or 'rb')."""
+        if mode not in ('r', 'rb'):
+            raise ValueError(f"ZIP members are read-only, got mode '{mode}'")
+        with zipfile.ZipFile(self.archive_path, 'r') as zip_ref:
+            # The archive file stays open until the member stream is closed.
+            raw = zip_ref.open(self.member_name, 'r')
+        if mode == 'rb':
+            return raw
+        return io.TextIOWrapper(raw, encoding=encoding or 'utf-8', newline=newline)
+
+    def __eq__(self, other):
+        return isinstance(other, ZipMember) and (self.archive_path, self.member_name) == (other.archive_path, other.member_name)
+
+    def __hash__(self):
+        return hash((self.archive_path, self.member_name))
+
+    def __str__(self):
+        return f"{self.archive_path.name}:{self.member_name}"
+
+    __repr__ = __str__
+
+class ZipDirectory:
+    """A directory inside a support dump ZIP, supporting the ``glob``/``rglob`` lookups of the pipeline and utils.find_dump_path."""
+
+    def __init__(self, dump: 'ZipDump', prefix: str):
+        self.dump = dump
+        self.prefix = prefix
+
+    def glob(self, pattern: str) -> Iterator[ZipMember]:
+        """Yields direct children whose file name matches ``pattern``."""
+        for member_name in self.dump.members:
+            directory, name = posixpath.split(member_name)
+            if directory == self.prefix and fnmatch.fnmatchcase(name, pattern):
+                yield ZipMember(self.dump, member_name)
+
+    def rglob(self, pattern: str) -> Iterator[ZipMember]:
+        """Yields the files at any depth below this directory whose file name matches ``pattern``."""
+        for member_name in self.dump.members:
+            if (not self.prefix or member_name.startswith(self.prefix + '/')) and fnmatch.fnmatchcase(posixpath.basename(member_name), pattern):
+                yield ZipMember(self.dump, member_name)
+
+    def __str__(self):
+        return f"{self.dump.archive_path.name}:{self.prefix or '/'}"
+
+class ZipDump:
+    """
+    Read-only view of an uploaded support dump ZIP.
+
+    Replaces extract-then-rglob: the central directory is read once, unsafe or
+    oversized members are dropped (see is_safe_member), and the analyzers
+    stream the remaining members directly from the archive.
+    """
+
+    def __init__(self, archive_path: Path, max_single_file_size: int):
+        self.archive_path = Path(archive_path)
+        try:
+            with zipfile.ZipFile(self.archive_path, 'r') as zip_ref:
+                self.members = [info.filename for info in zip_ref.infolist() if is_safe_member(info, max_single_file_size)]
+        except zipfile.BadZipFile:
+            raise ValidationError("Invalid ZIP file format")
+        except OSError as e:
+            raise ValidationError(f"Error reading ZIP file: {str(e)}")
+
+    def find_dump_path(self) -> Optional[ZipDirectory]:
+        """Finds the directory inside the archive that holds the dump files (see utils.find_dump_path)."""
+        return find_dump_path(ZipDirectory(self, ''))